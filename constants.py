@@ -10,13 +10,55 @@ FILETYPE_DESCRIPTION = """The type of file to import.\n
 Options:\n
 - [bold italic green]image[/bold italic green]: Import image files. (*.jpg, *.heif, *.heic, *.hif)\n
 - [bold italic green]video[/bold italic green]: Import video files. (*.mp4, *.lrf, *.mov)\n
+- [bold italic green]all[/bold italic green]: Import image and video files in a single pass.\n
 """
 COMPARISON_MODE_DESCRIPTION = """The mode to use when comparing files.\n
 Options:\n
-- [bold italic green]full[/bold italic green]: Calculate the full hash of a file and compare it. (safe but slow)\n
+- [bold italic green]full[/bold italic green]: Compare the full contents of the files, stopping at the first difference. (safe but slow)\n
 - [bold italic green]partial[/bold italic green]: Compare a partial hash, i.e. beginning and end chunks of the hash. If those match, the files are considered identical. (not 100% safe but fast, recommended for large files)\n
+- [bold italic green]sampled[/bold italic green]: Compare blocks spread over the whole file, more of them for larger files. (safer than partial, much faster than full for large files)\n
 """
+CERTAIN_DESCRIPTION = "With the sampled comparison mode, confirm files whose samples match with a full comparison"
 VERBOSE_DESCRIPTION = "Enable verbose mode"
 LOG_FORMAT = "%(message)s"
-BUFFER_SIZE = 65536  # 64KB
+BUFFER_SIZE = 1024 * 1024  # 1MB
 FORCE_DESCRIPTION = "Skip hash comparison when replacing or checking for new files"
+WORKERS_DESCRIPTION = "Number of files to resolve, compare and copy in parallel"
+PIPELINE_QUEUE_SIZE = 64  # Maximum number of files in flight between stages
+EXIF_PROCESSES_DESCRIPTION = "Number of processes to extract EXIF dates of images in batches (0 to extract them in the worker threads)"
+EXIF_BATCH_SIZE = 32  # Number of images handed to the EXIF process pool at once
+METADATA_CACHE_DESCRIPTION = "Cache the resolved capture dates in the destination, so unchanged files are not parsed again on the next import"
+STATE_DIRECTORY = (
+    ".import-media"  # Folder in the destination for the importer's own files
+)
+METADATA_CACHE_FILE = "metadata.sqlite"
+METADATA_CACHE_MAX_ENTRIES = 200_000
+CATALOG_DESCRIPTION = "Keep a catalog of the sizes and hashes of imported files in the destination, so existing files do not have to be read again for comparisons"
+CATALOG_FILE = "catalog.sqlite"
+RECURSIVE_DESCRIPTION = (
+    "Also import from all subfolders of the source, e.g. from the root of a card"
+)
+VERIFY_DESCRIPTION = (
+    "Hash files while copying them and verify the written copies against that hash"
+)
+DEDUP_DESCRIPTION = "Skip files whose content already exists anywhere in the destination, whatever their name and date folder (uses the catalog)"
+TREE_HASH_DESCRIPTION = "Use tree hashes, which hash segments of large files in parallel on all cores, for the catalog and the verification of copies"
+HASH_ALGORITHM_DESCRIPTION = """The hash algorithm of the signatures stored in the catalog and of the verification of copies.\n
+Options:\n
+- [bold italic green]sha256[/bold italic green]: SHA-256. (default)\n
+- [bold italic green]blake2b[/bold italic green]: BLAKE2b, faster than SHA-256 in hashlib.\n
+- [bold italic green]crc32[/bold italic green]: CRC-32, a cheap checksum, matching files are confirmed by comparing them completely.\n
+"""
+DEDUP_SOURCES_DESCRIPTION = "Import only one file of each group of identical source files, e.g. of the two cards of a dual-slot camera (compared according to the comparison mode)"
+JOURNAL_DESCRIPTION = "Keep a journal of the import in the destination, so an interrupted import resumes where it stopped: completed files are skipped without being compared, and copies interrupted midway are redone"
+JOURNAL_FILE = "journal.sqlite"
+DURABILITY_DESCRIPTION = """When the copied files are flushed to the destination device. Copies are always written to a temporary file and renamed when complete, so an interrupted import never leaves a truncated file.\n
+Options:\n
+- [bold italic green]file[/bold italic green]: Flush every file before it is renamed. (safest, slow on hard disks)\n
+- [bold italic green]batch[/bold italic green]: Flush all files together at the end of the import.\n
+- [bold italic green]none[/bold italic green]: Leave flushing to the operating system. (default)\n
+"""
+RESUME_DESCRIPTION = "Keep the temporary files of interrupted copies and continue them on the next import instead of starting over, if samples of the part already copied match the source"
+PLAN_FILE_DESCRIPTION = "The file the import plan is saved to by the plan command and read from by the apply command"
+PLAN_FILE = "import-plan.jsonl"
+COPY_BUFFER_SIZE = 8 * 1024 * 1024  # 8MB
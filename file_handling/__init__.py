@@ -1,4 +1,25 @@
-from file_handling.discovery import find_media_files
-from file_handling.organization import get_destination_folder
+from file_handling.destination_index import DestinationIndex
+from file_handling.discovery import (
+    find_media_files,
+    get_file_type,
+    iter_media_files,
+)
+from file_handling.duplicates import DuplicateDetector
+from file_handling.organization import (
+    build_destination_folder,
+    create_destination_folders,
+    get_destination_folder,
+    get_destination_folders,
+)
 
-__all__ = ["find_media_files", "get_destination_folder"]
+__all__ = [
+    "DestinationIndex",
+    "DuplicateDetector",
+    "find_media_files",
+    "get_file_type",
+    "iter_media_files",
+    "build_destination_folder",
+    "create_destination_folders",
+    "get_destination_folder",
+    "get_destination_folders",
+]
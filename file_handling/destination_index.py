@@ -0,0 +1,118 @@
+import os
+import threading
+from pathlib import Path
+
+
+class DestinationIndex:
+    """
+    Per-run cache of the names in the destination folders.
+
+    Each folder is listed once, the first time a file in it is looked up.
+    Existence checks and the search for a free name are then answered from
+    memory, so the number of directory reads scales with the number of
+    folders instead of the number of files. Files created by the importer
+    have to be added with `add`, so the index stays current for the run.
+
+    The index only knows about changes made through it; it is meant to live
+    for a single import run. All methods are thread-safe.
+
+    A thread importing a file claims its destination with `claim`, which
+    checks and reserves the name in one step. Until the claim is released,
+    other threads claiming the same destination wait, so they never copy to
+    it at the same time or compare with a copy in progress. Destinations
+    with other names are never blocked, whatever their size.
+    """
+
+    def __init__(self):
+        self._folders: dict[Path, set[str]] = {}
+        self._claimed: set[Path] = set()
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+
+    def _names(self, folder: Path) -> set[str]:
+        """Return the names in a folder, listing it on first use."""
+        names = self._folders.get(folder)
+        if names is not None:
+            return names
+
+        # List the folder outside of the lock, so slow listings of different
+        # folders do not block each other
+        try:
+            with os.scandir(folder) as scanner:
+                listed = {entry.name for entry in scanner}
+        except FileNotFoundError:
+            listed = set()
+
+        with self._lock:
+            return self._folders.setdefault(folder, listed)
+
+    def exists(self, file: Path) -> bool:
+        """Check whether a file exists in its destination folder."""
+        names = self._names(file.parent)
+        with self._lock:
+            return file.name in names
+
+    def add(self, file: Path) -> None:
+        """Record a file created in its destination folder."""
+        names = self._names(file.parent)
+        with self._lock:
+            names.add(file.name)
+
+    def discard(self, file: Path) -> None:
+        """Forget a file, e.g. a reserved name whose copy failed."""
+        names = self._names(file.parent)
+        with self._lock:
+            names.discard(file.name)
+
+    def claim(self, file: Path) -> bool:
+        """
+        Claim a destination file for the current thread.
+
+        Waits while another thread has claimed the same file. The claim must
+        be released with `release`.
+
+        Returns:
+            bool: True if the file exists, False otherwise.
+        """
+        names = self._names(file.parent)
+        with self._released:
+            while file in self._claimed:
+                self._released.wait()
+            self._claimed.add(file)
+            return file.name in names
+
+    def release(self, file: Path, exists: bool) -> None:
+        """Release the claim on a file, recording whether it exists now."""
+        names = self._names(file.parent)
+        with self._released:
+            self._claimed.discard(file)
+            if exists:
+                names.add(file.name)
+            else:
+                names.discard(file.name)
+            self._released.notify_all()
+
+    def ensure_folder(self, folder: Path) -> None:
+        """Create a destination folder, unless it is already known to exist."""
+        if folder in self._folders:
+            return
+        folder.mkdir(parents=True, exist_ok=True)
+        self._names(folder)
+
+    def reserve_free_name(self, file: Path) -> Path:
+        """
+        Find and reserve the first free name `<stem>_NN<suffix>` for a file.
+
+        The numbering starts at 02, like the rename strategy always did. The
+        returned name is added to the index right away, so concurrent callers
+        never get the same name.
+        """
+        names = self._names(file.parent)
+        with self._lock:
+            i = 2
+            while True:
+                new_filename = f"{file.stem}_{i:02}{file.suffix}"
+                if new_filename not in names:
+                    names.add(new_filename)
+                    return file.parent / new_filename
+                i += 1
@@ -1,32 +1,120 @@
 import logging
+import os
 from pathlib import Path
+from typing import Iterator, Optional
 
 from utils.validation import FileType
 
+# Supported file extensions per file type, in upper case
+MEDIA_EXTENSIONS = {
+    FileType.IMAGE: frozenset({".JPG", ".HIF", ".HEIF", ".HEIC"}),
+    FileType.VIDEO: frozenset({".MP4", ".LRF", ".MOV"}),
+}
+MEDIA_EXTENSIONS[FileType.ALL] = (
+    MEDIA_EXTENSIONS[FileType.IMAGE] | MEDIA_EXTENSIONS[FileType.VIDEO]
+)
+
+# The file type of each supported extension
+_EXTENSION_TYPES = {
+    extension: filetype
+    for filetype in (FileType.IMAGE, FileType.VIDEO)
+    for extension in MEDIA_EXTENSIONS[filetype]
+}
+
+# Folders of operating systems and cameras that never contain media to import.
+# Hidden folders (starting with a dot) are skipped as well.
+IGNORED_DIRECTORIES = frozenset(
+    {
+        "System Volume Information",
+        "$RECYCLE.BIN",
+        "THMBNL",  # Sony thumbnails of video clips
+    }
+)
+
+
+def get_file_type(file_path: Path) -> Optional[FileType]:
+    """
+    Classify a file as image or video by its extension.
+
+    Returns None for files that are not supported media files.
+    """
+    return _EXTENSION_TYPES.get(file_path.suffix.upper())
+
+
+def iter_media_files(
+    source_path: Path,
+    filetype: FileType,
+    log: logging.Logger,
+    recursive: bool = False,
+    warn_if_empty: bool = True,
+) -> Iterator[Path]:
+    """
+    Lazily yield all media files with given filetype in the source directory.
+
+    Files are yielded as soon as they are found, so callers can start
+    processing them before the whole source has been read. The directories
+    are read with `os.scandir`, whose entries carry the file type, so no
+    additional stat call is needed per file. Within a directory, files are
+    yielded in name order, before the files of its subdirectories.
+
+    Args:
+        source_path: The directory to search.
+        filetype: The type of media files to find. `FileType.ALL` finds images
+            and videos in the same pass.
+        log: A logging.Logger instance for logging operations.
+        recursive: Also search all subdirectories, e.g. `DCIM/100MSDCF` and
+            `PRIVATE/M4ROOT/CLIP` of a card, except for hidden and known
+            system folders.
+        warn_if_empty: Log a warning if no media files are found. Disable it
+            for directories that may be empty, e.g. a new destination.
+    """
+    extensions = MEDIA_EXTENSIONS[filetype]
+
+    found = 0
+    directories = [source_path]
+    while directories:
+        directory = directories.pop()
+        try:
+            with os.scandir(directory) as scanner:
+                entries = sorted(scanner, key=lambda entry: entry.name)
+        except OSError as e:
+            if directory == source_path:
+                raise
+            log.warning(f"Skipping directory {directory}: {str(e)}")
+            continue
+
+        subdirectories = []
+        for entry in entries:
+            if entry.name.startswith("."):
+                # Hidden files, including AppleDouble files ("._*")
+                continue
+            if recursive and entry.is_dir(follow_symlinks=False):
+                if entry.name not in IGNORED_DIRECTORIES:
+                    subdirectories.append(Path(entry.path))
+            elif (
+                os.path.splitext(entry.name)[1].upper() in extensions
+                and entry.is_file()
+            ):
+                found += 1
+                yield Path(entry.path)
+
+        # Visit the subdirectories in name order
+        directories.extend(reversed(subdirectories))
+
+    if not found and warn_if_empty:
+        kind = "media" if filetype == FileType.ALL else filetype.value
+        log.warning(f"No {kind} files found in {source_path}")
+
 
 def find_media_files(
-    source_path: Path, filetype: FileType, log: logging.Logger
+    source_path: Path,
+    filetype: FileType,
+    log: logging.Logger,
+    recursive: bool = False,
 ) -> list[Path]:
     """Find all media files with given filetype in the source directory."""
-    match filetype:
-        case FileType.IMAGE:
-            media_files = [
-                f
-                for f in source_path.iterdir()
-                if f.is_file()
-                and f.suffix.upper() in [".JPG", ".HIF", ".HEIF", ".HEIC"]
-                and not f.name.startswith("._")
-            ]
-        case FileType.VIDEO:
-            media_files = [
-                f
-                for f in source_path.iterdir()
-                if f.is_file()
-                and f.suffix.upper() in [".MP4", ".LRF", ".MOV"]
-                and not f.name.startswith("._")
-            ]
-
-    if not media_files:
-        log.warning(f"No {filetype.value} files found in {source_path}")
-
-    return media_files
+    return list(
+        iter_media_files(
+            source_path=source_path, filetype=filetype, log=log, recursive=recursive
+        )
+    )
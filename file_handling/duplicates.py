@@ -0,0 +1,150 @@
+import threading
+from pathlib import Path
+from typing import Optional
+
+from utils import HashingUtils
+from utils.validation.comparison_mode import ComparisonMode
+
+
+class DuplicateDetector:
+    """
+    Detects source files with the same content as another file of the import.
+
+    Dual-slot cameras write the same files to both cards, and a card may hold
+    copies of a file in several folders. Only the first file of each group of
+    identical files has to be copied; the detector finds the others before
+    anything is read from or written to the destination.
+
+    Files are grouped by size first, which only takes the stat call of the
+    source file. Only when another file of the same size was seen, the
+    partial signatures of both are calculated, and files with the same
+    signature are confirmed according to the comparison mode: PARTIAL trusts
+    the signature, SAMPLED compares samples of both files, FULL compares them
+    completely.
+
+    The first file of a group is only its original as long as it may still
+    be imported. If it is not, e.g. because its date folder cannot be created
+    or its copy fails, `release` makes its first duplicate the original of
+    the group instead, so the content is not lost. The files released this
+    way are collected by `pop_released` to be imported after all, checked
+    against the destination like any other file.
+
+    All methods are thread-safe. Files are checked against the files
+    registered before them, so of two identical files checked at the same
+    time, the first one registered is kept.
+    """
+
+    def __init__(
+        self,
+        comparison_mode: ComparisonMode,
+        buffer_size: int = 1024 * 1024,
+        certain: bool = False,
+    ):
+        self.comparison_mode = comparison_mode
+        self.buffer_size = buffer_size
+        self.certain = certain
+        self._files_by_size: dict[int, list[Path]] = {}
+        self._signatures: dict[Path, str] = {}
+        self._sizes: dict[Path, int] = {}
+        self._duplicates: dict[Path, list[Path]] = {}
+        self._released: list[Path] = []
+        self._lock = threading.Lock()
+
+    def find_original(self, file_path: Path) -> Optional[Path]:
+        """
+        Check a source file against the files checked before it.
+
+        Args:
+            file_path: The source file
+
+        Returns:
+            The earlier file with the same content, or None if the file is the
+            first one with its content. Files without an original are kept as
+            candidates for later files.
+        """
+        size = file_path.stat().st_size
+        with self._lock:
+            files = self._files_by_size.setdefault(size, [])
+            if file_path in files:
+                # A released file, checked again
+                return None
+            candidates = list(files)
+            files.append(file_path)
+            self._sizes[file_path] = size
+
+        for candidate in candidates:
+            if self._is_identical(file_path, candidate):
+                with self._lock:
+                    # The candidate may have been released in the meantime
+                    if candidate not in files:
+                        continue
+                    files.remove(file_path)
+                    self._duplicates.setdefault(candidate, []).append(file_path)
+                return candidate
+        return None
+
+    def release(self, file_path: Path) -> Optional[Path]:
+        """
+        Give up a file as the original of its group, because it was not imported.
+
+        Its first duplicate becomes the original of the other duplicates and
+        is collected by `pop_released`. Later files are no longer compared
+        with the released file.
+
+        Args:
+            file_path: A source file that was checked before
+
+        Returns:
+            The duplicate that became the original, or None if the file had
+            no duplicates
+        """
+        with self._lock:
+            files = self._files_by_size.get(self._sizes.get(file_path), [])
+            if file_path not in files:
+                return None
+            files.remove(file_path)
+            duplicates = self._duplicates.pop(file_path, [])
+            if not duplicates:
+                return None
+
+            original, *others = duplicates
+            files.append(original)
+            if others:
+                self._duplicates[original] = others
+            self._released.append(original)
+        return original
+
+    def pop_released(self) -> list[Path]:
+        """Get the files that became originals since the last call."""
+        with self._lock:
+            released, self._released = self._released, []
+        return released
+
+    def _is_identical(self, file_path: Path, candidate: Path) -> bool:
+        if self._signature(file_path) != self._signature(candidate):
+            return False
+
+        match self.comparison_mode:
+            case ComparisonMode.PARTIAL:
+                return True
+            case ComparisonMode.SAMPLED:
+                return HashingUtils.compare_hashes(
+                    str(file_path),
+                    str(candidate),
+                    self.comparison_mode,
+                    self.buffer_size,
+                    certain=self.certain,
+                )
+            case ComparisonMode.FULL:
+                return HashingUtils.compare_contents(
+                    str(file_path), str(candidate), self.buffer_size
+                )
+
+    def _signature(self, file_path: Path) -> str:
+        """Get the partial signature of a file, calculating it only once."""
+        signature = self._signatures.get(file_path)
+        if signature is None:
+            signature = HashingUtils.get_partial_hash(str(file_path))
+            with self._lock:
+                self._signatures[file_path] = signature
+        return signature
@@ -1,20 +1,33 @@
+import functools
 import logging
-from datetime import datetime
+from concurrent.futures import Executor
+from datetime import date, datetime
 from pathlib import Path
+from typing import Iterable, Optional
 
-from utils import ExifUtils
+from file_handling.destination_index import DestinationIndex
+from file_handling.discovery import get_file_type
+from utils import ExifUtils, MetadataCache, VideoUtils
+from utils.validation.date_source import DateSource
 from utils.validation.file_types import FileType
 
 
 def get_destination_folder(
-    file_path: Path, destination_path: Path, filetype: FileType, log: logging.Logger
+    file_path: Path,
+    destination_path: Path,
+    filetype: FileType,
+    log: logging.Logger,
+    cache: Optional[MetadataCache] = None,
+    index: Optional[DestinationIndex] = None,
+    create: bool = True,
 ) -> tuple[Path, datetime]:
     """
     Determines and creates the destination folder for a file based on its date.
 
-    For image files, it attempts to use the EXIF 'Date Taken' metadata.
-    If EXIF data is unavailable or the file is not an image (e.g., a video),
-    it falls back to using the file's last modification timestamp.
+    For image files, it attempts to use the EXIF 'Date Taken' metadata, for
+    video files the recording date stored in the `moov` atom.
+    If that metadata is unavailable, it falls back to using the file's last
+    modification timestamp.
 
     The destination folder structure follows the pattern:
     `destination_path / year / month_name / day`.
@@ -25,7 +38,14 @@ def get_destination_folder(
         file_path: The Path object representing the source file.
         destination_path: The Path object for the root destination directory.
         filetype: An enum indicating the type of the file (e.g., IMAGE, VIDEO).
+            With ALL, the type is determined from the file extension.
         log: A logging.Logger instance for logging operations.
+        cache: An optional cache of previously resolved dates. Dates of
+            unchanged files are taken from it without parsing the file again.
+        index: An optional index of the destination folders. Folders already
+            known to it are not created again.
+        create: Whether to create the folder. If False, e.g. when only
+            planning an import, the destination is not changed.
 
         A tuple containing:
         - The Path object for the determined destination folder. Returns None if
@@ -33,43 +53,233 @@ def get_destination_folder(
         - The datetime object used to determine the folder structure (either
           EXIF date or modification date).
     """
-    # set initial value for cur_file_date to None
-    # so it will not fail if the file is a video
-    # and we don't have EXIF data
-    cur_file_date = None
-    # If the file is a video, we don't need to check for EXIF data
-    # instead, we leave it None to handle it later
-    if filetype == FileType.IMAGE:
-        # Get the date the file was taken
-        cur_file_date = ExifUtils.get_date_taken(str(file_path))
-        log.debug(f"Date taken for {file_path.name}: {cur_file_date}")
-
-    # Handle case where EXIF data is missing
-    # or the file is a video in which case cur_file_date is None
+    cur_file_date = _get_cached_date(file_path, cache, log)
+
     if cur_file_date is None:
+        filetype = _classify(file_path, filetype)
+        # set initial value for date_taken to None
+        # so it will not fail if we don't have any metadata
+        date_taken = None
+        if filetype == FileType.IMAGE:
+            # Get the date the file was taken
+            date_taken = ExifUtils.get_date_taken(str(file_path))
+            log.debug(f"Date taken for {file_path.name}: {date_taken}")
+        elif filetype == FileType.VIDEO:
+            # Get the date the video was recorded
+            date_taken = VideoUtils.get_date_taken(str(file_path))
+            log.debug(f"Recording date for {file_path.name}: {date_taken}")
+
+        cur_file_date = _resolve_date(file_path, filetype, date_taken, cache, log)
+
+    return _create_destination_folder(
+        file_path, destination_path, cur_file_date, log, index, create
+    )
+
+
+def get_destination_folders(
+    file_paths: list[Path],
+    destination_path: Path,
+    filetype: FileType,
+    log: logging.Logger,
+    executor: Optional[Executor] = None,
+    cache: Optional[MetadataCache] = None,
+    index: Optional[DestinationIndex] = None,
+    create: bool = True,
+) -> list[tuple[Path, datetime]]:
+    """
+    Determines and creates the destination folders for a batch of files.
+
+    Works like `get_destination_folder`, but the EXIF dates of all images in
+    the batch are extracted at once on a process pool. The recording dates of
+    videos only take a few small reads and are resolved in the calling thread.
+    Once all dates are known, each distinct date folder of the batch is
+    created once.
+
+    Args:
+        file_paths: The source files.
+        destination_path: The Path object for the root destination directory.
+        filetype: An enum indicating the type of the files (e.g., IMAGE, VIDEO).
+            With ALL, images and videos are told apart by their extension.
+        log: A logging.Logger instance for logging operations.
+        executor: The executor used for EXIF extraction. If omitted, a process
+            pool is created for this batch only.
+        cache: An optional cache of previously resolved dates. Only the files
+            missing from it are parsed.
+        index: An optional index of the destination folders. Folders already
+            known to it are not created again.
+        create: Whether to create the folders, see `get_destination_folder`.
+
+    Returns:
+        A list with a (destination folder, date) tuple for each file, in the
+        order of `file_paths`. See `get_destination_folder` for details.
+    """
+    file_dates = {
+        file_path: _get_cached_date(file_path, cache, log) for file_path in file_paths
+    }
+    file_types = {
+        file_path: _classify(file_path, filetype)
+        for file_path, date in file_dates.items()
+        if date is None
+    }
+    images = [
+        str(file_path)
+        for file_path, file_type in file_types.items()
+        if file_type == FileType.IMAGE
+    ]
+
+    dates_taken = {}
+    if images:
+        dates_taken = ExifUtils.get_dates_taken(images, executor)
+
+    for file_path, file_type in file_types.items():
+        if file_type == FileType.IMAGE:
+            date_taken = dates_taken.get(str(file_path))
+            log.debug(f"Date taken for {file_path.name}: {date_taken}")
+        elif file_type == FileType.VIDEO:
+            date_taken = VideoUtils.get_date_taken(str(file_path))
+            log.debug(f"Recording date for {file_path.name}: {date_taken}")
+        else:
+            date_taken = None
+        file_dates[file_path] = _resolve_date(
+            file_path, file_type, date_taken, cache, log
+        )
+
+    # Plan the folders of the whole batch first and create each distinct
+    # folder once, instead of probing and creating it for every file
+    destination_folders = {}
+    for file_path in file_paths:
+        destination_folders[file_path] = build_destination_folder(
+            destination_path, file_dates[file_path]
+        )
         log.debug(
-            f"No EXIF date found for {file_path.name}, using modification date instead"
+            f"Destination folder for file {file_path.name}: {destination_folders[file_path]}"
         )
-        cur_file_date = datetime.fromtimestamp(file_path.stat().st_mtime)
-        log.debug(f"Modification date for {file_path.name}: {cur_file_date}")
-
-    # create the path for the destination folder
-    # The folder structure is: destination/year/month/day/files
-    destination_folder = (
-        destination_path
-        / cur_file_date.strftime("%Y")
-        / cur_file_date.strftime("%B")
-        / cur_file_date.strftime("%d")
+    failed = set()
+    if create:
+        failed = create_destination_folders(destination_folders.values(), log, index)
+
+    return [
+        (
+            None
+            if destination_folders[file_path] in failed
+            else destination_folders[file_path],
+            file_dates[file_path],
+        )
+        for file_path in file_paths
+    ]
+
+
+def _classify(file_path: Path, filetype: FileType) -> Optional[FileType]:
+    """Determine the type of a single file of a run importing given filetype."""
+    if filetype == FileType.ALL:
+        return get_file_type(file_path)
+    return filetype
+
+
+def _get_cached_date(
+    file_path: Path, cache: Optional[MetadataCache], log: logging.Logger
+) -> Optional[datetime]:
+    """Look up the date of a file in the cache, if there is one."""
+    if cache is None:
+        return None
+
+    cached = cache.get(file_path.stat())
+    if cached is None:
+        return None
+
+    cur_file_date, source = cached
+    log.debug(f"Cached {source.value} date for {file_path.name}: {cur_file_date}")
+    return cur_file_date
+
+
+def _resolve_date(
+    file_path: Path,
+    filetype: Optional[FileType],
+    date_taken: Optional[datetime],
+    cache: Optional[MetadataCache],
+    log: logging.Logger,
+) -> datetime:
+    """Fall back to the modification date if needed and update the cache."""
+    stat = file_path.stat() if cache is not None or date_taken is None else None
+    if date_taken is not None:
+        source = DateSource.EXIF if filetype == FileType.IMAGE else DateSource.ATOM
+    else:
+        # Handle case where the metadata is missing
+        log.debug(
+            f"No capture date found for {file_path.name}, using modification date instead"
+        )
+        date_taken = datetime.fromtimestamp(stat.st_mtime)
+        source = DateSource.MTIME
+        log.debug(f"Modification date for {file_path.name}: {date_taken}")
+
+    if cache is not None:
+        cache.put(stat, date_taken, source)
+
+    return date_taken
+
+
+def build_destination_folder(destination_path: Path, cur_file_date: datetime) -> Path:
+    """
+    Build the date folder for a file date, without touching the file system.
+
+    The folder structure is: destination/year/month/day/files. The folders
+    are memoized per day, so the names are only formatted once per day.
+    """
+    return _build_date_folder(destination_path, cur_file_date.date())
+
+
+@functools.lru_cache(maxsize=4096)
+def _build_date_folder(destination_path: Path, day: date) -> Path:
+    return (
+        destination_path / day.strftime("%Y") / day.strftime("%B") / day.strftime("%d")
     )
+
+
+def create_destination_folders(
+    folders: Iterable[Path],
+    log: logging.Logger,
+    index: Optional[DestinationIndex] = None,
+) -> set[Path]:
+    """
+    Create each of the distinct destination folders once.
+
+    Args:
+        folders: The folders to create. Duplicates are created only once.
+        log: A logging.Logger instance for logging operations.
+        index: An optional index of the destination folders. Folders already
+            known to it are not created again.
+
+    Returns:
+        The set of folders that could not be created.
+    """
+    failed = set()
+    for folder in sorted(set(folders)):
+        try:
+            if index is not None:
+                index.ensure_folder(folder)
+            else:
+                if not folder.exists():
+                    logging.info(f"Creating directory {folder}")
+                folder.mkdir(parents=True, exist_ok=True)
+        except Exception as e:
+            log.error(f"Failed to create directory {folder}: {str(e)}")
+            failed.add(folder)
+    return failed
+
+
+def _create_destination_folder(
+    file_path: Path,
+    destination_path: Path,
+    cur_file_date: datetime,
+    log: logging.Logger,
+    index: Optional[DestinationIndex] = None,
+    create: bool = True,
+) -> tuple[Path, datetime]:
+    """Create the date folder for a file."""
+    destination_folder = build_destination_folder(destination_path, cur_file_date)
     log.debug(f"Destination folder for file {file_path.name}: {destination_folder}")
 
-    # Create the destination folder
-    try:
-        if not destination_folder.exists():
-            logging.info(f"Creating directory {destination_folder}")
-        destination_folder.mkdir(parents=True, exist_ok=True)
-    except Exception as e:
-        log.error(f"Failed to create directory {destination_folder}: {str(e)}")
+    if create and create_destination_folders([destination_folder], log, index):
         return None, cur_file_date
 
     return destination_folder, cur_file_date
@@ -1,4 +1,5 @@
 from import_strategies.handlers import (
+    compare_files,
     copy_file,
     handle_onlynew_strategy,
     handle_rename_strategy,
@@ -10,4 +11,5 @@ __all__ = [
     "handle_replace_strategy",
     "handle_onlynew_strategy",
     "copy_file",
+    "compare_files",
 ]
@@ -1,16 +1,40 @@
 import logging
-import shutil
 from pathlib import Path
+from typing import Optional
 
 import constants
-from utils import HashingUtils
+from file_handling.destination_index import DestinationIndex
+from utils import DestinationCatalog, FileCopier, HashingUtils, ImportJournal
 from utils.validation.comparison_mode import ComparisonMode
 
 
 def handle_rename_strategy(
-    file_path: Path, destination_folder: Path, log: logging.Logger
+    file_path: Path,
+    destination_folder: Path,
+    log: logging.Logger,
+    catalog: Optional[DestinationCatalog] = None,
+    copier: Optional[FileCopier] = None,
+    index: Optional[DestinationIndex] = None,
+    journal: Optional[ImportJournal] = None,
 ) -> bool:
-    """Handle the rename strategy for a file."""
+    """
+    Handle the rename strategy for a file.
+
+    With a destination index, the free name is found in memory instead of
+    probing the destination folder for each candidate.
+    """
+    if index is not None:
+        new_destination_file = index.reserve_free_name(
+            destination_folder / file_path.name
+        )
+        log.debug(f"Renaming file to {new_destination_file.name}")
+        copied = copy_file(
+            file_path, new_destination_file, log, catalog, copier, journal
+        )
+        if not copied:
+            index.discard(new_destination_file)
+        return copied
+
     i = 2
     while True:
         new_filename = f"{file_path.stem}_{i:02}{file_path.suffix}"
@@ -20,7 +44,7 @@ def handle_rename_strategy(
         i += 1
 
     log.debug(f"Renaming file to {new_filename}")
-    return copy_file(file_path, new_destination_file, log)
+    return copy_file(file_path, new_destination_file, log, catalog, copier, journal)
 
 
 def handle_replace_strategy(
@@ -29,20 +53,21 @@ def handle_replace_strategy(
     comparison_mode: ComparisonMode,
     force: bool,
     log: logging.Logger,
+    catalog: Optional[DestinationCatalog] = None,
+    copier: Optional[FileCopier] = None,
+    certain: bool = False,
+    journal: Optional[ImportJournal] = None,
 ) -> bool:
     """Handle the replace strategy for a file."""
     if force:
         log.info(
             f"Replacing file {file_path.name} in {destination_file.parent} (force mode)"
         )
-        return copy_file(file_path, destination_file, log)
+        return copy_file(file_path, destination_file, log, catalog, copier, journal)
     else:
         try:
-            compare_result = HashingUtils.compare_hashes(
-                file1=str(file_path),
-                file2=str(destination_file),
-                buffer_size=constants.BUFFER_SIZE,
-                comparison_mode=comparison_mode,
+            compare_result = compare_files(
+                file_path, destination_file, comparison_mode, catalog, certain
             )
 
             if compare_result:
@@ -50,7 +75,9 @@ def handle_replace_strategy(
                 log.info(
                     f"Replacing file {file_path.name} in {destination_file.parent}"
                 )
-                return copy_file(file_path, destination_file, log)
+                return copy_file(
+                    file_path, destination_file, log, catalog, copier, journal
+                )
             else:
                 log.warning(
                     f"There is already a file {file_path.name} in {destination_file.parent} but the hashes do not match. Please check manually."
@@ -67,8 +94,16 @@ def handle_onlynew_strategy(
     comparison_mode: ComparisonMode,
     force: bool,
     log: logging.Logger,
+    catalog: Optional[DestinationCatalog] = None,
+    certain: bool = False,
+    journal: Optional[ImportJournal] = None,
 ) -> bool:
-    """Handle the onlynew strategy for a file."""
+    """
+    Handle the onlynew strategy for a file.
+
+    Files found to be identical to the existing file are recorded as
+    completed in the journal, if given, so they are not compared again.
+    """
     if force:
         log.info(
             f"File {file_path.name} already exists in {destination_file.parent}. Skipping (force mode)."
@@ -76,11 +111,8 @@ def handle_onlynew_strategy(
         return False
     else:
         try:
-            compare_result = HashingUtils.compare_hashes(
-                file1=str(file_path),
-                file2=str(destination_file),
-                buffer_size=constants.BUFFER_SIZE,
-                comparison_mode=comparison_mode,
+            compare_result = compare_files(
+                file_path, destination_file, comparison_mode, catalog, certain
             )
 
             if compare_result:
@@ -88,6 +120,8 @@ def handle_onlynew_strategy(
                 log.info(
                     f"File {file_path.name} already exists in {destination_file.parent}. Skipping."
                 )
+                if journal is not None:
+                    journal.complete(file_path, destination_file)
                 return False
             else:
                 log.warning(
@@ -99,14 +133,76 @@ def handle_onlynew_strategy(
             raise e
 
 
-def copy_file(file_path: Path, destination_file: Path, log: logging.Logger) -> bool:
-    """Copy a file to a destination path."""
+def compare_files(
+    file_path: Path,
+    destination_file: Path,
+    comparison_mode: ComparisonMode,
+    catalog: Optional[DestinationCatalog] = None,
+    certain: bool = False,
+) -> bool:
+    """Compare a file with an existing destination file, using the catalog if given."""
+    if catalog is not None:
+        return catalog.compare(
+            file_path,
+            destination_file,
+            comparison_mode,
+            constants.BUFFER_SIZE,
+            certain=certain,
+        )
+    return HashingUtils.compare_hashes(
+        file1=str(file_path),
+        file2=str(destination_file),
+        buffer_size=constants.BUFFER_SIZE,
+        comparison_mode=comparison_mode,
+        certain=certain,
+    )
+
+
+def copy_file(
+    file_path: Path,
+    destination_file: Path,
+    log: logging.Logger,
+    catalog: Optional[DestinationCatalog] = None,
+    copier: Optional[FileCopier] = None,
+    journal: Optional[ImportJournal] = None,
+) -> bool:
+    """
+    Copy a file to a destination path and record it in the catalog, if given.
+
+    If the copy has to be cataloged, journaled or verified, the file is hashed
+    while it is copied, so its digest is known without a second read.
+    Otherwise the data is copied inside the kernel where supported.
+
+    With a journal, the copy is recorded as in progress before it starts and
+    as completed once it was written, so a copy interrupted by a crash is
+    found and redone on the next run.
+    """
+    copier = copier or FileCopier()
+    digest = None
     try:
-        shutil.copy2(src=str(file_path), dst=str(destination_file))
+        if journal is not None:
+            journal.start(file_path, destination_file)
+        if catalog is None and journal is None and not copier.verify:
+            copier.copy_fast(str(file_path), str(destination_file))
+        else:
+            digest = copier.copy(str(file_path), str(destination_file))
         log.info(f"Copied file {file_path.absolute()} to {destination_file.absolute()}")
-        return True
     except Exception as e:
         log.error(
             f"Failed to copy {file_path.absolute()} to {destination_file.absolute()}: {str(e)}"
         )
         return False
+
+    if journal is not None:
+        journal.complete(file_path, destination_file, digest)
+
+    if catalog is not None:
+        try:
+            catalog.record(
+                destination_file,
+                partial_hash=catalog.partial_signature(destination_file),
+                digest=digest,
+            )
+        except Exception as e:
+            log.warning(f"Failed to catalog {destination_file.absolute()}: {str(e)}")
+    return True
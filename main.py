@@ -1,22 +1,52 @@
 import locale
 import logging
+from concurrent.futures import Executor
+from contextlib import ExitStack
+from functools import partial
+from operator import attrgetter
 from pathlib import Path
-from typing import Annotated
+from typing import Annotated, NamedTuple, Optional
 
 import typer
 from rich.progress import track
 
 import constants
-from file_handling import find_media_files, get_destination_folder
+from file_handling import (
+    DestinationIndex,
+    DuplicateDetector,
+    get_destination_folder,
+    get_destination_folders,
+    iter_media_files,
+)
 from import_options.strategy import Strategy
 from import_strategies import (
+    compare_files,
     copy_file,
     handle_onlynew_strategy,
     handle_rename_strategy,
     handle_replace_strategy,
 )
-from utils import LoggingUtils
-from utils.validation import FileType, validate_directories
+from utils import (
+    DestinationCatalog,
+    ExifUtils,
+    FileCopier,
+    ImportJournal,
+    ImportPlan,
+    ImportProgress,
+    LoggingUtils,
+    MetadataCache,
+    PlanEntry,
+    Stage,
+    StagedPipeline,
+)
+from utils.validation import (
+    Durability,
+    FileType,
+    HashAlgorithm,
+    ImportResult,
+    PlanAction,
+    validate_directories,
+)
 from utils.validation.comparison_mode import ComparisonMode
 
 # Try to set locale, but don't fail if it's not available
@@ -38,7 +68,568 @@ def setup_logging(verbose: bool) -> logging.Logger:
     )
 
 
-@app.command()
+class ImportItem(NamedTuple):
+    """A source file together with the destination folder it is imported to."""
+
+    file_path: Path
+    destination_folder: Optional[Path]
+    # Why the file has no destination folder, if it is skipped on purpose
+    skip_reason: Optional[str] = None
+
+
+def resolve_destination(
+    file_path: Path,
+    destination_path: Path,
+    filetype: FileType,
+    log: logging.Logger,
+    cache: Optional[MetadataCache] = None,
+    index: Optional[DestinationIndex] = None,
+    duplicates: Optional[DuplicateDetector] = None,
+    journal: Optional[ImportJournal] = None,
+    dry_run: bool = False,
+) -> ImportItem:
+    """
+    Resolve the date folder a single file is imported to.
+
+    Files with the same content as an earlier file of the import get no
+    destination folder, if a duplicate detector is given. With a journal,
+    files completed by a previous run get no destination folder either, and
+    the others are recorded as planned. In a dry run, neither the folder is
+    created nor the journal changed.
+    """
+    skip_reason = _get_skip_reason(file_path, journal, duplicates, log)
+    if skip_reason is not None:
+        return ImportItem(file_path, None, skip_reason)
+
+    destination_folder, _ = get_destination_folder(
+        file_path=file_path,
+        destination_path=destination_path,
+        filetype=filetype,
+        log=log,
+        cache=cache,
+        index=index,
+        create=not dry_run,
+    )
+    item = ImportItem(file_path, destination_folder)
+    if not dry_run:
+        _record_planned(item, journal)
+    return item
+
+
+def resolve_destinations(
+    file_paths: list[Path],
+    destination_path: Path,
+    filetype: FileType,
+    executor: Executor,
+    log: logging.Logger,
+    cache: Optional[MetadataCache] = None,
+    index: Optional[DestinationIndex] = None,
+    duplicates: Optional[DuplicateDetector] = None,
+    journal: Optional[ImportJournal] = None,
+    dry_run: bool = False,
+) -> list[ImportItem]:
+    """Resolve the date folders for a batch of files on a process pool."""
+    skip_reasons = {
+        file_path: _get_skip_reason(file_path, journal, duplicates, log)
+        for file_path in file_paths
+    }
+    originals = [
+        file_path for file_path in file_paths if skip_reasons[file_path] is None
+    ]
+    destinations = get_destination_folders(
+        file_paths=originals,
+        destination_path=destination_path,
+        filetype=filetype,
+        log=log,
+        executor=executor,
+        cache=cache,
+        index=index,
+        create=not dry_run,
+    )
+    destination_folders = {
+        file_path: destination_folder
+        for file_path, (destination_folder, _) in zip(originals, destinations)
+    }
+    items = [
+        ImportItem(
+            file_path, destination_folders.get(file_path), skip_reasons[file_path]
+        )
+        for file_path in file_paths
+    ]
+    if not dry_run:
+        for item in items:
+            _record_planned(item, journal)
+    return items
+
+
+def _get_skip_reason(
+    file_path: Path,
+    journal: Optional[ImportJournal],
+    duplicates: Optional[DuplicateDetector],
+    log: logging.Logger,
+) -> Optional[str]:
+    """
+    Check whether a previous run imported the file completely, or an earlier
+    file of the import has the same content.
+    """
+    if journal is not None:
+        destination_file = journal.lookup_completed(file_path)
+        if destination_file is not None:
+            log.info(
+                f"File {file_path} was already imported to {destination_file}. Skipping."
+            )
+            return f"already imported to {destination_file}"
+
+    if duplicates is not None:
+        original = duplicates.find_original(file_path)
+        if original is not None:
+            log.info(f"File {file_path} is identical to {original}. Skipping.")
+            return _duplicate_reason(original)
+
+    return None
+
+
+def _duplicate_reason(original: Path) -> str:
+    """The skip reason of a file with the same content as an earlier file."""
+    return f"identical to source file {original}"
+
+
+def _record_planned(item: ImportItem, journal: Optional[ImportJournal]):
+    """Record a file with a destination folder as planned in the journal."""
+    if journal is not None and item.destination_folder is not None:
+        journal.plan(item.file_path, item.destination_folder / item.file_path.name)
+
+
+def process_file(
+    item: ImportItem,
+    strategy: Strategy,
+    comparison_mode: ComparisonMode,
+    force: bool,
+    log: logging.Logger,
+    catalog: Optional[DestinationCatalog] = None,
+    copier: Optional[FileCopier] = None,
+    index: Optional[DestinationIndex] = None,
+    dedup: bool = False,
+    certain: bool = False,
+    journal: Optional[ImportJournal] = None,
+    duplicates: Optional[DuplicateDetector] = None,
+) -> bool:
+    """
+    Import a single file into its date folder according to the given strategy.
+
+    With a destination index, existing files are looked up in memory instead
+    of probing the destination, and the files copied are added to it. With
+    dedup, files whose content already exists anywhere in the catalog of the
+    destination are skipped, whatever their name and folder. With a journal,
+    every copy is recorded before it starts and once it is complete. With a
+    duplicate detector, a file whose import failed is released as the
+    original of its duplicates, so one of them is imported instead. Files
+    skipped on purpose, e.g. because their content is already in the
+    destination, keep their duplicates skipped.
+
+    Returns:
+        bool: True if the file was copied, False otherwise.
+    """
+    result = _import_item(
+        item,
+        strategy,
+        comparison_mode,
+        force,
+        log,
+        catalog,
+        copier,
+        index,
+        dedup,
+        certain,
+        journal,
+    )
+    if (
+        result == ImportResult.FAILED
+        and item.skip_reason is None
+        and duplicates is not None
+    ):
+        duplicate = duplicates.release(item.file_path)
+        if duplicate is not None:
+            log.info(
+                f"File {item.file_path} was not imported, importing its duplicate {duplicate} instead"
+            )
+    return result == ImportResult.COPIED
+
+
+def _import_item(
+    item: ImportItem,
+    strategy: Strategy,
+    comparison_mode: ComparisonMode,
+    force: bool,
+    log: logging.Logger,
+    catalog: Optional[DestinationCatalog],
+    copier: Optional[FileCopier],
+    index: Optional[DestinationIndex],
+    dedup: bool,
+    certain: bool,
+    journal: Optional[ImportJournal],
+) -> ImportResult:
+    """
+    Import a single file, see `process_file`.
+
+    Returns:
+        ImportResult: Whether the file was copied, skipped on purpose or not
+        imported because of an error.
+    """
+    file_path, destination_folder, _ = item
+
+    if destination_folder is None:
+        return ImportResult.FAILED
+
+    if dedup and catalog is not None:
+        duplicate = catalog.find_duplicate(
+            file_path, comparison_mode, constants.BUFFER_SIZE, certain
+        )
+        if duplicate is not None:
+            log.info(f"File {file_path.name} already exists as {duplicate}. Skipping.")
+            return ImportResult.SKIPPED
+
+    destination_file = destination_folder / file_path.name
+
+    # Files with the same destination are handled one after the other, files
+    # with other destinations are imported in parallel
+    exists = (
+        index.claim(destination_file)
+        if index is not None
+        else destination_file.exists()
+    )
+
+    if exists and strategy == Strategy.RENAME:
+        # The new name is reserved in the index, the claim is not needed
+        if index is not None:
+            index.release(destination_file, exists=True)
+        copied = handle_rename_strategy(
+            file_path, destination_folder, log, catalog, copier, index, journal
+        )
+        return ImportResult.COPIED if copied else ImportResult.FAILED
+
+    copied = False
+    try:
+        # Handle file based on strategy
+        if not exists:
+            copied = copy_file(
+                file_path, destination_file, log, catalog, copier, journal
+            )
+            return ImportResult.COPIED if copied else ImportResult.FAILED
+        elif strategy == Strategy.REPLACE:
+            copied = handle_replace_strategy(
+                file_path,
+                destination_file,
+                comparison_mode,
+                force,
+                log,
+                catalog,
+                copier,
+                certain,
+                journal,
+            )
+            if copied:
+                return ImportResult.COPIED
+            # Without force, only identical files are replaced, so a file that
+            # was not replaced is either different or already in the destination
+            return ImportResult.FAILED if force else ImportResult.SKIPPED
+        else:
+            handle_onlynew_strategy(
+                file_path,
+                destination_file,
+                comparison_mode,
+                force,
+                log,
+                catalog,
+                certain,
+                journal,
+            )
+            return ImportResult.SKIPPED
+    finally:
+        if index is not None:
+            index.release(destination_file, exists or copied)
+
+
+def plan_item(
+    item: ImportItem,
+    strategy: Strategy,
+    comparison_mode: ComparisonMode,
+    force: bool,
+    log: logging.Logger,
+    index: DestinationIndex,
+    catalog: Optional[DestinationCatalog] = None,
+    dedup: bool = False,
+    certain: bool = False,
+) -> PlanEntry:
+    """
+    Decide how a single file would be imported, without changing the destination.
+
+    Makes the same decisions as `process_file`. The files planned to be copied
+    are added to the index and renamed files reserve their new name in it, so
+    later files of the plan see them as if they had been copied already.
+
+    Returns:
+        PlanEntry: The action for the file, with its destination and the reason.
+    """
+    file_path, destination_folder, skip_reason = item
+    size = file_path.stat().st_size
+
+    if destination_folder is None:
+        return _plan_entry(
+            PlanAction.SKIP, file_path, None, size, skip_reason or "no date folder"
+        )
+
+    if dedup and catalog is not None:
+        duplicate = catalog.find_duplicate(
+            file_path, comparison_mode, constants.BUFFER_SIZE, certain
+        )
+        if duplicate is not None:
+            return _plan_entry(
+                PlanAction.SKIP, file_path, duplicate, size, "identical file exists"
+            )
+
+    destination_file = destination_folder / file_path.name
+
+    # The planned copies are recorded in the index when the claim is released
+    exists = index.claim(destination_file)
+    try:
+        if not exists:
+            return _plan_entry(
+                PlanAction.COPY, file_path, destination_file, size, "new file"
+            )
+
+        if strategy == Strategy.RENAME:
+            return _plan_entry(
+                PlanAction.RENAME,
+                file_path,
+                index.reserve_free_name(destination_file),
+                size,
+                "name already taken",
+            )
+
+        if force:
+            action = (
+                PlanAction.REPLACE if strategy == Strategy.REPLACE else PlanAction.SKIP
+            )
+            return _plan_entry(
+                action, file_path, destination_file, size, "file exists (force mode)"
+            )
+
+        if not compare_files(
+            file_path, destination_file, comparison_mode, catalog, certain
+        ):
+            log.warning(
+                f"There is already a file {file_path.name} in {destination_file.parent} but the hashes do not match. Please check manually."
+            )
+            return _plan_entry(
+                PlanAction.SKIP,
+                file_path,
+                destination_file,
+                size,
+                "different file exists",
+            )
+
+        action = PlanAction.REPLACE if strategy == Strategy.REPLACE else PlanAction.SKIP
+        return _plan_entry(
+            action, file_path, destination_file, size, "identical file exists"
+        )
+    finally:
+        index.release(destination_file, exists=True)
+
+
+def _plan_entry(
+    action: PlanAction,
+    file_path: Path,
+    destination_file: Optional[Path],
+    size: int,
+    reason: str,
+) -> PlanEntry:
+    return PlanEntry(
+        action,
+        str(file_path),
+        None if destination_file is None else str(destination_file),
+        size,
+        reason,
+    )
+
+
+def apply_entry(
+    entry: PlanEntry,
+    log: logging.Logger,
+    index: DestinationIndex,
+    catalog: Optional[DestinationCatalog] = None,
+    copier: Optional[FileCopier] = None,
+    journal: Optional[ImportJournal] = None,
+) -> bool:
+    """
+    Execute the entry of an import plan.
+
+    Dates are not resolved and files are not compared again. A stale plan
+    never overwrites files it did not plan to replace, though: entries whose
+    source file changed its size since the plan was made, and copies whose
+    destination appeared since, are skipped with a warning.
+
+    Returns:
+        bool: True if the file was copied, False otherwise.
+    """
+    if entry.action == PlanAction.SKIP:
+        return False
+
+    file_path = Path(entry.source)
+    destination_file = Path(entry.destination)
+
+    try:
+        size = file_path.stat().st_size
+    except FileNotFoundError:
+        log.warning(f"File {file_path} no longer exists. Skipping.")
+        return False
+    if size != entry.bytes:
+        log.warning(f"File {file_path} changed since the plan was made. Skipping.")
+        return False
+
+    try:
+        index.ensure_folder(destination_file.parent)
+    except Exception as e:
+        log.error(f"Failed to create directory {destination_file.parent}: {str(e)}")
+        return False
+
+    exists = index.claim(destination_file)
+    copied = False
+    try:
+        if entry.action != PlanAction.REPLACE and exists:
+            log.warning(
+                f"File {destination_file} was created since the plan was made. Skipping."
+            )
+            return False
+
+        copied = copy_file(file_path, destination_file, log, catalog, copier, journal)
+        return copied
+    finally:
+        index.release(destination_file, exists or copied)
+
+
+def _open_metadata_cache(stack: ExitStack, destination_path: Path) -> MetadataCache:
+    """Open the cache of resolved dates in the destination."""
+    return stack.enter_context(
+        MetadataCache(
+            destination_path
+            / constants.STATE_DIRECTORY
+            / constants.METADATA_CACHE_FILE,
+            max_entries=constants.METADATA_CACHE_MAX_ENTRIES,
+        )
+    )
+
+
+def _open_catalog(
+    stack: ExitStack,
+    destination_path: Path,
+    tree_hash: bool,
+    hash_algorithm: HashAlgorithm,
+) -> DestinationCatalog:
+    """Open the catalog of the destination."""
+    return stack.enter_context(
+        DestinationCatalog(
+            destination_path / constants.STATE_DIRECTORY / constants.CATALOG_FILE,
+            destination_path,
+            tree_hash=tree_hash,
+            algorithm=hash_algorithm,
+        )
+    )
+
+
+def _catalog_library(
+    catalog: DestinationCatalog, destination_path: Path, log: logging.Logger
+):
+    """Catalog the whole library, so duplicates are found in any folder."""
+    cataloged = catalog.refresh(
+        iter_media_files(
+            source_path=destination_path,
+            filetype=FileType.ALL,
+            log=log,
+            recursive=True,
+            warn_if_empty=False,
+        )
+    )
+    log.info(f"Cataloged {cataloged} files in {destination_path}")
+
+
+def _open_journal(stack: ExitStack, destination_path: Path) -> ImportJournal:
+    """Open the journal of the imports into the destination."""
+    return stack.enter_context(
+        ImportJournal(
+            destination_path / constants.STATE_DIRECTORY / constants.JOURNAL_FILE,
+            destination_path,
+        )
+    )
+
+
+def _recover_interrupted(journal: ImportJournal, resume: bool, log: logging.Logger):
+    """
+    Remove the temporary files of copies an interrupted import left behind, so
+    they are redone. Must be called before the destination is listed.
+    """
+    for removed in journal.recover(keep_temp_files=resume):
+        log.warning(f"Removed incomplete copy {removed} of an interrupted import")
+
+
+def _create_metadata_stage(
+    stack: ExitStack,
+    destination_path: Path,
+    filetype: FileType,
+    log: logging.Logger,
+    workers: int,
+    exif_processes: int,
+    cache: Optional[MetadataCache],
+    index: DestinationIndex,
+    duplicates: Optional[DuplicateDetector],
+    journal: Optional[ImportJournal],
+    dry_run: bool = False,
+) -> Stage:
+    """Create the pipeline stage that resolves the date folders of the files."""
+    # Extract EXIF dates in batches on a process pool, if requested
+    executor = None
+    if exif_processes and filetype in (FileType.IMAGE, FileType.ALL):
+        executor = stack.enter_context(ExifUtils.create_executor(exif_processes))
+
+    if executor is None:
+        return Stage(
+            "metadata",
+            partial(
+                resolve_destination,
+                destination_path=destination_path,
+                filetype=filetype,
+                log=log,
+                cache=cache,
+                index=index,
+                duplicates=duplicates,
+                journal=journal,
+                dry_run=dry_run,
+            ),
+            workers=workers,
+        )
+
+    # Two batch workers, so the next batch is submitted to the pool
+    # while the results of the previous one are being collected
+    return Stage(
+        "metadata",
+        partial(
+            resolve_destinations,
+            destination_path=destination_path,
+            filetype=filetype,
+            executor=executor,
+            log=log,
+            cache=cache,
+            index=index,
+            duplicates=duplicates,
+            journal=journal,
+            dry_run=dry_run,
+        ),
+        workers=2,
+        batch_size=constants.EXIF_BATCH_SIZE,
+    )
+
+
+@app.command("import")
 def import_files(
     source: Annotated[str, typer.Option(help=constants.SOURCE_DESCRIPTION)],
     destination: Annotated[str, typer.Option(help=constants.DESTINATION_DESCRIPTION)],
@@ -51,6 +642,10 @@ def import_files(
     comparison_mode: Annotated[
         ComparisonMode, typer.Option(help=constants.COMPARISON_MODE_DESCRIPTION)
     ] = ComparisonMode.PARTIAL,
+    certain: Annotated[bool, typer.Option(help=constants.CERTAIN_DESCRIPTION)] = False,
+    recursive: Annotated[
+        bool, typer.Option(help=constants.RECURSIVE_DESCRIPTION)
+    ] = False,
     verbose: Annotated[bool, typer.Option(help=constants.VERBOSE_DESCRIPTION)] = False,
     force: Annotated[
         bool,
@@ -58,6 +653,32 @@ def import_files(
             help=constants.FORCE_DESCRIPTION,
         ),
     ] = False,
+    workers: Annotated[
+        int, typer.Option(min=1, help=constants.WORKERS_DESCRIPTION)
+    ] = 1,
+    exif_processes: Annotated[
+        int, typer.Option(min=0, help=constants.EXIF_PROCESSES_DESCRIPTION)
+    ] = 0,
+    metadata_cache: Annotated[
+        bool, typer.Option(help=constants.METADATA_CACHE_DESCRIPTION)
+    ] = False,
+    catalog: Annotated[bool, typer.Option(help=constants.CATALOG_DESCRIPTION)] = False,
+    verify: Annotated[bool, typer.Option(help=constants.VERIFY_DESCRIPTION)] = False,
+    dedup: Annotated[bool, typer.Option(help=constants.DEDUP_DESCRIPTION)] = False,
+    tree_hash: Annotated[
+        bool, typer.Option(help=constants.TREE_HASH_DESCRIPTION)
+    ] = False,
+    hash_algorithm: Annotated[
+        HashAlgorithm, typer.Option(help=constants.HASH_ALGORITHM_DESCRIPTION)
+    ] = HashAlgorithm.SHA256,
+    dedup_sources: Annotated[
+        bool, typer.Option(help=constants.DEDUP_SOURCES_DESCRIPTION)
+    ] = False,
+    journal: Annotated[bool, typer.Option(help=constants.JOURNAL_DESCRIPTION)] = False,
+    durability: Annotated[
+        Durability, typer.Option(help=constants.DURABILITY_DESCRIPTION)
+    ] = Durability.NONE,
+    resume: Annotated[bool, typer.Option(help=constants.RESUME_DESCRIPTION)] = False,
 ):
     """
     Import JPG files from source directory to destination directory,
@@ -81,39 +702,387 @@ def import_files(
         f"Importing {filetype.name} files with strategy {strategy.name} from {source_path} to {destination_path}"
     )
 
-    src_files = find_media_files(source_path=source_path, filetype=filetype, log=log)
+    src_files = iter_media_files(
+        source_path=source_path, filetype=filetype, log=log, recursive=recursive
+    )
+
+    with ExitStack() as stack:
+        # Reuse the dates resolved by previous runs, if requested
+        cache = None
+        if metadata_cache:
+            cache = _open_metadata_cache(stack, destination_path)
+
+        # Answer comparisons from the catalog of the destination, if requested
+        destination_catalog = None
+        if catalog or dedup:
+            destination_catalog = _open_catalog(
+                stack, destination_path, tree_hash, hash_algorithm
+            )
+        if dedup:
+            _catalog_library(destination_catalog, destination_path, log)
+
+        # Resume an interrupted import: copies that may be half-written are
+        # removed before the destination is listed, so they are redone
+        import_journal = None
+        if journal:
+            import_journal = _open_journal(stack, destination_path)
+            _recover_interrupted(import_journal, resume, log)
+
+        # List each destination folder once instead of probing it per file
+        index = DestinationIndex()
+
+        # Import only one file of each group of identical source files
+        duplicates = None
+        if dedup_sources:
+            duplicates = DuplicateDetector(
+                comparison_mode, constants.BUFFER_SIZE, certain=certain
+            )
+
+        # Show the progress in bytes, reported by the copy loop
+        progress = stack.enter_context(ImportProgress())
+
+        # Hash files while copying them, if the hash is needed
+        copier = FileCopier(
+            buffer_size=constants.COPY_BUFFER_SIZE,
+            verify=verify,
+            tree_hash=tree_hash,
+            algorithm=hash_algorithm,
+            durability=durability,
+            resume=resume,
+            on_progress=progress.advance,
+        )
+
+        # Stream the files through the pipeline: while one file is being
+        # copied, the capture dates of the next files are already being
+        # resolved, and discovery keeps walking the source in the background.
+        pipeline = StagedPipeline(
+            stages=[
+                progress.track_stage(
+                    _create_metadata_stage(
+                        stack,
+                        destination_path,
+                        filetype,
+                        log,
+                        workers,
+                        exif_processes,
+                        cache,
+                        index,
+                        duplicates,
+                        import_journal,
+                    ),
+                    "Resolving dates",
+                ),
+                progress.track_stage(
+                    Stage(
+                        "copy",
+                        partial(
+                            process_file,
+                            strategy=strategy,
+                            comparison_mode=comparison_mode,
+                            force=force,
+                            log=log,
+                            catalog=destination_catalog,
+                            copier=copier,
+                            index=index,
+                            dedup=dedup,
+                            certain=certain,
+                            journal=import_journal,
+                            duplicates=duplicates,
+                        ),
+                        workers=workers,
+                    ),
+                    "Copying files",
+                    file_of=attrgetter("file_path"),
+                ),
+            ],
+            queue_size=constants.PIPELINE_QUEUE_SIZE,
+        )
 
-    if not src_files:
+        processed = imported = 0
+        for copied in pipeline.run(progress.discover(src_files)):
+            processed += 1
+            imported += copied
+
+        # Import the duplicates of files that were not imported after all,
+        # until every group of identical files is imported or out of files
+        while duplicates is not None and (released := duplicates.pop_released()):
+            for copied in pipeline.run(progress.discover(released)):
+                imported += copied
+
+        # Flush the copies to the device at once, with batched durability
+        synced = copier.sync()
+        if synced:
+            log.debug(f"Flushed {synced} copied files to {destination_path}")
+
+    if not processed:
         return
 
-    # Process each file
-    for file_path in track(src_files, description="Copying files"):
-        destination_folder, _ = get_destination_folder(
-            file_path=file_path,
-            destination_path=destination_path,
-            filetype=filetype,
-            log=log,
+    log.info(f"Imported {imported} of {processed} files")
+
+
+@app.command("plan")
+def plan_import(
+    source: Annotated[str, typer.Option(help=constants.SOURCE_DESCRIPTION)],
+    destination: Annotated[str, typer.Option(help=constants.DESTINATION_DESCRIPTION)],
+    plan_file: Annotated[
+        str, typer.Option(help=constants.PLAN_FILE_DESCRIPTION)
+    ] = constants.PLAN_FILE,
+    filetype: Annotated[
+        FileType, typer.Option(help=constants.FILETYPE_DESCRIPTION)
+    ] = FileType.IMAGE,
+    strategy: Annotated[
+        Strategy, typer.Option(help=constants.STRATEGY_DESCRIPTION)
+    ] = Strategy.ONLYNEW,
+    comparison_mode: Annotated[
+        ComparisonMode, typer.Option(help=constants.COMPARISON_MODE_DESCRIPTION)
+    ] = ComparisonMode.PARTIAL,
+    certain: Annotated[bool, typer.Option(help=constants.CERTAIN_DESCRIPTION)] = False,
+    recursive: Annotated[
+        bool, typer.Option(help=constants.RECURSIVE_DESCRIPTION)
+    ] = False,
+    verbose: Annotated[bool, typer.Option(help=constants.VERBOSE_DESCRIPTION)] = False,
+    force: Annotated[bool, typer.Option(help=constants.FORCE_DESCRIPTION)] = False,
+    workers: Annotated[
+        int, typer.Option(min=1, help=constants.WORKERS_DESCRIPTION)
+    ] = 1,
+    exif_processes: Annotated[
+        int, typer.Option(min=0, help=constants.EXIF_PROCESSES_DESCRIPTION)
+    ] = 0,
+    metadata_cache: Annotated[
+        bool, typer.Option(help=constants.METADATA_CACHE_DESCRIPTION)
+    ] = False,
+    catalog: Annotated[bool, typer.Option(help=constants.CATALOG_DESCRIPTION)] = False,
+    dedup: Annotated[bool, typer.Option(help=constants.DEDUP_DESCRIPTION)] = False,
+    tree_hash: Annotated[
+        bool, typer.Option(help=constants.TREE_HASH_DESCRIPTION)
+    ] = False,
+    hash_algorithm: Annotated[
+        HashAlgorithm, typer.Option(help=constants.HASH_ALGORITHM_DESCRIPTION)
+    ] = HashAlgorithm.SHA256,
+    dedup_sources: Annotated[
+        bool, typer.Option(help=constants.DEDUP_SOURCES_DESCRIPTION)
+    ] = False,
+    journal: Annotated[bool, typer.Option(help=constants.JOURNAL_DESCRIPTION)] = False,
+):
+    """
+    Plan an import without copying any file, and save the plan to a file.
+
+    Discovers the files, resolves their dates and checks them against the
+    destination like the import command, but only records what would be done.
+    The destination is not changed, apart from the caches and the catalog
+    requested. Run the apply command to execute the plan.
+    """
+    log = setup_logging(verbose)
+
+    source_path = Path(source).absolute()
+    destination_path = Path(destination).absolute()
+
+    if not validate_directories(source_path, destination_path, log):
+        log.error("Directory validation failed. Exiting.")
+        return False
+
+    log.info(
+        f"Planning the import of {filetype.name} files with strategy {strategy.name} from {source_path} to {destination_path}"
+    )
+
+    src_files = iter_media_files(
+        source_path=source_path, filetype=filetype, log=log, recursive=recursive
+    )
+    plan = ImportPlan(destination_path)
+
+    with ExitStack() as stack:
+        cache = None
+        if metadata_cache:
+            cache = _open_metadata_cache(stack, destination_path)
+
+        destination_catalog = None
+        if catalog or dedup:
+            destination_catalog = _open_catalog(
+                stack, destination_path, tree_hash, hash_algorithm
+            )
+        if dedup:
+            _catalog_library(destination_catalog, destination_path, log)
+
+        # Skip the files completed by previous imports, without recovering
+        # interrupted copies: planning does not change the destination
+        import_journal = None
+        if journal:
+            import_journal = _open_journal(stack, destination_path)
+
+        index = DestinationIndex()
+
+        duplicates = None
+        if dedup_sources:
+            duplicates = DuplicateDetector(
+                comparison_mode, constants.BUFFER_SIZE, certain=certain
+            )
+
+        pipeline = StagedPipeline(
+            stages=[
+                _create_metadata_stage(
+                    stack,
+                    destination_path,
+                    filetype,
+                    log,
+                    workers,
+                    exif_processes,
+                    cache,
+                    index,
+                    duplicates,
+                    import_journal,
+                    dry_run=True,
+                ),
+                Stage(
+                    "plan",
+                    partial(
+                        plan_item,
+                        strategy=strategy,
+                        comparison_mode=comparison_mode,
+                        force=force,
+                        log=log,
+                        index=index,
+                        catalog=destination_catalog,
+                        dedup=dedup,
+                        certain=certain,
+                    ),
+                    workers=workers,
+                ),
+            ],
+            queue_size=constants.PIPELINE_QUEUE_SIZE,
         )
 
-        if destination_folder is None:
-            continue
+        for entry in track(pipeline.run(src_files), description="Planning import"):
+            plan.add(entry)
 
-        destination_file = destination_folder / file_path.name
+    plan.save(Path(plan_file))
 
-        # Handle file based on strategy
-        if destination_file.exists():
-            if strategy == Strategy.RENAME:
-                handle_rename_strategy(file_path, destination_folder, log)
-            elif strategy == Strategy.REPLACE:
-                handle_replace_strategy(
-                    file_path, destination_file, comparison_mode, force, log
-                )
-            elif strategy == Strategy.ONLYNEW:
-                handle_onlynew_strategy(
-                    file_path, destination_file, comparison_mode, force, log
-                )
-        else:
-            copy_file(file_path, destination_file, log)
+    totals = plan.totals()
+    log.info(
+        f"Planned {totals[PlanAction.COPY.value]} new, {totals[PlanAction.REPLACE.value]} replaced "
+        f"and {totals[PlanAction.RENAME.value]} renamed files ({totals['bytes_to_copy'] / 1_000_000:,.1f} MB to copy) "
+        f"and skipping {totals[PlanAction.SKIP.value]} of {totals['files']} files in {plan_file}"
+    )
+
+
+@app.command("apply")
+def apply_plan(
+    plan_file: Annotated[
+        str, typer.Option(help=constants.PLAN_FILE_DESCRIPTION)
+    ] = constants.PLAN_FILE,
+    verbose: Annotated[bool, typer.Option(help=constants.VERBOSE_DESCRIPTION)] = False,
+    workers: Annotated[
+        int, typer.Option(min=1, help=constants.WORKERS_DESCRIPTION)
+    ] = 1,
+    catalog: Annotated[bool, typer.Option(help=constants.CATALOG_DESCRIPTION)] = False,
+    verify: Annotated[bool, typer.Option(help=constants.VERIFY_DESCRIPTION)] = False,
+    tree_hash: Annotated[
+        bool, typer.Option(help=constants.TREE_HASH_DESCRIPTION)
+    ] = False,
+    hash_algorithm: Annotated[
+        HashAlgorithm, typer.Option(help=constants.HASH_ALGORITHM_DESCRIPTION)
+    ] = HashAlgorithm.SHA256,
+    journal: Annotated[bool, typer.Option(help=constants.JOURNAL_DESCRIPTION)] = False,
+    durability: Annotated[
+        Durability, typer.Option(help=constants.DURABILITY_DESCRIPTION)
+    ] = Durability.NONE,
+    resume: Annotated[bool, typer.Option(help=constants.RESUME_DESCRIPTION)] = False,
+):
+    """
+    Execute an import plan saved by the plan command.
+
+    The files are copied to the destinations in the plan, without resolving
+    their dates or comparing them again.
+    """
+    log = setup_logging(verbose)
+
+    try:
+        plan = ImportPlan.load(Path(plan_file))
+    except (OSError, ValueError) as e:
+        log.error(f"Failed to read the plan {plan_file}: {str(e)}")
+        return False
+
+    destination_path = plan.destination
+    if not destination_path.is_dir():
+        log.error(f"Destination directory {destination_path} does not exist. Exiting.")
+        return False
+
+    entries = [entry for entry in plan.entries if entry.action != PlanAction.SKIP]
+    totals = plan.totals()
+    log.info(
+        f"Applying the plan {plan_file}: copying {len(entries)} files ({totals['bytes_to_copy'] / 1_000_000:,.1f} MB) to {destination_path}"
+    )
+
+    with ExitStack() as stack:
+        destination_catalog = None
+        if catalog:
+            destination_catalog = _open_catalog(
+                stack, destination_path, tree_hash, hash_algorithm
+            )
+
+        import_journal = None
+        if journal:
+            import_journal = _open_journal(stack, destination_path)
+            _recover_interrupted(import_journal, resume, log)
+
+        index = DestinationIndex()
+
+        progress = stack.enter_context(ImportProgress())
+        for entry in entries:
+            progress.expect(entry.bytes)
+
+        copier = FileCopier(
+            buffer_size=constants.COPY_BUFFER_SIZE,
+            verify=verify,
+            tree_hash=tree_hash,
+            algorithm=hash_algorithm,
+            durability=durability,
+            resume=resume,
+            on_progress=progress.advance,
+        )
+
+        pipeline = StagedPipeline(
+            stages=[
+                progress.track_stage(
+                    Stage(
+                        "copy",
+                        partial(
+                            apply_entry,
+                            log=log,
+                            index=index,
+                            catalog=destination_catalog,
+                            copier=copier,
+                            journal=import_journal,
+                        ),
+                        workers=workers,
+                    ),
+                    "Copying files",
+                    file_of=attrgetter("source"),
+                ),
+            ],
+            queue_size=constants.PIPELINE_QUEUE_SIZE,
+        )
+
+        imported = 0
+        not_imported = set()
+        for entry, copied in zip(entries, pipeline.run(entries)):
+            imported += copied
+            if not copied:
+                not_imported.add(entry.source)
+
+        synced = copier.sync()
+        if synced:
+            log.debug(f"Flushed {synced} copied files to {destination_path}")
+
+    # Duplicates were planned to be skipped in favor of their original,
+    # which is only safe if the original was imported
+    reasons = {_duplicate_reason(Path(source)): source for source in not_imported}
+    for entry in plan.entries:
+        if entry.action == PlanAction.SKIP and entry.reason in reasons:
+            log.warning(
+                f"File {entry.source} was skipped as identical to {reasons[entry.reason]}, which was not imported. Please check manually."
+            )
+
+    log.info(f"Imported {imported} of {len(entries)} planned files")
 
 
 if __name__ == "__main__":
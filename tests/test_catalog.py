@@ -0,0 +1,225 @@
+import os
+import shutil
+from unittest.mock import patch
+
+import pytest
+
+from utils import DestinationCatalog, HashingUtils
+from utils.validation import HashAlgorithm
+from utils.validation.comparison_mode import ComparisonMode
+
+
+@pytest.fixture
+def catalog(destination_dir):
+    """Create a catalog for the destination directory."""
+    with DestinationCatalog(
+        destination_dir / ".import-media" / "catalog.sqlite", destination_dir
+    ) as catalog:
+        yield catalog
+
+
+@pytest.fixture
+def imported_file(destination_dir, sample_jpg_file):
+    """Copy the sample file into the destination directory."""
+    destination_file = destination_dir / "2023" / sample_jpg_file.name
+    destination_file.parent.mkdir()
+    shutil.copy2(sample_jpg_file, destination_file)
+    return destination_file
+
+
+def test_record_and_lookup(catalog, imported_file):
+    """Test that a recorded file is found with its signatures."""
+    assert catalog.lookup(imported_file) is None
+
+    catalog.record(imported_file, partial_hash="partial")
+    entry = catalog.record(imported_file, digest="sha256:full")
+
+    assert entry.path == f"2023/{imported_file.name}"
+    assert entry.size == imported_file.stat().st_size
+    # Signatures of an unchanged file are kept
+    assert catalog.lookup(imported_file) == entry
+    assert entry.partial_hash == "partial"
+    assert entry.digest == "sha256:full"
+
+
+def test_lookup_modified_file(catalog, imported_file):
+    """Test that entries of modified files are not returned."""
+    catalog.record(imported_file, partial_hash="partial")
+    imported_file.write_bytes(b"modified")
+
+    assert catalog.lookup(imported_file) is None
+    # Signatures of the old content are dropped
+    assert catalog.record(imported_file).partial_hash is None
+
+
+@pytest.mark.parametrize(
+    "comparison_mode", [ComparisonMode.PARTIAL, ComparisonMode.FULL]
+)
+def test_compare_reads_destination_once(
+    catalog, imported_file, sample_jpg_file, comparison_mode
+):
+    """Test that the destination is only read if its signature is unknown."""
+    opened = []
+    original_open = open
+
+    def tracking_open(file, *args, **kwargs):
+        opened.append(str(file))
+        return original_open(file, *args, **kwargs)
+
+    with patch("utils.hashing.hashing.open", side_effect=tracking_open):
+        assert catalog.compare(sample_jpg_file, imported_file, comparison_mode)
+        assert catalog.compare(sample_jpg_file, imported_file, comparison_mode)
+
+    assert opened.count(str(imported_file)) == 1
+    assert opened.count(str(sample_jpg_file)) == 2
+
+
+@pytest.mark.parametrize(
+    "comparison_mode",
+    [ComparisonMode.PARTIAL, ComparisonMode.SAMPLED, ComparisonMode.FULL],
+)
+def test_compare_different_files(
+    catalog, imported_file, sample_jpg_file, comparison_mode
+):
+    """Test comparing files that differ from the cataloged file."""
+    catalog.record(
+        imported_file,
+        partial_hash=HashingUtils.get_partial_hash(str(imported_file)),
+        digest=HashingUtils.get_digest(str(imported_file)),
+    )
+    different = sample_jpg_file.with_name("different.jpg")
+    different.write_bytes(b"x" * os.path.getsize(imported_file))
+    smaller = sample_jpg_file.with_name("smaller.jpg")
+    smaller.write_bytes(b"x")
+
+    assert not catalog.compare(different, imported_file, comparison_mode)
+    assert not catalog.compare(smaller, imported_file, comparison_mode)
+
+
+def test_catalog_persists(destination_dir, imported_file):
+    """Test that the catalog is persisted in the database file."""
+    path = destination_dir / ".import-media" / "catalog.sqlite"
+    with DestinationCatalog(path, destination_dir) as catalog:
+        entry = catalog.record(imported_file, digest="sha256:full")
+
+    with DestinationCatalog(path, destination_dir) as catalog:
+        assert catalog.lookup(imported_file) == entry
+
+
+def test_refresh(catalog, destination_dir, imported_file):
+    """Test that a refresh adds new files and removes deleted ones."""
+    other_file = destination_dir / "2024" / "other.jpg"
+    other_file.parent.mkdir()
+    other_file.write_bytes(b"other data")
+
+    assert catalog.refresh([imported_file, other_file]) == 2
+    assert catalog.lookup(other_file).partial_hash is None
+
+    other_file.unlink()
+    assert catalog.refresh([imported_file]) == 1
+    assert catalog.lookup(imported_file) is not None
+
+
+def test_refresh_keeps_signatures_of_unchanged_files(catalog, imported_file):
+    """Test that a refresh keeps the signatures of unchanged files."""
+    catalog.record(imported_file, partial_hash="partial", digest="sha256:full")
+
+    catalog.refresh([imported_file])
+
+    assert catalog.lookup(imported_file).digest == "sha256:full"
+
+
+@pytest.mark.parametrize(
+    "comparison_mode",
+    [ComparisonMode.PARTIAL, ComparisonMode.SAMPLED, ComparisonMode.FULL],
+)
+def test_find_duplicate(
+    catalog, destination_dir, imported_file, sample_jpg_file, comparison_mode
+):
+    """Test finding an identical file anywhere in the destination."""
+    renamed = destination_dir / "2024" / "renamed.jpg"
+    renamed.parent.mkdir()
+    renamed.write_bytes(b"x" * os.path.getsize(imported_file))
+    catalog.refresh([renamed, imported_file])
+
+    assert catalog.find_duplicate(sample_jpg_file, comparison_mode) == imported_file
+    # The signatures of the candidates are recorded
+    assert catalog.lookup(imported_file).partial_hash is not None
+
+
+def test_find_duplicate_reads_nothing_without_same_size(
+    catalog, imported_file, sample_jpg_file
+):
+    """Test that no file is read if no file of the same size exists."""
+    catalog.refresh([imported_file])
+    smaller = sample_jpg_file.with_name("smaller.jpg")
+    smaller.write_bytes(b"x")
+
+    with patch("utils.hashing.hashing.open") as mock_open:
+        assert catalog.find_duplicate(smaller, ComparisonMode.FULL) is None
+    mock_open.assert_not_called()
+
+
+def test_find_duplicate_deleted_file(catalog, imported_file, sample_jpg_file):
+    """Test that entries of deleted files are removed when looked up."""
+    catalog.refresh([imported_file])
+    imported_file.unlink()
+
+    assert catalog.find_duplicate(sample_jpg_file, ComparisonMode.FULL) is None
+    assert catalog.refresh([]) == 0
+
+
+def test_compare_tree_hash_replaces_other_digests(
+    destination_dir, imported_file, sample_jpg_file
+):
+    """Test that digests of another kind are calculated again."""
+    path = destination_dir / ".import-media" / "catalog.sqlite"
+    with DestinationCatalog(path, destination_dir) as catalog:
+        catalog.record(
+            imported_file, digest=HashingUtils.get_digest(str(imported_file))
+        )
+    with DestinationCatalog(path, destination_dir, tree_hash=True) as catalog:
+        assert catalog.compare(sample_jpg_file, imported_file, ComparisonMode.FULL)
+        assert catalog.lookup(imported_file).digest.startswith("sha256-tree:")
+
+
+def test_compare_with_other_algorithm(destination_dir, imported_file, sample_jpg_file):
+    """Test that signatures of another algorithm are calculated again."""
+    path = destination_dir / ".import-media" / "catalog.sqlite"
+    with DestinationCatalog(path, destination_dir) as catalog:
+        assert catalog.compare(sample_jpg_file, imported_file, ComparisonMode.PARTIAL)
+        assert catalog.compare(sample_jpg_file, imported_file, ComparisonMode.FULL)
+
+    with DestinationCatalog(
+        path, destination_dir, algorithm=HashAlgorithm.BLAKE2B
+    ) as catalog:
+        assert catalog.compare(sample_jpg_file, imported_file, ComparisonMode.PARTIAL)
+        assert catalog.compare(sample_jpg_file, imported_file, ComparisonMode.FULL)
+        entry = catalog.lookup(imported_file)
+
+    assert entry.partial_hash.startswith("blake2b:")
+    assert entry.digest.startswith("blake2b:")
+
+
+def test_crc32_matches_are_confirmed(destination_dir, imported_file, sample_jpg_file):
+    """Test that files with matching CRC32 checksums are compared completely."""
+    path = destination_dir / ".import-media" / "catalog.sqlite"
+    with DestinationCatalog(
+        path, destination_dir, algorithm=HashAlgorithm.CRC32
+    ) as catalog:
+        assert catalog.compare(sample_jpg_file, imported_file, ComparisonMode.FULL)
+
+        # Simulate a collision: another file with the same size and checksum
+        collision = destination_dir / "2024" / "collision.jpg"
+        collision.parent.mkdir()
+        collision.write_bytes(b"x" * os.path.getsize(sample_jpg_file))
+        catalog.record(
+            collision,
+            partial_hash=catalog.partial_signature(sample_jpg_file),
+            digest=catalog.lookup(imported_file).digest,
+        )
+        imported_file.unlink()
+        catalog.refresh([collision])
+
+        assert not catalog.compare(sample_jpg_file, collision, ComparisonMode.FULL)
+        assert catalog.find_duplicate(sample_jpg_file, ComparisonMode.FULL) is None
@@ -0,0 +1,344 @@
+import errno
+import os
+import shutil
+from contextlib import ExitStack
+from unittest.mock import patch
+
+import pytest
+
+from utils import FileCopier, HashingUtils
+from utils.validation import Durability, HashAlgorithm
+
+
+@pytest.fixture
+def large_file(source_dir):
+    """Create a file spanning several copy buffers."""
+    path = source_dir / "clip.mp4"
+    path.write_bytes(os.urandom(300_000))
+    os.utime(path, (1_600_000_000, 1_600_000_000))
+    return path
+
+
+def test_copy_returns_hash(large_file, destination_dir):
+    """Test that the copy has the same content and the hash is returned."""
+    destination = destination_dir / large_file.name
+
+    digest = FileCopier(buffer_size=65536).copy(str(large_file), str(destination))
+
+    assert destination.read_bytes() == large_file.read_bytes()
+    assert digest == "sha256:" + HashingUtils.get_hash(str(large_file))
+
+
+def test_copy_reads_source_once(large_file, destination_dir):
+    """Test that the source is read only once, even when verifying."""
+    original_open = open
+    opened = []
+
+    def tracking_open(file, *args, **kwargs):
+        opened.append(str(file))
+        return original_open(file, *args, **kwargs)
+
+    with (
+        patch("utils.copying.copying.open", side_effect=tracking_open),
+        patch("utils.hashing.hashing.open", side_effect=tracking_open),
+    ):
+        FileCopier(verify=True).copy(
+            str(large_file), str(destination_dir / large_file.name)
+        )
+
+    assert opened.count(str(large_file)) == 1
+
+
+def test_copy_preserves_timestamps(large_file, destination_dir):
+    """Test that the modification time is preserved like with copy2."""
+    destination = destination_dir / large_file.name
+
+    FileCopier().copy(str(large_file), str(destination))
+
+    assert destination.stat().st_mtime == large_file.stat().st_mtime
+
+
+def test_copy_verification_failure(large_file, destination_dir):
+    """Test that a copy that fails verification is removed."""
+    destination = destination_dir / large_file.name
+
+    with patch("utils.copying.copying.HashingUtils.get_hash", return_value="bad"):
+        with pytest.raises(IOError, match="Verification"):
+            FileCopier(verify=True).copy(str(large_file), str(destination))
+
+    assert not destination.exists()
+
+
+def test_copy_source_not_found(destination_dir):
+    """Test copying a file that does not exist."""
+    with pytest.raises(FileNotFoundError):
+        FileCopier().copy("non_existent_file.jpg", str(destination_dir / "x.jpg"))
+
+
+def test_invalid_buffer_size():
+    """Test that an empty buffer is rejected."""
+    with pytest.raises(ValueError):
+        FileCopier(buffer_size=0)
+
+
+def test_copy_fast(large_file, destination_dir):
+    """Test copying a file inside the kernel."""
+    destination = destination_dir / large_file.name
+
+    FileCopier().copy_fast(str(large_file), str(destination))
+
+    assert destination.read_bytes() == large_file.read_bytes()
+    assert destination.stat().st_mtime == large_file.stat().st_mtime
+
+
+@pytest.mark.parametrize(
+    "unsupported", [["copy_file_range"], ["copy_file_range", "sendfile"]]
+)
+def test_copy_fast_fallbacks(large_file, destination_dir, unsupported):
+    """Test that unsupported kernel copies fall back to the next method."""
+    destination = destination_dir / large_file.name
+
+    def fail(*args):
+        raise OSError(errno.EXDEV, "Cross-device link")
+
+    with ExitStack() as stack:
+        for name in unsupported:
+            stack.enter_context(patch(f"utils.copying.copying.os.{name}", fail))
+        FileCopier(buffer_size=4096).copy_fast(str(large_file), str(destination))
+
+    assert destination.read_bytes() == large_file.read_bytes()
+
+
+def test_copy_fast_sendfile_to_socket_only(large_file, destination_dir):
+    """Test that sendfile only writing to sockets falls back to user space."""
+    destination = destination_dir / large_file.name
+
+    def fail(*args):
+        raise OSError(errno.ENOTSOCK, "Socket operation on non-socket")
+
+    with (
+        patch("utils.copying.copying.USE_SENDFILE", True),
+        patch("utils.copying.copying.os.copy_file_range", fail, create=True),
+        patch("utils.copying.copying.os.sendfile", fail, create=True),
+    ):
+        FileCopier(buffer_size=4096).copy_fast(str(large_file), str(destination))
+
+    assert destination.read_bytes() == large_file.read_bytes()
+
+
+def test_copy_fast_without_kernel_copy(large_file, destination_dir, monkeypatch):
+    """Test that shutil.copyfile is used where the kernel cannot copy files."""
+    destination = destination_dir / large_file.name
+    monkeypatch.delattr(os, "copy_file_range", raising=False)
+    monkeypatch.setattr("utils.copying.copying.USE_SENDFILE", False)
+    reported = []
+
+    with patch(
+        "utils.copying.copying.shutil.copyfile", wraps=shutil.copyfile
+    ) as copyfile:
+        FileCopier(on_progress=reported.append).copy_fast(
+            str(large_file), str(destination)
+        )
+
+    copyfile.assert_called_once()
+    assert destination.read_bytes() == large_file.read_bytes()
+    assert destination.stat().st_mtime == large_file.stat().st_mtime
+    assert reported == [large_file.stat().st_size]
+
+
+@pytest.mark.parametrize("use_sendfile", [False, True])
+def test_copy_fast_kernel_copies_nothing(large_file, destination_dir, use_sendfile):
+    """Test that kernel copies returning 0 right away fall back to the next method."""
+    destination = destination_dir / large_file.name
+
+    with (
+        patch("utils.copying.copying.USE_SENDFILE", use_sendfile),
+        patch("utils.copying.copying.os.copy_file_range", return_value=0, create=True),
+    ):
+        FileCopier(buffer_size=4096).copy_fast(str(large_file), str(destination))
+
+    assert destination.read_bytes() == large_file.read_bytes()
+
+
+def test_copy_fast_incomplete_copy(large_file, destination_dir):
+    """Test that a copy shorter than its source is never committed."""
+    destination = destination_dir / large_file.name
+
+    with patch.object(FileCopier, "_copy_in_kernel", return_value=True):
+        with pytest.raises(IOError, match="incomplete"):
+            FileCopier().copy_fast(str(large_file), str(destination))
+
+    assert not destination.exists()
+    assert not os.path.exists(FileCopier.temp_path(str(destination)))
+
+
+def test_copy_fast_error(large_file, destination_dir):
+    """Test that other errors of kernel copies are raised."""
+
+    def fail(*args):
+        raise OSError(errno.EIO, "Input/output error")
+
+    with patch("utils.copying.copying.os.copy_file_range", fail, create=True):
+        with pytest.raises(OSError):
+            FileCopier().copy_fast(
+                str(large_file), str(destination_dir / large_file.name)
+            )
+
+
+def test_buffer_is_aligned_and_reused(large_file):
+    """Test that the read buffer is a multiple of the block size and reused."""
+    copier = FileCopier(buffer_size=5000)
+    with open(large_file, "rb") as f:
+        first = copier._get_buffer(f.fileno())
+        second = copier._get_buffer(f.fileno())
+
+    block_size = os.stat(large_file).st_blksize
+    assert len(first) % block_size == 0
+    assert len(first) >= 5000
+    assert first.obj is second.obj
+
+
+def test_copy_tree_hash(large_file, destination_dir):
+    """Test that a tree hash is calculated while copying, if configured."""
+    destination = destination_dir / large_file.name
+
+    digest = FileCopier(buffer_size=65536, verify=True, tree_hash=True).copy(
+        str(large_file), str(destination)
+    )
+
+    assert digest == HashingUtils.get_digest(str(large_file), tree=True)
+
+
+def test_copy_hash_algorithm(large_file, destination_dir):
+    """Test that the configured hash algorithm is used while copying."""
+    destination = destination_dir / large_file.name
+
+    digest = FileCopier(verify=True, algorithm=HashAlgorithm.BLAKE2B).copy(
+        str(large_file), str(destination)
+    )
+
+    assert digest == HashingUtils.get_digest(str(large_file), HashAlgorithm.BLAKE2B)
+
+
+@pytest.mark.parametrize("method", ["copy", "copy_fast"])
+def test_copy_is_atomic(large_file, destination_dir, method):
+    """Test that an interrupted copy leaves neither the destination nor a temp file."""
+    destination = destination_dir / large_file.name
+
+    with patch("utils.copying.copying.shutil.copystat", side_effect=OSError("Gone")):
+        with pytest.raises(OSError):
+            getattr(FileCopier(), method)(str(large_file), str(destination))
+
+    assert list(destination_dir.iterdir()) == []
+
+
+def test_copy_replaces_existing_file(large_file, destination_dir):
+    """Test that an existing destination is replaced only by the complete copy."""
+    destination = destination_dir / large_file.name
+    destination.write_bytes(b"existing data")
+
+    FileCopier().copy(str(large_file), str(destination))
+
+    assert destination.read_bytes() == large_file.read_bytes()
+    assert not os.path.exists(FileCopier.temp_path(str(destination)))
+
+
+def test_temp_path_is_hidden(destination_dir):
+    """Test that copies are written to a hidden file next to the destination."""
+    temp = FileCopier.temp_path(str(destination_dir / "IMG_0001.JPG"))
+
+    assert temp == str(destination_dir / ".IMG_0001.JPG.part")
+
+
+@pytest.mark.parametrize(
+    "durability, fsyncs_per_copy, synced",
+    [(Durability.FILE, 2, 0), (Durability.BATCH, 0, 2), (Durability.NONE, 0, 0)],
+)
+def test_durability(large_file, destination_dir, durability, fsyncs_per_copy, synced):
+    """Test that copies are flushed per file, in a batch or not at all."""
+    copier = FileCopier(durability=durability)
+
+    with patch("utils.copying.copying.os.fsync") as fsync:
+        copier.copy(str(large_file), str(destination_dir / "a.mp4"))
+        copier.copy_fast(str(large_file), str(destination_dir / "b.mp4"))
+        assert fsync.call_count == 2 * fsyncs_per_copy
+
+        assert copier.sync() == synced
+        # The files and their folder are flushed once
+        assert fsync.call_count == 2 * fsyncs_per_copy + (synced and synced + 1)
+        assert copier.sync() == 0
+
+
+@pytest.mark.parametrize("method", ["copy", "copy_fast"])
+def test_copy_reports_progress(large_file, destination_dir, method):
+    """Test that the bytes written are reported in chunks adding up to the size."""
+    reported = []
+    copier = FileCopier(buffer_size=4096, on_progress=reported.append)
+    with patch("utils.copying.copying.PROGRESS_CHUNK_SIZE", 4096):
+        getattr(copier, method)(str(large_file), str(destination_dir / "copy"))
+
+    assert sum(reported) == large_file.stat().st_size
+    assert len(reported) > 1
+
+
+@pytest.fixture
+def interrupted_copy(large_file, destination_dir):
+    """Leave the temporary file of a copy interrupted after 100,000 bytes."""
+    destination = destination_dir / large_file.name
+    temp = FileCopier.temp_path(str(destination))
+    with open(temp, "wb") as f:
+        f.write(b"\0" * 100_000)
+    with patch("utils.copying.copying.RESUME_BLOCK_SIZE", 4096):
+        yield destination
+
+
+@pytest.mark.parametrize("method", ["copy", "copy_fast"])
+def test_copy_resumes_temp_file(large_file, interrupted_copy, method):
+    """Test that only the rest of an interrupted copy is read from the source."""
+    with patch(
+        "utils.copying.copying.HashingUtils.compare_samples", return_value=True
+    ) as compare:
+        digest = getattr(FileCopier(resume=True), method)(
+            str(large_file), str(interrupted_copy)
+        )
+
+    # The part before the last complete block is kept
+    offset = 100_000 // 4096 * 4096 - 4096
+    compare.assert_called_once_with(
+        str(large_file), FileCopier.temp_path(str(interrupted_copy)), offset
+    )
+    content = interrupted_copy.read_bytes()
+    assert content == b"\0" * offset + large_file.read_bytes()[offset:]
+    if method == "copy":
+        assert digest == "sha256:" + HashingUtils.get_hash(str(interrupted_copy))
+
+
+def test_copy_restarts_mismatched_temp_file(large_file, interrupted_copy):
+    """Test that a temporary file with other content is copied again."""
+    FileCopier(resume=True).copy(str(large_file), str(interrupted_copy))
+
+    assert interrupted_copy.read_bytes() == large_file.read_bytes()
+
+
+def test_copy_keeps_temp_file_to_resume(large_file, destination_dir):
+    """Test that a failed copy keeps its temporary file with resume."""
+    destination = destination_dir / large_file.name
+
+    with patch("utils.copying.copying.shutil.copystat", side_effect=OSError("Gone")):
+        with pytest.raises(OSError):
+            FileCopier(resume=True).copy(str(large_file), str(destination))
+
+    with open(FileCopier.temp_path(str(destination)), "rb") as temp:
+        assert temp.read() == large_file.read_bytes()
+    assert not destination.exists()
+
+
+def test_resumed_copy_reports_offset(large_file, interrupted_copy):
+    """Test that the part kept of an interrupted copy is reported as written."""
+    reported = []
+    copier = FileCopier(resume=True, on_progress=reported.append)
+    with patch("utils.copying.copying.HashingUtils.compare_samples", return_value=True):
+        copier.copy(str(large_file), str(interrupted_copy))
+
+    assert reported[0] == 100_000 // 4096 * 4096 - 4096
+    assert sum(reported) == large_file.stat().st_size
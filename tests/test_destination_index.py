@@ -0,0 +1,100 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from file_handling.destination_index import DestinationIndex
+
+
+def test_exists_lists_folder_once(destination_dir):
+    """Test that a folder is listed once for any number of lookups."""
+    (destination_dir / "a.jpg").write_bytes(b"data")
+    index = DestinationIndex()
+
+    with patch(
+        "file_handling.destination_index.os.scandir", wraps=os.scandir
+    ) as mock_scandir:
+        assert index.exists(destination_dir / "a.jpg")
+        assert not index.exists(destination_dir / "b.jpg")
+        assert not index.exists(destination_dir / "c.jpg")
+
+    mock_scandir.assert_called_once_with(destination_dir)
+
+
+def test_exists_missing_folder(destination_dir):
+    """Test lookups in a folder that does not exist yet."""
+    index = DestinationIndex()
+    assert not index.exists(destination_dir / "2023" / "a.jpg")
+
+
+def test_add_and_discard(destination_dir):
+    """Test that files created during the run are tracked."""
+    index = DestinationIndex()
+    file = destination_dir / "a.jpg"
+    assert not index.exists(file)
+
+    index.add(file)
+    assert index.exists(file)
+
+    index.discard(file)
+    assert not index.exists(file)
+
+
+def test_reserve_free_name(destination_dir):
+    """Test that free names are numbered like the rename strategy."""
+    (destination_dir / "a.jpg").write_bytes(b"data")
+    (destination_dir / "a_02.jpg").write_bytes(b"data")
+    index = DestinationIndex()
+
+    first = index.reserve_free_name(destination_dir / "a.jpg")
+    second = index.reserve_free_name(destination_dir / "a.jpg")
+
+    assert first == destination_dir / "a_03.jpg"
+    assert second == destination_dir / "a_04.jpg"
+    assert index.exists(first)
+
+
+def test_claim_and_release(destination_dir):
+    """Test that a claim reports existence and release records the outcome."""
+    (destination_dir / "a.jpg").write_bytes(b"data")
+    index = DestinationIndex()
+
+    assert index.claim(destination_dir / "a.jpg")
+    index.release(destination_dir / "a.jpg", exists=True)
+    assert not index.claim(destination_dir / "b.jpg")
+    index.release(destination_dir / "b.jpg", exists=True)
+
+    assert index.exists(destination_dir / "b.jpg")
+    assert index.claim(destination_dir / "b.jpg")
+    index.release(destination_dir / "b.jpg", exists=False)
+    assert not index.exists(destination_dir / "b.jpg")
+
+
+def test_claim_waits_only_for_same_file(destination_dir):
+    """Test that only claims of the same file wait for each other."""
+    index = DestinationIndex()
+    file = destination_dir / "a.jpg"
+    assert not index.claim(file)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        # Another file is claimed right away
+        other = executor.submit(index.claim, destination_dir / "b.jpg")
+        assert other.result(timeout=5) is False
+
+        # The same file is claimed once it was released, and then exists
+        same = executor.submit(index.claim, file)
+        assert not same.done()
+        index.release(file, exists=True)
+        assert same.result(timeout=5) is True
+
+
+def test_ensure_folder_creates_folder_once(destination_dir):
+    """Test that a folder is only created once."""
+    folder = destination_dir / "2023" / "May" / "15"
+    index = DestinationIndex()
+
+    index.ensure_folder(folder)
+    assert folder.is_dir()
+
+    with patch("pathlib.Path.mkdir") as mock_mkdir:
+        index.ensure_folder(folder)
+    mock_mkdir.assert_not_called()
@@ -1,4 +1,6 @@
-from file_handling.discovery import find_media_files
+from pathlib import Path
+
+from file_handling.discovery import find_media_files, get_file_type, iter_media_files
 from utils.validation.file_types import FileType
 
 
@@ -128,3 +130,124 @@ def test_find_video_files_case_insensitive(source_dir, mock_logger):
     file_names = [f.name for f in files]
     assert "UPPER.MP4" in file_names
     assert "lower.mp4" in file_names
+
+
+def test_iter_media_files_is_lazy(source_dir, mock_logger, sample_jpg_file):
+    """Test that iter_media_files yields files lazily."""
+    files = iter_media_files(
+        source_path=source_dir, filetype=FileType.IMAGE, log=mock_logger
+    )
+    assert next(files) == sample_jpg_file
+    assert list(files) == []
+    mock_logger.warning.assert_not_called()
+
+
+def test_find_media_files_not_recursive_by_default(source_dir, mock_logger):
+    """Test that files in subdirectories are only found when recursive."""
+    subdir = source_dir / "DCIM" / "100MSDCF"
+    subdir.mkdir(parents=True)
+    (subdir / "DSC00001.JPG").write_bytes(b"fake jpg data")
+
+    files = find_media_files(
+        source_path=source_dir, filetype=FileType.IMAGE, log=mock_logger
+    )
+    assert files == []
+
+
+def test_find_media_files_recursive_card_layout(source_dir, mock_logger):
+    """Test finding files in a card layout in a deterministic order."""
+    first = source_dir / "DCIM" / "100MSDCF"
+    second = source_dir / "DCIM" / "101MSDCF"
+    clips = source_dir / "PRIVATE" / "M4ROOT" / "CLIP"
+    for folder in (first, second, clips):
+        folder.mkdir(parents=True)
+    (second / "DSC00002.JPG").write_bytes(b"fake jpg data")
+    (first / "DSC00001.JPG").write_bytes(b"fake jpg data")
+    (source_dir / "ROOT.JPG").write_bytes(b"fake jpg data")
+    (clips / "C0001.MP4").write_bytes(b"fake mp4 data")
+
+    files = find_media_files(
+        source_path=source_dir,
+        filetype=FileType.IMAGE,
+        log=mock_logger,
+        recursive=True,
+    )
+    assert files == [
+        source_dir / "ROOT.JPG",
+        first / "DSC00001.JPG",
+        second / "DSC00002.JPG",
+    ]
+
+
+def test_find_media_files_recursive_skips_system_folders(source_dir, mock_logger):
+    """Test that hidden and known system folders are not searched."""
+    for name in (".Trashes", ".Spotlight-V100", "System Volume Information"):
+        folder = source_dir / name
+        folder.mkdir()
+        (folder / "deleted.JPG").write_bytes(b"fake jpg data")
+    thumbnails = source_dir / "PRIVATE" / "M4ROOT" / "THMBNL"
+    thumbnails.mkdir(parents=True)
+    (thumbnails / "C0001T01.JPG").write_bytes(b"fake jpg data")
+
+    files = find_media_files(
+        source_path=source_dir,
+        filetype=FileType.IMAGE,
+        log=mock_logger,
+        recursive=True,
+    )
+    assert files == []
+    mock_logger.warning.assert_called_once()
+
+
+def test_find_media_files_recursive_does_not_follow_symlinked_folders(
+    source_dir, mock_logger, sample_jpg_file
+):
+    """Test that symlinked folders are not followed, which could loop."""
+    (source_dir / "loop").symlink_to(source_dir, target_is_directory=True)
+
+    files = find_media_files(
+        source_path=source_dir,
+        filetype=FileType.IMAGE,
+        log=mock_logger,
+        recursive=True,
+    )
+    assert files == [sample_jpg_file]
+
+
+def test_find_all_media_files(
+    source_dir, mock_logger, sample_jpg_file, sample_mp4_file
+):
+    """Test finding images and videos in a single pass."""
+    (source_dir / "text_file.txt").write_text("This is a text file")
+
+    files = find_media_files(
+        source_path=source_dir, filetype=FileType.ALL, log=mock_logger
+    )
+    assert sorted(files) == sorted([sample_jpg_file, sample_mp4_file])
+
+
+def test_find_all_media_files_empty_dir(source_dir, mock_logger):
+    """Test the warning of a mixed import without any media files."""
+    find_media_files(source_path=source_dir, filetype=FileType.ALL, log=mock_logger)
+    mock_logger.warning.assert_called_once_with(f"No media files found in {source_dir}")
+
+
+def test_iter_media_files_empty_dir_without_warning(source_dir, mock_logger):
+    """Test that directories that may be empty can be searched without a warning."""
+    files = iter_media_files(
+        source_path=source_dir,
+        filetype=FileType.ALL,
+        log=mock_logger,
+        warn_if_empty=False,
+    )
+    assert list(files) == []
+    mock_logger.warning.assert_not_called()
+
+
+def test_get_file_type():
+    """Test classifying files by their extension."""
+    assert get_file_type(Path("DSC00001.JPG")) == FileType.IMAGE
+    assert get_file_type(Path("image.heic")) == FileType.IMAGE
+    assert get_file_type(Path("C0001.MP4")) == FileType.VIDEO
+    assert get_file_type(Path("clip.mov")) == FileType.VIDEO
+    assert get_file_type(Path("notes.txt")) is None
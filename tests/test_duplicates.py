@@ -0,0 +1,109 @@
+import shutil
+from unittest.mock import patch
+
+import pytest
+
+from file_handling.duplicates import DuplicateDetector
+from utils.validation.comparison_mode import ComparisonMode
+
+
+@pytest.mark.parametrize("comparison_mode", list(ComparisonMode))
+def test_find_original(source_dir, sample_jpg_file, comparison_mode):
+    """Test that a copy of an earlier file is detected in every mode."""
+    copy = source_dir / "copy" / sample_jpg_file.name
+    copy.parent.mkdir()
+    shutil.copy2(sample_jpg_file, copy)
+    detector = DuplicateDetector(comparison_mode)
+
+    assert detector.find_original(sample_jpg_file) is None
+    assert detector.find_original(copy) == sample_jpg_file
+
+
+def test_find_original_different_sizes_reads_nothing(source_dir):
+    """Test that files of different sizes are told apart by their size."""
+    first = source_dir / "first.jpg"
+    second = source_dir / "second.jpg"
+    first.write_bytes(b"a")
+    second.write_bytes(b"bb")
+    detector = DuplicateDetector(ComparisonMode.FULL)
+
+    with patch("utils.hashing.hashing.open") as mock_open:
+        assert detector.find_original(first) is None
+        assert detector.find_original(second) is None
+    mock_open.assert_not_called()
+
+
+def test_find_original_same_size_different_content(source_dir):
+    """Test that files of the same size but other content are kept."""
+    first = source_dir / "first.jpg"
+    second = source_dir / "second.jpg"
+    first.write_bytes(b"a" * 100)
+    second.write_bytes(b"b" * 100)
+    detector = DuplicateDetector(ComparisonMode.FULL)
+
+    assert detector.find_original(first) is None
+    assert detector.find_original(second) is None
+
+
+def test_find_original_full_mode_confirms_content(source_dir):
+    """Test that FULL mode does not trust matching partial signatures."""
+    first = source_dir / "first.mp4"
+    second = source_dir / "second.mp4"
+    first.write_bytes(b"a" * 10_000)
+    second.write_bytes(b"a" * 5_000 + b"b" + b"a" * 4_999)
+
+    partial = DuplicateDetector(ComparisonMode.PARTIAL)
+    assert partial.find_original(first) is None
+    assert partial.find_original(second) == first
+
+    full = DuplicateDetector(ComparisonMode.FULL)
+    assert full.find_original(first) is None
+    assert full.find_original(second) is None
+
+
+def test_find_original_keeps_only_originals(source_dir, sample_jpg_file):
+    """Test that duplicates are not compared with later files again."""
+    copies = []
+    for i in range(3):
+        copy = source_dir / f"copy_{i}.jpg"
+        shutil.copy2(sample_jpg_file, copy)
+        copies.append(copy)
+    detector = DuplicateDetector(ComparisonMode.FULL)
+
+    detector.find_original(sample_jpg_file)
+    assert [detector.find_original(copy) for copy in copies] == [sample_jpg_file] * 3
+
+
+def test_release(source_dir, sample_jpg_file):
+    """Test that a duplicate replaces an original that was not imported."""
+    copies = []
+    for i in range(2):
+        copy = source_dir / f"copy_{i}.jpg"
+        shutil.copy2(sample_jpg_file, copy)
+        copies.append(copy)
+    detector = DuplicateDetector(ComparisonMode.FULL)
+    detector.find_original(sample_jpg_file)
+    for copy in copies:
+        detector.find_original(copy)
+
+    assert detector.release(sample_jpg_file) == copies[0]
+    assert detector.pop_released() == [copies[0]]
+    assert detector.pop_released() == []
+    # The new original is not a duplicate of itself when it is checked again
+    assert detector.find_original(copies[0]) is None
+
+    # The other duplicates follow the new original
+    assert detector.release(copies[0]) == copies[1]
+    assert detector.release(copies[1]) is None
+
+
+def test_release_without_duplicates(source_dir, sample_jpg_file):
+    """Test that later files are not compared with a released file."""
+    copy = source_dir / "copy.jpg"
+    shutil.copy2(sample_jpg_file, copy)
+    detector = DuplicateDetector(ComparisonMode.FULL)
+    detector.find_original(sample_jpg_file)
+
+    assert detector.release(sample_jpg_file) is None
+    assert detector.find_original(copy) is None
+    assert detector.pop_released() == []
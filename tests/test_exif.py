@@ -1,8 +1,17 @@
+import io
+import struct
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from unittest.mock import patch
 
+import pytest
 from PIL import Image
+from pillow_heif import register_heif_opener
 
 from utils import ExifUtils
+from utils.exif.heif import read_exif_item
+from utils.exif.jpeg import read_exif_segment
+from utils.exif.tiff import find_datetime_original
 
 
 def test_get_date_taken(sample_jpg_with_exif):
@@ -29,6 +38,8 @@ def test_get_date_taken_no_exif(sample_jpg_file):
 
 def test_get_date_taken_heif_file(temp_dir):
     """Test getting date taken from EXIF data in a HEIF file."""
+    # ExifUtils only loads the HEIF plugin when it needs it
+    register_heif_opener()
     image_path = temp_dir / "test_image.hif"
     image = Image.new("RGB", (100, 100), color="green")
     exif_data = Image.Exif()
@@ -48,3 +59,162 @@ def test_get_date_taken_invalid_file(temp_dir):
 
     date_taken = ExifUtils.get_date_taken(str(invalid_file_path))
     assert date_taken is None
+
+
+def test_get_dates_taken(sample_jpg_with_exif, sample_jpg_file):
+    """Test getting the dates taken of a batch of images on a process pool."""
+    paths = [str(sample_jpg_with_exif), str(sample_jpg_file)]
+
+    with ExifUtils.create_executor(2) as executor:
+        dates = ExifUtils.get_dates_taken(paths, executor)
+
+    assert dates == {
+        str(sample_jpg_with_exif): datetime(2023, 1, 15, 12, 30, 45),
+        str(sample_jpg_file): None,
+    }
+
+
+def test_get_dates_taken_with_thread_executor(sample_jpg_with_exif):
+    """Test getting the dates taken of a batch of images with any executor."""
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        dates = ExifUtils.get_dates_taken([str(sample_jpg_with_exif)], executor)
+
+    assert dates == {str(sample_jpg_with_exif): datetime(2023, 1, 15, 12, 30, 45)}
+
+
+def test_get_dates_taken_empty():
+    """Test getting the dates taken of an empty batch."""
+    assert ExifUtils.get_dates_taken([]) == {}
+
+
+def _build_tiff(endian: str, date: bytes) -> bytes:
+    """Build a TIFF structure with DateTimeOriginal in the Exif IFD."""
+    header = (b"II*\x00" if endian == "<" else b"MM\x00*") + struct.pack(
+        endian + "I", 8
+    )
+    # IFD0 with a single pointer to the Exif IFD at offset 26
+    ifd0 = struct.pack(endian + "HHHII", 1, 0x8769, 4, 1, 26) + b"\x00" * 4
+    # Exif IFD with the date stored after it at offset 44
+    exif_ifd = struct.pack(endian + "HHHII", 1, 36867, 2, len(date), 44)
+    exif_ifd += b"\x00" * 4
+    return header + ifd0 + exif_ifd + date
+
+
+@pytest.mark.parametrize("endian", ["<", ">"])
+def test_find_datetime_original(endian):
+    """Test finding DateTimeOriginal in the Exif IFD of a TIFF structure."""
+    tiff = _build_tiff(endian, b"2024:03:02 01:02:03\x00")
+    assert find_datetime_original(tiff) == "2024:03:02 01:02:03"
+
+
+@pytest.mark.parametrize("tiff", [b"not a tiff", b"II*\x00\x08\x00\x00\x00\x05"])
+def test_find_datetime_original_invalid(tiff):
+    """Test that invalid TIFF structures are rejected."""
+    with pytest.raises(ValueError):
+        find_datetime_original(tiff)
+
+
+def test_get_date_taken_exif_ifd_without_pillow(temp_dir):
+    """Test reading a camera-style JPEG without opening it with Pillow."""
+    image_path = temp_dir / "camera.jpg"
+    exif_data = Image.Exif()
+    exif_data.get_ifd(0x8769)[ExifUtils.EXIF_DATETIME_ORIGINAL] = "2022:02:02 10:00:00"
+    Image.new("RGB", (100, 100)).save(image_path, exif=exif_data)
+
+    with patch("utils.exif.exif._load_pillow") as mock_pillow:
+        date_taken = ExifUtils.get_date_taken(str(image_path))
+
+    assert date_taken == datetime(2022, 2, 2, 10, 0, 0)
+    mock_pillow.assert_not_called()
+
+
+def test_get_date_taken_no_exif_without_pillow(sample_jpg_file):
+    """Test that a JPEG without EXIF segment is not opened with Pillow."""
+    with patch("utils.exif.exif._load_pillow") as mock_pillow:
+        assert ExifUtils.get_date_taken(str(sample_jpg_file)) is None
+
+    mock_pillow.assert_not_called()
+
+
+def test_read_exif_segment_skips_other_segments():
+    """Test that segments before the EXIF APP1 segment are skipped."""
+    tiff = _build_tiff("<", b"2024:03:02 01:02:03\x00")
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+    app1 = b"\xff\xe1" + struct.pack(">H", len(tiff) + 8) + b"Exif\x00\x00" + tiff
+    data = b"\xff\xd8" + app0 + app1 + b"\xff\xda"
+
+    assert read_exif_segment(io.BytesIO(data)) == tiff
+
+
+def test_get_date_taken_falls_back_to_pillow(temp_dir):
+    """Test that Pillow is used when the headers cannot be parsed."""
+    image_path = temp_dir / "truncated.jpg"
+    image_path.write_bytes(b"\xff\xd8\xff\xe1\x00")
+
+    with patch(
+        "utils.exif.exif.ExifUtils._read_date_taken_pillow",
+        return_value="2021:07:08 09:10:11",
+    ) as mock_pillow:
+        date_taken = ExifUtils.get_date_taken(str(image_path))
+
+    assert date_taken == datetime(2021, 7, 8, 9, 10, 11)
+    mock_pillow.assert_called_once_with(str(image_path))
+
+
+def _box(box_type: bytes, payload: bytes) -> bytes:
+    """Build an ISO base media box."""
+    return struct.pack(">I4s", len(payload) + 8, box_type) + payload
+
+
+def test_get_date_taken_heif_without_pillow(temp_dir):
+    """Test reading the Exif IFD of a HEIF file without opening it with Pillow."""
+    register_heif_opener()
+    image_path = temp_dir / "camera.HIF"
+    exif_data = Image.Exif()
+    exif_data.get_ifd(0x8769)[ExifUtils.EXIF_DATETIME_ORIGINAL] = "2023:06:01 10:20:30"
+    Image.new("RGB", (64, 64)).save(image_path, format="HEIF", exif=exif_data)
+
+    with patch("utils.exif.exif._load_pillow") as mock_pillow:
+        date_taken = ExifUtils.get_date_taken(str(image_path))
+
+    assert date_taken == datetime(2023, 6, 1, 10, 20, 30)
+    mock_pillow.assert_not_called()
+
+
+def test_read_exif_item_from_idat():
+    """Test reading an Exif item stored in the idat box of the meta box."""
+    tiff = _build_tiff(">", b"2024:03:02 01:02:03\x00")
+    exif_item = struct.pack(">I", 6) + b"Exif\x00\x00" + tiff
+
+    infe = _box(b"infe", b"\x02\x00\x00\x00" + struct.pack(">HH4s", 7, 0, b"Exif"))
+    iinf = _box(b"iinf", b"\x00\x00\x00\x00" + struct.pack(">H", 1) + infe)
+    # iloc version 1: 4 byte offsets and lengths, no base offset, no index
+    iloc = _box(
+        b"iloc",
+        b"\x01\x00\x00\x00\x44\x00"
+        + struct.pack(">HHHHHII", 1, 7, 1, 0, 1, 0, len(exif_item)),
+    )
+    idat = _box(b"idat", exif_item)
+    meta = _box(b"meta", b"\x00\x00\x00\x00" + iinf + iloc + idat)
+    data = _box(b"ftyp", b"heic\x00\x00\x00\x00") + meta + _box(b"mdat", b"\x00")
+
+    assert read_exif_item(io.BytesIO(data)) == tiff
+
+
+def test_read_exif_item_without_exif():
+    """Test reading a HEIF file without Exif item."""
+    infe = _box(b"infe", b"\x02\x00\x00\x00" + struct.pack(">HH4s", 1, 0, b"hvc1"))
+    iinf = _box(b"iinf", b"\x00\x00\x00\x00" + struct.pack(">H", 1) + infe)
+    iloc = _box(b"iloc", b"\x00\x00\x00\x00\x44\x00" + struct.pack(">H", 0))
+    meta = _box(b"meta", b"\x00\x00\x00\x00" + iinf + iloc)
+    data = _box(b"ftyp", b"heic\x00\x00\x00\x00") + meta
+
+    assert read_exif_item(io.BytesIO(data)) is None
+
+
+def test_read_exif_item_without_meta():
+    """Test that files without meta box are rejected."""
+    data = _box(b"ftyp", b"heic\x00\x00\x00\x00") + _box(b"mdat", b"\x00" * 16)
+
+    with pytest.raises(ValueError):
+        read_exif_item(io.BytesIO(data))
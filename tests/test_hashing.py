@@ -1,9 +1,12 @@
+import hashlib
 import os
+import zlib
 from unittest.mock import mock_open, patch
 
 import pytest
 
-from utils import HashingUtils
+from utils import HashingUtils, TreeHasher
+from utils.validation import HashAlgorithm
 from utils.validation.comparison_mode import ComparisonMode
 
 
@@ -342,3 +345,249 @@ def test_compare_hashes_partial_different_end_chunk():
                 partial_check_size=partial_size,
             )
             assert result is False  # End chunks should differ
+
+
+def test_get_partial_hash(temp_dir):
+    # Files with the same size, head and tail have the same partial hash
+    file1 = temp_dir / "file1.bin"
+    file2 = temp_dir / "file2.bin"
+    file3 = temp_dir / "file3.bin"
+    file1.write_bytes(b"A" * 10000 + b"B" * 100 + b"C" * 10000)
+    file2.write_bytes(b"A" * 10000 + b"X" * 100 + b"C" * 10000)
+    file3.write_bytes(b"A" * 10000 + b"B" * 100 + b"D" * 10000)
+
+    assert HashingUtils.get_partial_hash(str(file1)) == HashingUtils.get_partial_hash(
+        str(file2)
+    )
+    assert HashingUtils.get_partial_hash(str(file1)) != HashingUtils.get_partial_hash(
+        str(file3)
+    )
+
+
+def test_get_partial_hash_file_not_found():
+    with pytest.raises(FileNotFoundError):
+        HashingUtils.get_partial_hash("non_existent_file.txt")
+
+
+def test_compare_contents(temp_dir):
+    """Test comparing the contents of two files block by block."""
+    file1 = temp_dir / "file1.bin"
+    file2 = temp_dir / "file2.bin"
+    file3 = temp_dir / "file3.bin"
+    file1.write_bytes(b"a" * 10 + b"b")
+    file2.write_bytes(b"a" * 10 + b"b")
+    file3.write_bytes(b"a" * 10 + b"c")
+
+    assert HashingUtils.compare_contents(str(file1), str(file2), buffer_size=4)
+    assert not HashingUtils.compare_contents(str(file1), str(file3), buffer_size=4)
+
+
+def test_compare_hashes_full_mode_stops_at_first_difference(temp_dir):
+    """Test that FULL mode stops reading at the first differing block."""
+    file1 = temp_dir / "file1.bin"
+    file2 = temp_dir / "file2.bin"
+    file1.write_bytes(b"a" + b"x" * 1000)
+    file2.write_bytes(b"b" + b"x" * 1000)
+
+    reads = []
+    original_open = open
+
+    def tracking_open(file, *args, **kwargs):
+        f = original_open(file, *args, **kwargs)
+        original_read = f.read
+
+        def read(*read_args):
+            data = original_read(*read_args)
+            reads.append(len(data))
+            return data
+
+        f.read = read
+        return f
+
+    with (
+        patch("utils.hashing.hashing.open", side_effect=tracking_open),
+        patch.object(HashingUtils, "get_hash") as mock_get_hash,
+    ):
+        assert not HashingUtils.compare_hashes(
+            str(file1), str(file2), ComparisonMode.FULL, buffer_size=16
+        )
+
+    mock_get_hash.assert_not_called()
+    assert reads == [16, 16]
+
+
+def test_get_sample_offsets_small_file():
+    """Test that small files are sampled completely."""
+    assert HashingUtils.get_sample_offsets(0, sample_size=4) == [0]
+    assert HashingUtils.get_sample_offsets(10, sample_size=4) == [0, 4, 8]
+
+
+def test_get_sample_offsets_scale_with_size():
+    """Test that the number of samples grows with the file size."""
+    small = HashingUtils.get_sample_offsets(100 * 1024 * 1024)
+    large = HashingUtils.get_sample_offsets(10 * 1024 * 1024 * 1024)
+
+    assert len(small) == 8
+    assert len(large) == 256
+    for size, offsets in ((100 * 1024 * 1024, small), (10 * 1024**3, large)):
+        assert offsets[0] == 0
+        assert offsets[-1] == size - 64 * 1024
+        # The blocks do not overlap
+        assert all(b - a >= 64 * 1024 for a, b in zip(offsets, offsets[1:]))
+
+
+def test_get_sample_offsets_deterministic():
+    """Test that files of the same size are sampled at the same positions."""
+    size = 3 * 1024 * 1024 * 1024
+    assert HashingUtils.get_sample_offsets(size) == HashingUtils.get_sample_offsets(
+        size
+    )
+
+
+def test_compare_hashes_sampled_mode(temp_dir):
+    """Test that SAMPLED mode finds differences in the middle of files."""
+    size = 2 * 1024 * 1024
+    file1 = temp_dir / "file1.bin"
+    file2 = temp_dir / "file2.bin"
+    file1.write_bytes(b"a" * size)
+    file2.write_bytes(b"a" * size)
+
+    assert HashingUtils.compare_hashes(
+        str(file1), str(file2), ComparisonMode.SAMPLED, sample_size=1024
+    )
+
+    # Change a sampled byte in the middle of the file
+    offset = HashingUtils.get_sample_offsets(size, sample_size=1024)[4]
+    with open(file2, "r+b") as f:
+        f.seek(offset)
+        f.write(b"b")
+
+    assert HashingUtils.compare_hashes(str(file1), str(file2), ComparisonMode.PARTIAL)
+    assert not HashingUtils.compare_hashes(
+        str(file1), str(file2), ComparisonMode.SAMPLED, sample_size=1024
+    )
+
+
+def test_compare_hashes_sampled_mode_certain(temp_dir):
+    """Test that matching samples are confirmed with a full comparison."""
+    size = 2 * 1024 * 1024
+    file1 = temp_dir / "file1.bin"
+    file2 = temp_dir / "file2.bin"
+    file1.write_bytes(b"a" * size)
+    file2.write_bytes(b"a" * size)
+
+    # Change a byte that is not sampled
+    offsets = HashingUtils.get_sample_offsets(size, sample_size=1024)
+    with open(file2, "r+b") as f:
+        f.seek(offsets[4] + 1024)
+        f.write(b"b")
+
+    assert HashingUtils.compare_hashes(
+        str(file1), str(file2), ComparisonMode.SAMPLED, sample_size=1024
+    )
+    assert not HashingUtils.compare_hashes(
+        str(file1), str(file2), ComparisonMode.SAMPLED, sample_size=1024, certain=True
+    )
+
+
+@pytest.mark.parametrize("size", [0, 1, 999, 1000, 1001, 10_000])
+def test_get_tree_hash_matches_streaming(temp_dir, size):
+    """Test that the parallel tree hash matches the streaming tree hash."""
+    file = temp_dir / "clip.mp4"
+    file.write_bytes(os.urandom(size))
+
+    hasher = TreeHasher(segment_size=1000)
+    data = file.read_bytes()
+    for i in range(0, len(data), 333):
+        hasher.update(data[i : i + 333])
+
+    assert (
+        HashingUtils.get_tree_hash(
+            str(file), segment_size=1000, max_workers=4, buffer_size=64
+        )
+        == hasher.hexdigest()
+    )
+
+
+def test_get_tree_hash_single_segment(temp_dir):
+    """Test the tree hash of a file with a single segment."""
+    file = temp_dir / "image.jpg"
+    file.write_bytes(b"content")
+
+    expected = hashlib.sha256(hashlib.sha256(b"content").digest()).hexdigest()
+    assert HashingUtils.get_tree_hash(str(file)) == expected
+
+
+def test_get_tree_hash_file_not_found():
+    """Test the tree hash of a file that does not exist."""
+    with pytest.raises(FileNotFoundError, match="File not found"):
+        HashingUtils.get_tree_hash("non_existent_file.mp4")
+
+
+def test_get_digest(temp_dir):
+    """Test that digests are tagged with how they were calculated."""
+    file = temp_dir / "image.jpg"
+    file.write_bytes(b"content")
+
+    assert HashingUtils.get_digest(str(file)) == "sha256:" + HashingUtils.get_hash(
+        str(file)
+    )
+    assert HashingUtils.get_digest(
+        str(file), tree=True
+    ) == "sha256-tree:" + HashingUtils.get_tree_hash(str(file))
+
+
+@pytest.mark.parametrize(
+    "algorithm, expected",
+    [
+        (HashAlgorithm.SHA256, hashlib.sha256(b"content").hexdigest()),
+        (HashAlgorithm.BLAKE2B, hashlib.blake2b(b"content").hexdigest()),
+        (HashAlgorithm.CRC32, f"{zlib.crc32(b'content'):08x}"),
+    ],
+)
+def test_get_hash_algorithms(temp_dir, algorithm, expected):
+    """Test hashing files with each supported algorithm."""
+    file = temp_dir / "image.jpg"
+    file.write_bytes(b"content")
+
+    assert HashingUtils.get_hash(str(file), 2, algorithm) == expected
+    assert (
+        HashingUtils.get_digest(str(file), algorithm) == f"{algorithm.value}:{expected}"
+    )
+
+
+@pytest.mark.parametrize("algorithm", list(HashAlgorithm))
+def test_get_tree_hash_algorithms(temp_dir, algorithm):
+    """Test that parallel and streaming tree hashes match for each algorithm."""
+    file = temp_dir / "clip.mp4"
+    file.write_bytes(os.urandom(5000))
+
+    hasher = HashingUtils.create_hasher(algorithm, tree=True)
+    hasher.update(file.read_bytes())
+
+    assert (
+        HashingUtils.get_digest(str(file), algorithm, tree=True)
+        == HashingUtils.digest_prefix(algorithm, tree=True) + hasher.hexdigest()
+    )
+
+
+def test_get_partial_hash_algorithm(temp_dir):
+    """Test that partial hashes of different algorithms differ."""
+    file = temp_dir / "image.jpg"
+    file.write_bytes(b"content")
+
+    assert HashingUtils.get_partial_hash(
+        str(file), algorithm=HashAlgorithm.BLAKE2B
+    ) != HashingUtils.get_partial_hash(str(file))
+
+
+def test_compare_samples_of_prefix(temp_dir):
+    """Test that the samples of a prefix are compared, whatever follows it."""
+    data = os.urandom(1_000_000)
+    file1 = temp_dir / "complete.bin"
+    file2 = temp_dir / "partial.bin"
+    file1.write_bytes(data)
+    file2.write_bytes(data[:600_000] + b"garbage")
+
+    assert HashingUtils.compare_samples(str(file1), str(file2), 600_000)
+    assert not HashingUtils.compare_samples(str(file1), str(file2), 700_000)
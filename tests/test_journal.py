@@ -0,0 +1,162 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from utils import FileCopier, ImportJournal
+from utils.validation import JournalState
+
+
+@pytest.fixture
+def journal_path(destination_dir):
+    """Path of the journal database in a not yet existing folder."""
+    return destination_dir / ".import-media" / "journal.sqlite"
+
+
+@pytest.fixture
+def destination_file(destination_dir, sample_jpg_file):
+    """The destination of the sample file in the destination directory."""
+    return destination_dir / "2023" / sample_jpg_file.name
+
+
+def test_lifecycle(journal_path, destination_dir, destination_file, sample_jpg_file):
+    """Test that an entry passes through planned, in progress and completed."""
+    with ImportJournal(journal_path, destination_dir) as journal:
+        assert journal.lookup(sample_jpg_file) is None
+
+        journal.plan(sample_jpg_file, destination_file)
+        assert journal.lookup(sample_jpg_file).state == JournalState.PLANNED
+
+        journal.start(sample_jpg_file, destination_file)
+        assert journal.lookup(sample_jpg_file).state == JournalState.IN_PROGRESS
+
+        journal.complete(sample_jpg_file, destination_file, "sha256:digest")
+        entry = journal.lookup(sample_jpg_file)
+
+    assert entry.state == JournalState.COMPLETED
+    assert entry.destination == f"2023/{sample_jpg_file.name}"
+    assert entry.size == sample_jpg_file.stat().st_size
+    assert entry.digest == "sha256:digest"
+
+
+def test_lookup_completed(
+    journal_path, destination_dir, destination_file, sample_jpg_file
+):
+    """Test that completed files are found as long as their copy is intact."""
+    with ImportJournal(journal_path, destination_dir) as journal:
+        journal.start(sample_jpg_file, destination_file)
+        assert journal.lookup_completed(sample_jpg_file) is None
+
+        destination_file.parent.mkdir()
+        shutil.copy2(sample_jpg_file, destination_file)
+        journal.complete(sample_jpg_file, destination_file)
+        assert journal.lookup_completed(sample_jpg_file) == destination_file
+
+        # A copy of another size is imported again
+        destination_file.write_bytes(b"truncated")
+        assert journal.lookup_completed(sample_jpg_file) is None
+
+        destination_file.unlink()
+        assert journal.lookup_completed(sample_jpg_file) is None
+
+
+def test_lookup_modified_source(
+    journal_path, destination_dir, destination_file, sample_jpg_file
+):
+    """Test that a source file modified since it was imported is not found."""
+    destination_file.parent.mkdir()
+    shutil.copy2(sample_jpg_file, destination_file)
+
+    with ImportJournal(journal_path, destination_dir) as journal:
+        journal.complete(sample_jpg_file, destination_file)
+        sample_jpg_file.write_bytes(b"modified")
+
+        assert journal.lookup(sample_jpg_file) is None
+        assert journal.lookup_completed(sample_jpg_file) is None
+
+
+def test_recover(journal_path, destination_dir, destination_file, sample_jpg_file):
+    """Test that copies interrupted by a crash are removed on the next run."""
+    temp_file = Path(FileCopier.temp_path(str(destination_file)))
+    temp_file.parent.mkdir()
+    temp_file.write_bytes(sample_jpg_file.read_bytes()[:10])
+
+    journal = ImportJournal(journal_path, destination_dir)
+    journal.start(sample_jpg_file, destination_file)
+    # Simulate a crash: the journal is not closed
+    journal._connection.close()
+
+    with ImportJournal(journal_path, destination_dir) as journal:
+        assert journal.recover() == [temp_file]
+        assert journal.lookup(sample_jpg_file).state == JournalState.PLANNED
+        # Nothing is left to recover
+        assert journal.recover() == []
+
+    assert not temp_file.exists()
+
+
+def test_recover_keeps_destination_file(
+    journal_path, destination_dir, destination_file, sample_jpg_file
+):
+    """Test that the file under the destination name of an interrupted copy,
+    e.g. the original of an interrupted replace, is kept."""
+    destination_file.parent.mkdir()
+    destination_file.write_bytes(b"original")
+
+    with ImportJournal(journal_path, destination_dir) as journal:
+        journal.start(sample_jpg_file, destination_file)
+
+    with ImportJournal(journal_path, destination_dir) as journal:
+        assert journal.recover() == []
+        assert journal.lookup(sample_jpg_file).state == JournalState.PLANNED
+
+    assert destination_file.read_bytes() == b"original"
+
+
+def test_recover_removes_temp_file(
+    journal_path, destination_dir, destination_file, sample_jpg_file
+):
+    """Test that the temporary file of an interrupted copy is removed."""
+    temp_file = Path(FileCopier.temp_path(str(destination_file)))
+    temp_file.parent.mkdir()
+    temp_file.write_bytes(b"partial")
+
+    with ImportJournal(journal_path, destination_dir) as journal:
+        journal.start(sample_jpg_file, destination_file)
+
+    with ImportJournal(journal_path, destination_dir) as journal:
+        assert journal.recover() == [temp_file]
+
+    assert not temp_file.exists()
+
+
+def test_recover_keeps_temp_file_to_resume(
+    journal_path, destination_dir, destination_file, sample_jpg_file
+):
+    """Test that temporary files are kept if the copies are resumed."""
+    temp_file = Path(FileCopier.temp_path(str(destination_file)))
+    temp_file.parent.mkdir()
+    temp_file.write_bytes(b"partial")
+
+    with ImportJournal(journal_path, destination_dir) as journal:
+        journal.start(sample_jpg_file, destination_file)
+        assert journal.recover(keep_temp_files=True) == []
+
+    assert temp_file.exists()
+
+
+def test_recover_keeps_completed_files(
+    journal_path, destination_dir, destination_file, sample_jpg_file
+):
+    """Test that recovering never removes completed copies."""
+    destination_file.parent.mkdir()
+    shutil.copy2(sample_jpg_file, destination_file)
+
+    with ImportJournal(journal_path, destination_dir) as journal:
+        journal.start(sample_jpg_file, destination_file)
+        journal.complete(sample_jpg_file, destination_file)
+
+    with ImportJournal(journal_path, destination_dir) as journal:
+        assert journal.recover() == []
+
+    assert destination_file.exists()
@@ -1,6 +1,10 @@
 import importlib
 import locale
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
 from pathlib import Path
 from unittest.mock import patch
 
@@ -9,13 +13,14 @@ from typer.testing import CliRunner
 
 import main
 from import_options.strategy import Strategy
+from utils import FileCopier
 from utils.validation.file_types import FileType
 
 
 @pytest.fixture
 def mock_find_media_files():
-    """Mock the find_jpg_files function."""
-    with patch("main.find_media_files") as mock:
+    """Mock the iter_media_files function."""
+    with patch("main.iter_media_files") as mock:
         yield mock
 
 
@@ -114,9 +119,10 @@ def test_import_files_with_existing_file(
 
     mock_rename, mock_replace, mock_onlynew = mock_handle_strategies
 
-    # Create the folder and make file appear to exist
+    # Create the folder and the existing file
+    dest_folder.mkdir(parents=True)
+    (dest_folder / source_file.name).write_bytes(b"existing data")
     with (
-        patch("pathlib.Path.exists", return_value=True),
         patch("main.validate_directories", return_value=True),
         patch("main.setup_logging"),
     ):
@@ -194,6 +200,424 @@ def test_import_files_with_destination_folder_none(
         mock_copy.assert_not_called()
 
 
+def test_process_file_destination_folder_none(mock_get_destination_folder):
+    """Test that process_file skips files without a destination folder."""
+    mock_get_destination_folder.return_value = (None, None)
+    log = main.logging.getLogger("test")
+
+    with patch("main.copy_file") as mock_copy:
+        item = main.resolve_destination(
+            file_path=Path("/mock/source/file.jpg"),
+            destination_path=Path("/valid/dest"),
+            filetype=FileType.IMAGE,
+            log=log,
+        )
+        result = main.process_file(
+            item,
+            strategy=Strategy.ONLYNEW,
+            comparison_mode=main.ComparisonMode.PARTIAL,
+            force=False,
+            log=log,
+        )
+
+    assert result is False
+    mock_copy.assert_not_called()
+
+
+def test_process_file_copies_in_parallel(temp_dir, mock_logger):
+    """Test that copies to different destinations do not wait for each other."""
+    destination_folder = temp_dir / "2023" / "May" / "15"
+    index = main.DestinationIndex()
+    both_copying = threading.Barrier(2, timeout=5)
+
+    def copy_file(*args):
+        # Fails with BrokenBarrierError unless both copies run at the same time
+        both_copying.wait()
+        return True
+
+    items = [
+        main.ImportItem(temp_dir / f"IMG_000{i}.JPG", destination_folder)
+        for i in range(2)
+    ]
+    with (
+        patch("main.copy_file", side_effect=copy_file),
+        ThreadPoolExecutor(max_workers=2) as executor,
+    ):
+        results = executor.map(
+            partial(
+                main.process_file,
+                strategy=Strategy.ONLYNEW,
+                comparison_mode=main.ComparisonMode.FULL,
+                force=False,
+                log=mock_logger,
+                index=index,
+            ),
+            items,
+        )
+        assert list(results) == [True, True]
+
+    assert all(index.exists(destination_folder / item.file_path.name) for item in items)
+
+
+def test_import_files_parallel_copy(source_dir, destination_dir, sample_jpg_file):
+    """Test that a parallel import copies every file to the destination."""
+    for i in range(8):
+        (source_dir / f"IMG_{i:04}.JPG").write_bytes(b"fake jpg data %d" % i)
+
+    with patch("main.setup_logging"):
+        main.import_files(
+            source=str(source_dir),
+            destination=str(destination_dir),
+            filetype=FileType.IMAGE,
+            strategy=Strategy.ONLYNEW,
+            comparison_mode=main.ComparisonMode.FULL,
+            verbose=False,
+            force=False,
+            workers=4,
+        )
+
+    copied = [f.name for f in destination_dir.rglob("*") if f.is_file()]
+    assert sorted(copied) == sorted(f.name for f in source_dir.iterdir())
+
+
+def test_import_files_dedup(source_dir, destination_dir, sample_jpg_file):
+    """Test that files already in the library under another name are skipped."""
+    archive = destination_dir / "Archive"
+    archive.mkdir()
+    (archive / "renamed.jpg").write_bytes(sample_jpg_file.read_bytes())
+    new_file = source_dir / "new.jpg"
+    new_file.write_bytes(b"fake jpg data")
+
+    with patch("main.setup_logging"):
+        main.import_files(
+            source=str(source_dir),
+            destination=str(destination_dir),
+            filetype=FileType.IMAGE,
+            strategy=Strategy.ONLYNEW,
+            comparison_mode=main.ComparisonMode.FULL,
+            verbose=False,
+            force=False,
+            dedup=True,
+        )
+
+    copied = [
+        f.name
+        for f in destination_dir.rglob("*")
+        if f.is_file() and main.constants.STATE_DIRECTORY not in f.parts
+    ]
+    assert sorted(copied) == ["new.jpg", "renamed.jpg"]
+
+
+@pytest.mark.parametrize("exif_processes", [0, 1])
+def test_import_files_dedup_sources(
+    source_dir, destination_dir, sample_jpg_file, exif_processes
+):
+    """Test that only one file of each group of identical sources is copied."""
+    second_card = source_dir / "card2"
+    second_card.mkdir()
+    (second_card / sample_jpg_file.name).write_bytes(sample_jpg_file.read_bytes())
+
+    with patch("main.setup_logging"):
+        main.import_files(
+            source=str(source_dir),
+            destination=str(destination_dir),
+            filetype=FileType.IMAGE,
+            strategy=Strategy.RENAME,
+            comparison_mode=main.ComparisonMode.FULL,
+            verbose=False,
+            force=False,
+            recursive=True,
+            exif_processes=exif_processes,
+            dedup_sources=True,
+        )
+
+    copied = [f.name for f in destination_dir.rglob("*") if f.is_file()]
+    assert copied == [sample_jpg_file.name]
+
+
+def test_import_files_dedup_sources_reimport(
+    source_dir, destination_dir, sample_jpg_file
+):
+    """Test that duplicates of files already in the destination stay skipped."""
+    second_card = source_dir / "card2"
+    second_card.mkdir()
+    (second_card / "DSC_9999.JPG").write_bytes(sample_jpg_file.read_bytes())
+    options = dict(
+        source=str(source_dir),
+        destination=str(destination_dir),
+        filetype=FileType.IMAGE,
+        strategy=Strategy.ONLYNEW,
+        comparison_mode=main.ComparisonMode.FULL,
+        verbose=False,
+        force=False,
+        recursive=True,
+        dedup_sources=True,
+    )
+
+    with patch("main.setup_logging"):
+        main.import_files(**options)
+        with patch("main.copy_file") as mock_copy:
+            main.import_files(**options)
+
+    mock_copy.assert_not_called()
+    assert len([f for f in destination_dir.rglob("*") if f.is_file()]) == 1
+
+
+@pytest.mark.parametrize("exif_processes", [0, 1])
+def test_import_files_dedup_sources_original_fails(
+    source_dir, destination_dir, sample_jpg_file, exif_processes
+):
+    """Test that a duplicate is imported if the copy of its original fails."""
+    second_card = source_dir / "card2"
+    second_card.mkdir()
+    (second_card / sample_jpg_file.name).write_bytes(sample_jpg_file.read_bytes())
+    copy_file = main.copy_file
+    sources = []
+
+    def fail_first_copy(file_path, *args):
+        sources.append(file_path)
+        return len(sources) > 1 and copy_file(file_path, *args)
+
+    with (
+        patch("main.setup_logging"),
+        patch("main.copy_file", side_effect=fail_first_copy),
+    ):
+        main.import_files(
+            source=str(source_dir),
+            destination=str(destination_dir),
+            filetype=FileType.IMAGE,
+            strategy=Strategy.RENAME,
+            comparison_mode=main.ComparisonMode.FULL,
+            verbose=False,
+            force=False,
+            recursive=True,
+            exif_processes=exif_processes,
+            dedup_sources=True,
+        )
+
+    assert len(sources) == 2 and sources[0] != sources[1]
+    copied = [f.name for f in destination_dir.rglob("*") if f.is_file()]
+    assert copied == [sample_jpg_file.name]
+
+
+def test_import_files_journal_resume(source_dir, destination_dir, sample_jpg_file):
+    """Test that a rerun skips completed files and redoes interrupted copies."""
+    interrupted = source_dir / "interrupted.jpg"
+    interrupted.write_bytes(b"fake jpg data")
+    options = dict(
+        source=str(source_dir),
+        destination=str(destination_dir),
+        filetype=FileType.IMAGE,
+        strategy=Strategy.ONLYNEW,
+        comparison_mode=main.ComparisonMode.FULL,
+        verbose=False,
+        force=False,
+        journal=True,
+    )
+
+    with patch("main.setup_logging"):
+        main.import_files(**options)
+
+    # Simulate a crash while the second file was being copied
+    (copied_file,) = destination_dir.rglob(interrupted.name)
+    copied_file.unlink()
+    temp_file = Path(FileCopier.temp_path(str(copied_file)))
+    temp_file.write_bytes(b"fake")
+    with main.ImportJournal(
+        destination_dir / main.constants.STATE_DIRECTORY / main.constants.JOURNAL_FILE,
+        destination_dir,
+    ) as journal:
+        journal.start(interrupted, copied_file)
+
+    with (
+        patch("main.setup_logging"),
+        patch("main.handle_onlynew_strategy") as mock_onlynew,
+        patch("main.copy_file", wraps=main.copy_file) as mock_copy,
+    ):
+        main.import_files(**options)
+
+    # Neither file is compared: one is completed, the other one is redone
+    mock_onlynew.assert_not_called()
+    mock_copy.assert_called_once()
+    assert mock_copy.call_args.args[0] == interrupted
+    assert copied_file.read_bytes() == b"fake jpg data"
+    assert not temp_file.exists()
+
+
+def test_plan_and_apply(source_dir, destination_dir, sample_jpg_file, temp_dir):
+    """Test that planning changes nothing and applying the plan imports the files."""
+    existing = destination_dir / "existing.jpg"
+    existing.write_bytes(b"existing data")
+    plan_path = temp_dir / "plan.jsonl"
+
+    with patch("main.setup_logging"):
+        main.plan_import(
+            source=str(source_dir),
+            destination=str(destination_dir),
+            plan_file=str(plan_path),
+            verbose=False,
+        )
+        assert list(destination_dir.iterdir()) == [existing]
+
+        plan = main.ImportPlan.load(plan_path)
+        assert [entry.action for entry in plan.entries] == [main.PlanAction.COPY]
+
+        # The plan is executed without resolving the dates again
+        with patch("main.get_destination_folder") as mock_get_destination_folder:
+            main.apply_plan(plan_file=str(plan_path), verbose=False)
+        mock_get_destination_folder.assert_not_called()
+
+    assert Path(plan.entries[0].destination).read_bytes() == (
+        sample_jpg_file.read_bytes()
+    )
+
+
+def test_apply_plan_warns_about_duplicates_of_failed_copies(
+    source_dir, destination_dir, sample_jpg_file, temp_dir
+):
+    """Test that skipped duplicates of files that were not copied are reported."""
+    duplicate = source_dir / "duplicate.jpg"
+    duplicate.write_bytes(sample_jpg_file.read_bytes())
+    size = sample_jpg_file.stat().st_size
+    plan = main.ImportPlan(destination_dir)
+    plan.add(
+        main.PlanEntry(
+            main.PlanAction.COPY,
+            str(sample_jpg_file),
+            str(destination_dir / sample_jpg_file.name),
+            size,
+            "new file",
+        )
+    )
+    plan.add(
+        main.PlanEntry(
+            main.PlanAction.SKIP,
+            str(duplicate),
+            None,
+            size,
+            f"identical to source file {sample_jpg_file}",
+        )
+    )
+    plan_path = temp_dir / "plan.jsonl"
+    plan.save(plan_path)
+
+    with (
+        patch("main.setup_logging") as mock_setup_logging,
+        patch("main.copy_file", return_value=False),
+    ):
+        main.apply_plan(plan_file=str(plan_path), verbose=False)
+
+    warnings = [
+        call.args[0] for call in mock_setup_logging.return_value.warning.call_args_list
+    ]
+    assert any(str(duplicate) in warning for warning in warnings)
+
+
+def test_plan_item_reserves_renamed_files(temp_dir):
+    """Test that files planned with the rename strategy get distinct names."""
+    source_file = temp_dir / "IMG_0001.JPG"
+    source_file.write_bytes(b"fake jpg data")
+    destination_folder = temp_dir / "2023" / "May" / "15"
+    index = main.DestinationIndex()
+    log = main.logging.getLogger("test")
+
+    entries = [
+        main.plan_item(
+            main.ImportItem(source_file, destination_folder),
+            strategy=Strategy.RENAME,
+            comparison_mode=main.ComparisonMode.FULL,
+            force=False,
+            log=log,
+            index=index,
+        )
+        for _ in range(3)
+    ]
+
+    assert [(entry.action, Path(entry.destination).name) for entry in entries] == [
+        (main.PlanAction.COPY, "IMG_0001.JPG"),
+        (main.PlanAction.RENAME, "IMG_0001_02.JPG"),
+        (main.PlanAction.RENAME, "IMG_0001_03.JPG"),
+    ]
+    assert entries[0].bytes == len(b"fake jpg data")
+    # Nothing was created in the destination
+    assert not destination_folder.exists()
+
+
+@pytest.mark.parametrize(
+    "existing_data, action, reason",
+    [
+        (b"fake jpg data", main.PlanAction.SKIP, "identical file exists"),
+        (b"other data", main.PlanAction.SKIP, "different file exists"),
+    ],
+)
+def test_plan_item_onlynew(temp_dir, existing_data, action, reason):
+    """Test that existing files are compared when planning the onlynew strategy."""
+    source_file = temp_dir / "IMG_0001.JPG"
+    source_file.write_bytes(b"fake jpg data")
+    destination_folder = temp_dir / "destination"
+    destination_folder.mkdir()
+    (destination_folder / source_file.name).write_bytes(existing_data)
+
+    entry = main.plan_item(
+        main.ImportItem(source_file, destination_folder),
+        strategy=Strategy.ONLYNEW,
+        comparison_mode=main.ComparisonMode.FULL,
+        force=False,
+        log=main.logging.getLogger("test"),
+        index=main.DestinationIndex(),
+    )
+
+    assert (entry.action, entry.reason) == (action, reason)
+
+
+def test_apply_entry_skips_stale_entries(temp_dir, mock_logger):
+    """Test that entries outdated since the plan was made are not applied."""
+    source_file = temp_dir / "IMG_0001.JPG"
+    source_file.write_bytes(b"fake jpg data")
+    destination_file = temp_dir / "destination" / source_file.name
+    index = main.DestinationIndex()
+
+    # The source file changed since it was planned
+    changed = main.PlanEntry(
+        main.PlanAction.COPY, str(source_file), str(destination_file), 1, "new file"
+    )
+    assert main.apply_entry(changed, mock_logger, index) is False
+
+    # The destination file appeared since it was planned
+    entry = changed._replace(bytes=source_file.stat().st_size)
+    destination_file.parent.mkdir()
+    destination_file.write_bytes(b"other data")
+    assert main.apply_entry(entry, mock_logger, main.DestinationIndex()) is False
+    assert destination_file.read_bytes() == b"other data"
+
+    # Files planned to be replaced are replaced
+    replace = entry._replace(action=main.PlanAction.REPLACE)
+    assert main.apply_entry(replace, mock_logger, main.DestinationIndex()) is True
+    assert destination_file.read_bytes() == b"fake jpg data"
+
+
+def test_import_files_with_exif_processes(
+    source_dir, destination_dir, sample_jpg_with_exif
+):
+    """Test importing images with EXIF extraction on a process pool."""
+    with patch("main.setup_logging"):
+        main.import_files(
+            source=str(source_dir),
+            destination=str(destination_dir),
+            filetype=FileType.IMAGE,
+            strategy=Strategy.ONLYNEW,
+            verbose=False,
+            force=False,
+            workers=2,
+            exif_processes=2,
+        )
+
+    month_name = datetime(2023, 1, 15).strftime("%B")
+    assert (
+        destination_dir / "2023" / month_name / "15" / sample_jpg_with_exif.name
+    ).exists()
+
+
 def test_locale_handling():
     """Test locale handling with both success and failure cases."""
     # Test when locale setting succeeds
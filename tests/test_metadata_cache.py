@@ -0,0 +1,70 @@
+import os
+from datetime import datetime
+
+import pytest
+
+from utils import MetadataCache
+from utils.validation.date_source import DateSource
+
+
+@pytest.fixture
+def cache_path(temp_dir):
+    """Path of the cache database in a not yet existing folder."""
+    return temp_dir / ".import-media" / "metadata.sqlite"
+
+
+def test_put_and_get(cache_path, sample_jpg_file):
+    """Test that a stored date is returned for the unchanged file."""
+    stat = sample_jpg_file.stat()
+    date_taken = datetime(2023, 1, 15, 12, 30, 45)
+
+    with MetadataCache(cache_path) as cache:
+        assert cache.get(stat) is None
+        cache.put(stat, date_taken, DateSource.EXIF)
+        assert cache.get(stat) == (date_taken, DateSource.EXIF)
+
+
+def test_persists_between_runs(cache_path, sample_jpg_file):
+    """Test that the cache is persisted in the database file."""
+    stat = sample_jpg_file.stat()
+    date_taken = datetime(2023, 1, 15, 12, 30, 45)
+
+    with MetadataCache(cache_path) as cache:
+        cache.put(stat, date_taken, DateSource.MTIME)
+
+    with MetadataCache(cache_path) as cache:
+        assert cache.get(stat) == (date_taken, DateSource.MTIME)
+
+
+def test_modified_file_is_not_cached(cache_path, sample_jpg_file):
+    """Test that an entry is not returned once the file was modified."""
+    with MetadataCache(cache_path) as cache:
+        cache.put(sample_jpg_file.stat(), datetime(2023, 1, 15), DateSource.EXIF)
+        os.utime(sample_jpg_file, ns=(0, 1_000_000_000))
+        assert cache.get(sample_jpg_file.stat()) is None
+
+
+def test_evicts_least_recently_used(cache_path, source_dir):
+    """Test that the least recently used entries are evicted."""
+    files = []
+    for i in range(4):
+        file = source_dir / f"IMG_{i}.JPG"
+        file.write_bytes(b"fake jpg data")
+        files.append(file)
+
+    with MetadataCache(cache_path, max_entries=2) as cache:
+        for file in files:
+            cache.put(file.stat(), datetime(2023, 1, 15), DateSource.EXIF)
+        # Use the first entry again, so it is the most recently used one
+        assert cache.get(files[0].stat()) is not None
+
+    with MetadataCache(cache_path, max_entries=2) as cache:
+        cached = [cache.get(file.stat()) is not None for file in files]
+
+    assert cached == [True, False, False, True]
+
+
+def test_invalid_max_entries(cache_path):
+    """Test that a cache without room for entries is rejected."""
+    with pytest.raises(ValueError):
+        MetadataCache(cache_path, max_entries=0)
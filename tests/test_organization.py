@@ -4,7 +4,14 @@ from unittest.mock import patch
 
 import pytest
 
-from file_handling.organization import get_destination_folder
+from file_handling import DestinationIndex
+from file_handling.organization import (
+    build_destination_folder,
+    create_destination_folders,
+    get_destination_folder,
+    get_destination_folders,
+)
+from utils import MetadataCache
 from utils.validation.file_types import FileType
 
 
@@ -34,6 +41,20 @@ def test_get_destination_folder_with_exif(
     assert dest_folder.exists()
 
 
+def test_get_destination_folder_without_creating(
+    source_dir, destination_dir, mock_logger, mock_exif_date, sample_jpg_file
+):
+    """Test that the folder is only determined when planning an import."""
+    dest_folder, _ = get_destination_folder(
+        sample_jpg_file, destination_dir, FileType.IMAGE, mock_logger, create=False
+    )
+
+    assert dest_folder == build_destination_folder(
+        destination_dir, datetime(2023, 5, 15)
+    )
+    assert list(destination_dir.iterdir()) == []
+
+
 def test_get_video_destination_folder_without_exif(
     source_dir, destination_dir, mock_logger, sample_jpg_file
 ):
@@ -110,3 +131,215 @@ def test_get_destination_folder_creation_error(
         assert dest_folder is None
         assert file_date == datetime(2023, 5, 15, 12, 30, 45)
         mock_logger.error.assert_called_once()
+
+
+def test_get_destination_folders(
+    source_dir, destination_dir, mock_logger, sample_jpg_file
+):
+    """Test getting destination folders for a batch of images."""
+    other_file = source_dir / "other.jpg"
+    other_file.write_bytes(b"fake jpg data")
+    mod_time_datetime = datetime.fromtimestamp(os.path.getmtime(other_file))
+
+    with patch(
+        "file_handling.organization.ExifUtils.get_dates_taken",
+        return_value={str(sample_jpg_file): datetime(2023, 5, 15, 12, 30, 45)},
+    ) as mock_dates:
+        results = get_destination_folders(
+            [sample_jpg_file, other_file], destination_dir, FileType.IMAGE, mock_logger
+        )
+
+    mock_dates.assert_called_once()
+    assert results[0] == (
+        destination_dir / "2023" / datetime(2023, 5, 15).strftime("%B") / "15",
+        datetime(2023, 5, 15, 12, 30, 45),
+    )
+    # Files without EXIF date fall back to their modification date
+    assert results[1][1] == mod_time_datetime
+    assert results[1][0].exists()
+
+
+def test_get_destination_folders_video(
+    source_dir, destination_dir, mock_logger, sample_mp4_file
+):
+    """Test that no EXIF data is extracted for a batch of videos."""
+    with patch("file_handling.organization.ExifUtils.get_dates_taken") as mock_dates:
+        results = get_destination_folders(
+            [sample_mp4_file], destination_dir, FileType.VIDEO, mock_logger
+        )
+
+    mock_dates.assert_not_called()
+    assert results[0][1] == datetime.fromtimestamp(os.path.getmtime(sample_mp4_file))
+
+
+def test_get_destination_folder_video_metadata(
+    source_dir, destination_dir, mock_logger, sample_mp4_file
+):
+    """Test that the recording date of a video is used when available."""
+    with patch(
+        "file_handling.organization.VideoUtils.get_date_taken",
+        return_value=datetime(2022, 8, 1, 8, 0, 0),
+    ):
+        dest_folder, file_date = get_destination_folder(
+            sample_mp4_file, destination_dir, FileType.VIDEO, mock_logger
+        )
+
+    assert file_date == datetime(2022, 8, 1, 8, 0, 0)
+    assert dest_folder == (
+        destination_dir / "2022" / datetime(2022, 8, 1).strftime("%B") / "01"
+    )
+
+
+def test_get_destination_folder_with_cache(
+    temp_dir, destination_dir, mock_logger, mock_exif_date, sample_jpg_file
+):
+    """Test that cached dates are used without parsing the file again."""
+    with MetadataCache(temp_dir / "metadata.sqlite") as cache:
+        first = get_destination_folder(
+            sample_jpg_file, destination_dir, FileType.IMAGE, mock_logger, cache
+        )
+        second = get_destination_folder(
+            sample_jpg_file, destination_dir, FileType.IMAGE, mock_logger, cache
+        )
+
+    assert first == second
+    mock_exif_date.assert_called_once()
+
+
+def test_get_destination_folders_with_cache(
+    temp_dir, destination_dir, mock_logger, sample_jpg_file
+):
+    """Test that only uncached files of a batch are parsed."""
+    with (
+        MetadataCache(temp_dir / "metadata.sqlite") as cache,
+        patch(
+            "file_handling.organization.ExifUtils.get_dates_taken",
+            return_value={str(sample_jpg_file): datetime(2023, 5, 15, 12, 30, 45)},
+        ) as mock_dates,
+    ):
+        get_destination_folders(
+            [sample_jpg_file], destination_dir, FileType.IMAGE, mock_logger, cache=cache
+        )
+        results = get_destination_folders(
+            [sample_jpg_file], destination_dir, FileType.IMAGE, mock_logger, cache=cache
+        )
+
+    mock_dates.assert_called_once()
+    assert results[0][1] == datetime(2023, 5, 15, 12, 30, 45)
+
+
+def test_get_destination_folders_all(
+    source_dir, destination_dir, mock_logger, sample_jpg_file, sample_mp4_file
+):
+    """Test that a mixed batch routes images and videos to their resolvers."""
+    with (
+        patch(
+            "file_handling.organization.ExifUtils.get_dates_taken",
+            return_value={str(sample_jpg_file): datetime(2023, 5, 15, 12, 30, 45)},
+        ) as mock_dates,
+        patch(
+            "file_handling.organization.VideoUtils.get_date_taken",
+            return_value=datetime(2022, 8, 1, 8, 0, 0),
+        ) as mock_video_date,
+    ):
+        results = get_destination_folders(
+            [sample_jpg_file, sample_mp4_file],
+            destination_dir,
+            FileType.ALL,
+            mock_logger,
+        )
+
+    mock_dates.assert_called_once_with([str(sample_jpg_file)], None)
+    mock_video_date.assert_called_once_with(str(sample_mp4_file))
+    assert results[0][1] == datetime(2023, 5, 15, 12, 30, 45)
+    assert results[1][1] == datetime(2022, 8, 1, 8, 0, 0)
+
+
+def test_get_destination_folder_all_video(
+    source_dir, destination_dir, mock_logger, mock_exif_date, sample_mp4_file
+):
+    """Test that a single video of a mixed import uses the video metadata."""
+    with patch(
+        "file_handling.organization.VideoUtils.get_date_taken",
+        return_value=datetime(2022, 8, 1, 8, 0, 0),
+    ):
+        _, file_date = get_destination_folder(
+            sample_mp4_file, destination_dir, FileType.ALL, mock_logger
+        )
+
+    mock_exif_date.assert_not_called()
+    assert file_date == datetime(2022, 8, 1, 8, 0, 0)
+
+
+def test_get_destination_folders_creates_each_folder_once(
+    source_dir, destination_dir, mock_logger
+):
+    """Test that the folders of a batch are created once per distinct day."""
+    file_paths = []
+    for i in range(6):
+        file_path = source_dir / f"IMG_{i:04}.jpg"
+        file_path.write_bytes(b"fake jpg data")
+        file_paths.append(file_path)
+    dates = {
+        str(file_path): datetime(2023, 5, 15 + i % 2, 12, 0, 0)
+        for i, file_path in enumerate(file_paths)
+    }
+
+    with (
+        patch(
+            "file_handling.organization.ExifUtils.get_dates_taken",
+            return_value=dates,
+        ),
+        patch("pathlib.Path.mkdir") as mock_mkdir,
+    ):
+        results = get_destination_folders(
+            file_paths, destination_dir, FileType.IMAGE, mock_logger
+        )
+
+    assert mock_mkdir.call_count == 2
+    assert {folder for folder, _ in results} == {
+        build_destination_folder(destination_dir, datetime(2023, 5, 15)),
+        build_destination_folder(destination_dir, datetime(2023, 5, 16)),
+    }
+
+
+def test_get_destination_folders_creation_error(
+    destination_dir, mock_logger, sample_jpg_file
+):
+    """Test that files of a folder that cannot be created get no folder."""
+    with (
+        patch(
+            "file_handling.organization.ExifUtils.get_dates_taken",
+            return_value={str(sample_jpg_file): datetime(2023, 5, 15, 12, 30, 45)},
+        ),
+        patch("pathlib.Path.mkdir", side_effect=PermissionError("Permission denied")),
+    ):
+        results = get_destination_folders(
+            [sample_jpg_file], destination_dir, FileType.IMAGE, mock_logger
+        )
+
+    assert results == [(None, datetime(2023, 5, 15, 12, 30, 45))]
+    mock_logger.error.assert_called_once()
+
+
+def test_build_destination_folder(destination_dir):
+    """Test building the date folder without creating it."""
+    folder = build_destination_folder(destination_dir, datetime(2023, 5, 15, 23, 59))
+
+    assert folder == (
+        destination_dir / "2023" / datetime(2023, 5, 15).strftime("%B") / "15"
+    )
+    assert not folder.exists()
+
+
+def test_create_destination_folders_with_index(destination_dir, mock_logger):
+    """Test that folders known to the index are not created again."""
+    folder = destination_dir / "2023" / "May" / "15"
+    index = DestinationIndex()
+
+    assert create_destination_folders([folder, folder], mock_logger, index) == set()
+    assert folder.is_dir()
+
+    with patch("pathlib.Path.mkdir") as mock_mkdir:
+        create_destination_folders([folder], mock_logger, index)
+    mock_mkdir.assert_not_called()
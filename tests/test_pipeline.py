@@ -0,0 +1,118 @@
+import random
+import time
+
+import pytest
+
+from utils import Stage, StagedPipeline
+
+
+def test_pipeline_preserves_order():
+    """Test that results are yielded in input order with multiple workers."""
+
+    def slow_square(x):
+        time.sleep(random.uniform(0, 0.005))
+        return x * x
+
+    pipeline = StagedPipeline(
+        [
+            Stage("increment", lambda x: x + 1, workers=3),
+            Stage("square", slow_square, workers=4),
+        ],
+        queue_size=8,
+    )
+
+    assert list(pipeline.run(range(50))) == [(x + 1) ** 2 for x in range(50)]
+
+
+def test_pipeline_empty_input():
+    """Test running the pipeline without any input items."""
+    pipeline = StagedPipeline([Stage("identity", lambda x: x, workers=2)])
+    assert list(pipeline.run([])) == []
+
+
+def test_pipeline_bounds_items_in_flight():
+    """Test that the input is not consumed further ahead than the queue size."""
+    consumed = []
+
+    def items():
+        for i in range(100):
+            consumed.append(i)
+            yield i
+
+    pipeline = StagedPipeline([Stage("identity", lambda x: x, workers=2)], 4)
+    results = pipeline.run(items())
+    assert next(results) == 0
+
+    time.sleep(0.05)
+    # One item has been yielded, so at most queue_size + 1 items were taken
+    assert len(consumed) <= 4 + 2
+    results.close()
+
+
+def test_pipeline_stage_exception():
+    """Test that an exception in a stage is raised to the consumer."""
+
+    def fail_on_three(x):
+        if x == 3:
+            raise ValueError("three")
+        return x
+
+    pipeline = StagedPipeline([Stage("check", fail_on_three, workers=2)], 4)
+    results = []
+    with pytest.raises(ValueError, match="three"):
+        for result in pipeline.run(range(10)):
+            results.append(result)
+
+    assert results == [0, 1, 2]
+
+
+def test_pipeline_input_exception():
+    """Test that an exception in the input iterable is raised in order."""
+
+    def items():
+        yield 1
+        yield 2
+        raise OSError("card removed")
+
+    pipeline = StagedPipeline([Stage("identity", lambda x: x)])
+    results = []
+    with pytest.raises(OSError, match="card removed"):
+        for result in pipeline.run(items()):
+            results.append(result)
+
+    assert results == [1, 2]
+
+
+@pytest.mark.parametrize("stages,queue_size", [([], 1), ([Stage("a", str)], 0)])
+def test_pipeline_invalid_arguments(stages, queue_size):
+    """Test that invalid pipeline arguments are rejected."""
+    with pytest.raises(ValueError):
+        StagedPipeline(stages, queue_size)
+
+
+def test_pipeline_batch_stage():
+    """Test that a batch stage receives lists of items."""
+    batches = []
+
+    def double_batch(items):
+        batches.append(len(items))
+        return [item * 2 for item in items]
+
+    pipeline = StagedPipeline(
+        [Stage("double", double_batch, workers=2, batch_size=5)], queue_size=16
+    )
+
+    assert list(pipeline.run(range(40))) == [x * 2 for x in range(40)]
+    assert sum(batches) == 40
+    assert max(batches) <= 5
+
+
+def test_pipeline_batch_stage_exception():
+    """Test that a failing batch fails all of its items."""
+
+    def fail(items):
+        raise RuntimeError("batch failed")
+
+    pipeline = StagedPipeline([Stage("fail", fail, batch_size=4)])
+    with pytest.raises(RuntimeError, match="batch failed"):
+        list(pipeline.run(range(3)))
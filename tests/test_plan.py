@@ -0,0 +1,55 @@
+import pytest
+
+from utils import ImportPlan, PlanEntry
+from utils.validation import PlanAction
+
+
+@pytest.fixture
+def plan(destination_dir):
+    """Create a plan with an entry for each action."""
+    return ImportPlan(
+        destination_dir,
+        [
+            PlanEntry(PlanAction.COPY, "/src/a.jpg", "/dst/a.jpg", 100, "new file"),
+            PlanEntry(PlanAction.RENAME, "/src/b.jpg", "/dst/b_02.jpg", 20, "taken"),
+            PlanEntry(PlanAction.SKIP, "/src/c.jpg", None, 5, "identical"),
+        ],
+    )
+
+
+def test_totals(plan):
+    """Test that the totals count the files per action and the bytes to copy."""
+    assert plan.totals() == {
+        "files": 3,
+        "copy": 1,
+        "replace": 0,
+        "rename": 1,
+        "skip": 1,
+        "bytes_to_copy": 120,
+    }
+
+
+def test_save_and_load(plan, temp_dir):
+    """Test that a saved plan is loaded unchanged."""
+    path = temp_dir / "plan.jsonl"
+    plan.save(path)
+
+    loaded = ImportPlan.load(path)
+
+    assert loaded.destination == plan.destination
+    assert loaded.entries == plan.entries
+    assert loaded.entries[0].action is PlanAction.COPY
+    # One header line and one line per entry
+    assert len(path.read_text().splitlines()) == 4
+
+
+@pytest.mark.parametrize(
+    "content", ["not json\n", '{"version": 99, "destination": "/dst"}\n', "[]\n"]
+)
+def test_load_invalid_file(temp_dir, content):
+    """Test that files that are not plans of this version are rejected."""
+    path = temp_dir / "plan.jsonl"
+    path.write_text(content)
+
+    with pytest.raises(ValueError):
+        ImportPlan.load(path)
@@ -0,0 +1,84 @@
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from rich.console import Console
+
+from utils import ImportProgress
+from utils.pipeline.pipeline import Stage
+
+
+@pytest.fixture
+def progress():
+    """A progress display writing to a string instead of the terminal."""
+    with ImportProgress(Console(file=io.StringIO())) as progress:
+        yield progress
+
+
+def total(progress):
+    return progress._bytes.tasks[progress._total]
+
+
+def test_discover(progress, sample_jpg_file, sample_mp4_file):
+    """Test that discovered files are added to the totals unchanged."""
+    files = [sample_jpg_file, sample_mp4_file]
+
+    assert list(progress.discover(files)) == files
+    assert total(progress).total == (
+        sample_jpg_file.stat().st_size + sample_mp4_file.stat().st_size
+    )
+    assert progress._expected_files == 2
+
+
+def test_advance_per_worker(progress, sample_jpg_file):
+    """Test that bytes are counted in the total and in the row of each worker."""
+    size = sample_jpg_file.stat().st_size
+    progress.expect(2 * size)
+
+    started = threading.Barrier(2)
+
+    def copy(_):
+        with progress.file(sample_jpg_file):
+            started.wait()
+            progress.advance(size)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        list(executor.map(copy, range(2)))
+
+    assert total(progress).completed == 2 * size
+    workers = progress._bytes.tasks[1:]
+    assert [worker.completed for worker in workers] == [size, size]
+    assert all(worker.description.endswith("idle") for worker in workers)
+
+
+def test_skipped_file_is_taken_off_total(progress, sample_jpg_file):
+    """Test that the bytes of a file that was not copied leave the total."""
+    size = sample_jpg_file.stat().st_size
+    list(progress.discover([sample_jpg_file, sample_jpg_file]))
+
+    with progress.file(sample_jpg_file):
+        progress.advance(size)
+    with progress.file(sample_jpg_file):
+        pass
+
+    assert total(progress).total == size
+    assert total(progress).completed == size
+
+
+@pytest.mark.parametrize("batch_size", [1, 2])
+def test_track_stage(progress, sample_jpg_file, batch_size):
+    """Test that a stage counts the files it processed, batched or not."""
+    stage = progress.track_stage(
+        Stage("double", lambda item: item * 2, batch_size=batch_size), "Doubling"
+    )
+    list(progress.discover([sample_jpg_file] * 4))
+
+    item = [1, 2] if batch_size > 1 else 1
+    assert stage.func(item) == item * 2
+    assert stage.batch_size == batch_size
+
+    row = progress._files.tasks[0]
+    assert row.description == "Doubling"
+    assert row.total == 4
+    assert row.completed == (2 if batch_size > 1 else 1)
@@ -2,12 +2,14 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
+from file_handling import DestinationIndex
 from import_strategies.handlers import (
     copy_file,
     handle_onlynew_strategy,
     handle_rename_strategy,
     handle_replace_strategy,
 )
+from utils import HashingUtils
 from utils.validation.comparison_mode import ComparisonMode
 
 
@@ -26,7 +28,10 @@ def test_copy_file_failure(source_dir, destination_dir, mock_logger, sample_jpg_
     """Test handling of file copy failure."""
     dest_file = destination_dir / sample_jpg_file.name
 
-    with patch("shutil.copy2", side_effect=PermissionError("Permission denied")):
+    with patch(
+        "import_strategies.handlers.FileCopier.copy_fast",
+        side_effect=PermissionError("Permission denied"),
+    ):
         result = copy_file(sample_jpg_file, dest_file, mock_logger)
 
         assert result is False
@@ -256,3 +261,136 @@ def test_handle_onlynew_strategy_exception(
     ):
         with pytest.raises(Exception):
             handle_onlynew_strategy(sample_jpg_file, dest_file, False, mock_logger)
+
+
+def test_copy_file_records_catalog(destination_dir, mock_logger, sample_jpg_file):
+    """Test that copied files are recorded in the catalog."""
+    dest_file = destination_dir / sample_jpg_file.name
+    catalog = MagicMock()
+
+    assert copy_file(sample_jpg_file, dest_file, mock_logger, catalog) is True
+
+    catalog.record.assert_called_once()
+    assert catalog.record.call_args.args[0] == dest_file
+
+
+def test_handle_onlynew_strategy_with_catalog(
+    destination_dir, mock_logger, sample_jpg_file
+):
+    """Test that the catalog is used for comparisons if given."""
+    dest_file = destination_dir / sample_jpg_file.name
+    copy_file(sample_jpg_file, dest_file, MagicMock())
+    catalog = MagicMock()
+    catalog.compare.return_value = True
+
+    with patch("import_strategies.handlers.HashingUtils.compare_hashes") as compare:
+        result = handle_onlynew_strategy(
+            sample_jpg_file,
+            dest_file,
+            ComparisonMode.FULL,
+            False,
+            mock_logger,
+            catalog,
+        )
+
+    assert result is False
+    compare.assert_not_called()
+    catalog.compare.assert_called_once()
+
+
+def test_copy_file_with_copier_records_hash(
+    destination_dir, mock_logger, sample_jpg_file
+):
+    """Test that the hash calculated while copying is cataloged."""
+    dest_file = destination_dir / sample_jpg_file.name
+    catalog = MagicMock()
+
+    assert copy_file(sample_jpg_file, dest_file, mock_logger, catalog) is True
+
+    assert catalog.record.call_args.kwargs["digest"] == HashingUtils.get_digest(
+        str(sample_jpg_file)
+    )
+
+
+def test_copy_file_verification_failure(destination_dir, mock_logger, sample_jpg_file):
+    """Test that a failed verification is reported as a failed copy."""
+    dest_file = destination_dir / sample_jpg_file.name
+    copier = MagicMock()
+    copier.copy.side_effect = IOError("Verification failed")
+
+    assert copy_file(sample_jpg_file, dest_file, mock_logger, copier=copier) is False
+    mock_logger.error.assert_called_once()
+
+
+def test_handle_rename_strategy_with_index(
+    destination_dir, mock_logger, sample_jpg_file
+):
+    """Test that the rename strategy finds the free name in the index."""
+    existing_file = destination_dir / sample_jpg_file.name
+    copy_file(sample_jpg_file, existing_file, MagicMock())
+    index = DestinationIndex()
+
+    with patch("pathlib.Path.exists") as mock_exists:
+        result = handle_rename_strategy(
+            sample_jpg_file, destination_dir, mock_logger, index=index
+        )
+
+    assert result is True
+    mock_exists.assert_not_called()
+    renamed_file = (
+        destination_dir / f"{sample_jpg_file.stem}_02{sample_jpg_file.suffix}"
+    )
+    assert renamed_file.exists()
+    assert index.exists(renamed_file)
+
+
+def test_handle_rename_strategy_with_index_copy_failure(
+    destination_dir, mock_logger, sample_jpg_file
+):
+    """Test that the reserved name is released if the copy fails."""
+    index = DestinationIndex()
+
+    with patch(
+        "import_strategies.handlers.FileCopier.copy_fast",
+        side_effect=IOError("Copy failed"),
+    ):
+        result = handle_rename_strategy(
+            sample_jpg_file, destination_dir, mock_logger, index=index
+        )
+
+    assert result is False
+    assert not index.exists(
+        destination_dir / f"{sample_jpg_file.stem}_02{sample_jpg_file.suffix}"
+    )
+
+
+def test_copy_file_records_journal(destination_dir, mock_logger, sample_jpg_file):
+    """Test that copies are journaled before they start and once complete."""
+    dest_file = destination_dir / sample_jpg_file.name
+    journal = MagicMock()
+
+    assert copy_file(sample_jpg_file, dest_file, mock_logger, journal=journal) is True
+
+    journal.start.assert_called_once_with(sample_jpg_file, dest_file)
+    journal.complete.assert_called_once_with(
+        sample_jpg_file, dest_file, HashingUtils.get_digest(str(sample_jpg_file))
+    )
+
+
+def test_copy_file_failure_stays_in_progress(
+    destination_dir, mock_logger, sample_jpg_file
+):
+    """Test that a failed copy is not journaled as complete."""
+    dest_file = destination_dir / sample_jpg_file.name
+    copier = MagicMock()
+    copier.copy.side_effect = IOError("Device disconnected")
+    journal = MagicMock()
+
+    assert (
+        copy_file(
+            sample_jpg_file, dest_file, mock_logger, copier=copier, journal=journal
+        )
+        is False
+    )
+    journal.start.assert_called_once()
+    journal.complete.assert_not_called()
@@ -0,0 +1,116 @@
+import logging
+import struct
+from datetime import datetime, timezone
+
+import pytest
+
+from utils import VideoUtils
+
+QUICKTIME_EPOCH = datetime(1904, 1, 1, tzinfo=timezone.utc)
+
+
+def _box(box_type: bytes, payload: bytes, largesize: bool = False) -> bytes:
+    """Build an ISO base media box."""
+    if largesize:
+        return struct.pack(">I4sQ", 1, box_type, len(payload) + 16) + payload
+    return struct.pack(">I4s", len(payload) + 8, box_type) + payload
+
+
+def _mvhd(date: datetime, version: int = 0) -> bytes:
+    """Build a movie header atom with the given creation time."""
+    seconds = int((date - QUICKTIME_EPOCH).total_seconds()) if date else 0
+    if version == 1:
+        payload = struct.pack(">B3xQQIQ", 1, seconds, seconds, 1000, 0)
+    else:
+        payload = struct.pack(">B3xIIII", 0, seconds, seconds, 1000, 0)
+    return _box(b"mvhd", payload + b"\x00" * 80)
+
+
+def _write_video(path, moov: bytes, moov_at_end: bool = True, first: bytes = b"ftyp"):
+    """Write a video file with an mdat atom before or after the moov atom."""
+    first_atom = _box(first, b"mp42\x00\x00\x00\x00mp42isom")
+    mdat = _box(b"mdat", b"\x00" * 65536, largesize=True)
+    atoms = [first_atom, mdat, moov] if moov_at_end else [first_atom, moov, mdat]
+    path.write_bytes(b"".join(atoms))
+    return path
+
+
+@pytest.mark.parametrize("version", [0, 1])
+@pytest.mark.parametrize("moov_at_end", [True, False])
+def test_get_date_taken_from_mvhd(temp_dir, version, moov_at_end):
+    """Test reading the creation time of the movie header."""
+    date = datetime(2023, 5, 15, 10, 30, 45, tzinfo=timezone.utc)
+    video = _write_video(
+        temp_dir / "clip.mp4", _box(b"moov", _mvhd(date, version)), moov_at_end
+    )
+
+    date_taken = VideoUtils.get_date_taken(str(video))
+
+    assert date_taken == date.astimezone().replace(tzinfo=None)
+
+
+@pytest.mark.parametrize("first", [b"wide", b"free", b"skip"])
+def test_get_date_taken_quicktime_without_ftyp(temp_dir, first):
+    """Test reading classic QuickTime files, which do not start with ftyp."""
+    date = datetime(2023, 5, 15, 10, 30, 45, tzinfo=timezone.utc)
+    video = _write_video(temp_dir / "clip.mov", _box(b"moov", _mvhd(date)), first=first)
+
+    date_taken = VideoUtils.get_date_taken(str(video))
+
+    assert date_taken == date.astimezone().replace(tzinfo=None)
+
+
+def test_get_date_taken_starting_with_mdat(temp_dir):
+    """Test reading a QuickTime file whose first atom is the media data."""
+    date = datetime(2023, 5, 15, 10, 30, 45, tzinfo=timezone.utc)
+    mdat = _box(b"mdat", b"\x00" * 1024)
+    video = temp_dir / "clip.mov"
+    video.write_bytes(mdat + _box(b"moov", _mvhd(date)))
+
+    assert VideoUtils.get_date_taken(str(video)) == (
+        date.astimezone().replace(tzinfo=None)
+    )
+
+
+def test_get_date_taken_prefers_quicktime_day(temp_dir):
+    """Test that the vendor date of the user data atom is preferred."""
+    day = b"2023-05-15T12:30:45+02:00"
+    udta = _box(b"udta", _box(b"\xa9day", struct.pack(">HH", len(day), 0) + day))
+    moov = _box(b"moov", _mvhd(datetime(2020, 1, 1, tzinfo=timezone.utc)) + udta)
+    video = _write_video(temp_dir / "clip.mov", moov)
+
+    date_taken = VideoUtils.get_date_taken(str(video))
+
+    expected = datetime.fromisoformat(day.decode()).astimezone().replace(tzinfo=None)
+    assert date_taken == expected
+
+
+def test_get_date_taken_from_itunes_metadata(temp_dir):
+    """Test reading the date from iTunes style metadata."""
+    data = _box(b"data", struct.pack(">II", 1, 0) + b"2022-08-01T08:00:00")
+    ilst = _box(b"ilst", _box(b"\xa9day", data))
+    udta = _box(b"udta", _box(b"meta", b"\x00\x00\x00\x00" + ilst))
+    video = _write_video(temp_dir / "clip.mp4", _box(b"moov", udta))
+
+    assert VideoUtils.get_date_taken(str(video)) == datetime(2022, 8, 1, 8, 0, 0)
+
+
+def test_get_date_taken_zero_creation_time(temp_dir):
+    """Test that an unset creation time is ignored."""
+    video = _write_video(temp_dir / "clip.mp4", _box(b"moov", _mvhd(None)))
+
+    assert VideoUtils.get_date_taken(str(video)) is None
+
+
+def test_get_date_taken_without_moov(sample_mp4_file):
+    """Test reading a video without movie atom."""
+    assert VideoUtils.get_date_taken(str(sample_mp4_file)) is None
+
+
+def test_get_date_taken_invalid_file(sample_jpg_file, caplog):
+    """Test reading a file that is not a video, which is only logged for debugging."""
+    with caplog.at_level(logging.DEBUG):
+        assert VideoUtils.get_date_taken(str(sample_jpg_file)) is None
+
+    assert caplog.records
+    assert all(record.levelno == logging.DEBUG for record in caplog.records)
@@ -1,23 +1,51 @@
+from utils.cache.metadata_cache import MetadataCache
+from utils.catalog.catalog import CatalogEntry, DestinationCatalog
+from utils.copying.copying import FileCopier
 from utils.exif.exif import ExifUtils
 from utils.hashing.hashing import HashingUtils
+from utils.hashing.tree_hash import TreeHasher
+from utils.journal.journal import ImportJournal, JournalEntry
 from utils.logs.logging_utils import LoggingUtils
+from utils.pipeline.pipeline import Stage, StagedPipeline
+from utils.plan.plan import ImportPlan, PlanEntry
+from utils.progress.progress import ImportProgress
 from utils.validation.file_types import FileType
 from utils.validation.validators import validate_directories
+from utils.video.video import VideoUtils
 
 # Create convenience functions that map to class methods
 get_hash = HashingUtils.get_hash
 compare_hashes = HashingUtils.compare_hashes
+get_partial_hash = HashingUtils.get_partial_hash
+get_tree_hash = HashingUtils.get_tree_hash
 get_date_taken = ExifUtils.get_date_taken
+get_video_date_taken = VideoUtils.get_date_taken
 get_base_logger = LoggingUtils.get_base_logger
 
 __all__ = [
     "get_base_logger",
     "get_date_taken",
+    "get_video_date_taken",
     "compare_hashes",
     "get_hash",
+    "get_partial_hash",
+    "get_tree_hash",
     "validate_directories",
     "HashingUtils",
+    "TreeHasher",
     "ExifUtils",
+    "CatalogEntry",
+    "DestinationCatalog",
+    "FileCopier",
+    "ImportJournal",
+    "JournalEntry",
     "LoggingUtils",
+    "MetadataCache",
+    "ImportPlan",
+    "PlanEntry",
+    "ImportProgress",
+    "VideoUtils",
+    "Stage",
+    "StagedPipeline",
     "FileType",
 ]
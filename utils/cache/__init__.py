@@ -0,0 +1,3 @@
+from utils.cache.metadata_cache import MetadataCache
+
+__all__ = ["MetadataCache"]
@@ -0,0 +1,163 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from utils.validation.date_source import DateSource
+
+
+class MetadataCache:
+    """
+    A persistent cache of resolved capture dates, stored in an SQLite database.
+
+    Entries are keyed by the device, inode, size and modification time of a
+    source file, so an entry stays valid as long as the file is unchanged and
+    is never returned for a different or modified file. Once the cache holds
+    more than `max_entries` entries, the least recently used ones are evicted.
+
+    The cache can be shared by multiple threads.
+
+    Example:
+        with MetadataCache(Path('destination/.import-media/metadata.sqlite')) as cache:
+            stat = os.stat('path/to/image.jpg')
+            cached = cache.get(stat)
+            if cached is None:
+                cache.put(stat, date_taken, DateSource.EXIF)
+    """
+
+    # Commit pending writes after this many new entries
+    COMMIT_INTERVAL = 256
+
+    def __init__(self, path: Path, max_entries: int = 200_000):
+        if max_entries < 1:
+            raise ValueError("The cache must hold at least one entry")
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        # This is a cache: losing the last writes on a crash is acceptable
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=OFF")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS metadata (
+                st_dev INTEGER NOT NULL,
+                st_ino INTEGER NOT NULL,
+                st_size INTEGER NOT NULL,
+                st_mtime_ns INTEGER NOT NULL,
+                date_taken TEXT NOT NULL,
+                source TEXT NOT NULL,
+                last_used INTEGER NOT NULL,
+                PRIMARY KEY (st_dev, st_ino, st_size, st_mtime_ns)
+            )
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS metadata_last_used ON metadata (last_used)"
+        )
+        self._connection.commit()
+        (self._clock,) = self._connection.execute(
+            "SELECT COALESCE(MAX(last_used), 0) FROM metadata"
+        ).fetchone()
+
+    def get(self, stat: os.stat_result) -> Optional[tuple[datetime, DateSource]]:
+        """
+        Get the cached capture date of a file.
+
+        Args:
+            stat: The result of `os.stat` for the file
+
+        Returns:
+            A tuple of the capture date and where it was read from, or None if
+            the file is not cached or has changed since
+        """
+        key = MetadataCache._key(stat)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT date_taken, source FROM metadata WHERE st_dev = ? AND "
+                "st_ino = ? AND st_size = ? AND st_mtime_ns = ?",
+                key,
+            ).fetchone()
+            if row is None:
+                return None
+            self._clock += 1
+            self._connection.execute(
+                "UPDATE metadata SET last_used = ? WHERE st_dev = ? AND "
+                "st_ino = ? AND st_size = ? AND st_mtime_ns = ?",
+                (self._clock, *key),
+            )
+            self._written()
+
+        return datetime.fromisoformat(row[0]), DateSource(row[1])
+
+    def put(self, stat: os.stat_result, date_taken: datetime, source: DateSource):
+        """
+        Store the capture date of a file.
+
+        Args:
+            stat: The result of `os.stat` for the file
+            date_taken: The resolved capture date
+            source: Where the capture date was read from
+        """
+        with self._lock:
+            self._clock += 1
+            self._connection.execute(
+                "INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    *MetadataCache._key(stat),
+                    date_taken.isoformat(),
+                    source.value,
+                    self._clock,
+                ),
+            )
+            self._written()
+
+    def close(self):
+        """Evict the least recently used entries and close the database."""
+        with self._lock:
+            self._evict()
+            self._connection.commit()
+            self._connection.close()
+
+    def __enter__(self) -> "MetadataCache":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _written(self):
+        """Commit and evict regularly, without paying for it on every write."""
+        self._pending += 1
+        if self._pending >= MetadataCache.COMMIT_INTERVAL:
+            self._evict()
+            self._connection.commit()
+            self._pending = 0
+
+    def _evict(self):
+        """Delete the least recently used entries exceeding the size limit."""
+        self._connection.execute(
+            "DELETE FROM metadata WHERE last_used <= ("
+            "SELECT last_used FROM metadata ORDER BY last_used DESC "
+            "LIMIT 1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    @staticmethod
+    def _key(stat: os.stat_result) -> tuple[int, int, int, int]:
+        # Some file systems use unsigned 64 bit inode and device numbers,
+        # which have to be mapped into the signed range of SQLite integers
+        return (
+            MetadataCache._signed(stat.st_dev),
+            MetadataCache._signed(stat.st_ino),
+            stat.st_size,
+            stat.st_mtime_ns,
+        )
+
+    @staticmethod
+    def _signed(value: int) -> int:
+        return value - 2**64 if value >= 2**63 else value
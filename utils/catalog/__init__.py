@@ -0,0 +1,3 @@
+from utils.catalog.catalog import CatalogEntry, DestinationCatalog
+
+__all__ = ["CatalogEntry", "DestinationCatalog"]
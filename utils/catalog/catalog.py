@@ -0,0 +1,416 @@
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, NamedTuple, Optional
+
+from utils.hashing.hashing import HashingUtils
+from utils.validation.comparison_mode import ComparisonMode
+from utils.validation.hash_algorithm import HashAlgorithm
+
+
+class CatalogEntry(NamedTuple):
+    """The recorded state and signatures of a file in the destination."""
+
+    path: str
+    size: int
+    mtime_ns: int
+    partial_hash: Optional[str]
+    digest: Optional[str]
+
+
+class DestinationCatalog:
+    """
+    A persistent catalog of the files in the destination, stored in SQLite.
+
+    For every file the importer writes, the catalog records its size,
+    modification time, partial signature and digest. As long as the size
+    and modification time of a destination file still match its entry, the
+    recorded signatures are trusted, so comparisons against it do not have to
+    read the file again. Missing signatures are calculated once and recorded.
+
+    Paths are stored relative to the destination root, so the catalog stays
+    valid when the destination is mounted somewhere else.
+
+    Partial signatures and digests are tagged with how they were calculated
+    (e.g. `sha256:<hex>`, `blake2b:<hex>` or `sha256-tree:<hex>`, see
+    `HashingUtils.get_digest`). A recorded signature of another kind than the
+    one the catalog is configured for is calculated again when it is needed.
+
+    The files are indexed by size, so a file with the same content as an
+    incoming file can be looked up anywhere in the destination: only files of
+    the same size are candidates, and their signatures are only calculated
+    when there are any.
+
+    The catalog can be shared by multiple threads.
+
+    Example:
+        with DestinationCatalog(db_path, destination) as catalog:
+            identical = catalog.compare(source, existing, ComparisonMode.FULL)
+            duplicate = catalog.find_duplicate(source, ComparisonMode.FULL)
+    """
+
+    # Commit pending writes after this many changes
+    COMMIT_INTERVAL = 64
+
+    def __init__(
+        self,
+        path: Path,
+        root: Path,
+        tree_hash: bool = False,
+        algorithm: HashAlgorithm = HashAlgorithm.SHA256,
+    ):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.root = root
+        self.tree_hash = tree_hash
+        self.algorithm = algorithm
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                partial_hash TEXT,
+                digest TEXT
+            )
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS files_size ON files (size)"
+        )
+        self._connection.commit()
+
+    def lookup(self, file: Path) -> Optional[CatalogEntry]:
+        """
+        Get the entry of a destination file, if it is still up to date.
+
+        Args:
+            file: The destination file
+
+        Returns:
+            The catalog entry, or None if the file is not cataloged or its size
+            or modification time changed since it was recorded
+        """
+        stat = file.stat()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT * FROM files WHERE path = ?", (self._relative(file),)
+            ).fetchone()
+        if row is None:
+            return None
+
+        entry = CatalogEntry(*row)
+        if entry.size != stat.st_size or entry.mtime_ns != stat.st_mtime_ns:
+            return None
+        return entry
+
+    def record(
+        self,
+        file: Path,
+        partial_hash: Optional[str] = None,
+        digest: Optional[str] = None,
+    ) -> CatalogEntry:
+        """
+        Record the current state of a destination file.
+
+        Signatures that are not passed are kept from the existing entry, as
+        long as the file has not changed since.
+
+        Args:
+            file: The destination file
+            partial_hash: The tagged partial signature, see `partial_signature`
+            digest: The tagged digest of the whole file, see `HashingUtils.get_digest`
+
+        Returns:
+            The recorded entry
+        """
+        stat = file.stat()
+        path = self._relative(file)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT * FROM files WHERE path = ?", (path,)
+            ).fetchone()
+            if row is not None:
+                existing = CatalogEntry(*row)
+                if (existing.size, existing.mtime_ns) == (
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                ):
+                    partial_hash = partial_hash or existing.partial_hash
+                    digest = digest or existing.digest
+
+            entry = CatalogEntry(
+                path, stat.st_size, stat.st_mtime_ns, partial_hash, digest
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)", entry
+            )
+            self._written()
+        return entry
+
+    def compare(
+        self,
+        file: Path,
+        destination_file: Path,
+        comparison_mode: ComparisonMode,
+        buffer_size: int = 1024 * 1024,
+        certain: bool = False,
+    ) -> bool:
+        """
+        Compare a source file with a destination file using the catalog.
+
+        Works like `HashingUtils.compare_hashes`, but the signature of the
+        destination file is taken from the catalog if it is up to date. Only
+        if it is not, the destination file is read and its signature recorded.
+        Sampled comparisons have no stored signature and read both files.
+        Full comparisons with CRC32 digests confirm matching digests by
+        comparing the files completely.
+
+        Args:
+            file: The source file
+            destination_file: The destination file
+            comparison_mode: The mode to use for comparison (PARTIAL, SAMPLED or FULL)
+            buffer_size: The buffer size for full hashing. Defaults to 1 MiB.
+            certain: Confirm matching samples with a full comparison (SAMPLED only)
+
+        Returns:
+            bool: True if the files are considered identical, False otherwise.
+
+        Raises:
+            FileNotFoundError: If either file does not exist.
+            IOError: If either file cannot be read.
+        """
+        # The sizes are always compared first, it only takes two stat calls
+        if os.path.getsize(file) != os.path.getsize(destination_file):
+            return False
+
+        entry = self.lookup(destination_file)
+
+        match comparison_mode:
+            case ComparisonMode.PARTIAL:
+                if entry is None or not self._has_partial_signature(entry):
+                    entry = self.record(
+                        destination_file,
+                        partial_hash=self.partial_signature(destination_file),
+                    )
+                return self.partial_signature(file) == entry.partial_hash
+            case ComparisonMode.SAMPLED:
+                return HashingUtils.compare_hashes(
+                    str(file),
+                    str(destination_file),
+                    comparison_mode,
+                    buffer_size,
+                    certain=certain,
+                )
+            case ComparisonMode.FULL:
+                if entry is None or not self._has_digest(entry):
+                    entry = self.record(
+                        destination_file,
+                        digest=self._get_digest(destination_file, buffer_size),
+                    )
+                if self._get_digest(file, buffer_size) != entry.digest:
+                    return False
+                return self._confirm(file, destination_file, buffer_size)
+
+    def refresh(self, files: Iterable[Path]) -> int:
+        """
+        Bring the catalog in line with the files currently in the destination.
+
+        New and changed files are recorded without signatures, those are only
+        calculated once a file of the same size is imported. Entries of files
+        that no longer exist are removed. Unchanged files keep their entries,
+        so a refresh only costs a stat call per file.
+
+        Args:
+            files: All files in the destination that should be cataloged
+
+        Returns:
+            The number of files in the catalog
+        """
+        with self._lock:
+            known = {
+                path: (size, mtime_ns)
+                for path, size, mtime_ns in self._connection.execute(
+                    "SELECT path, size, mtime_ns FROM files"
+                )
+            }
+
+        seen = set()
+        for file in files:
+            try:
+                stat = file.stat()
+            except FileNotFoundError:
+                continue
+            path = self._relative(file)
+            seen.add(path)
+            if known.get(path) != (stat.st_size, stat.st_mtime_ns):
+                with self._lock:
+                    self._connection.execute(
+                        "INSERT OR REPLACE INTO files VALUES (?, ?, ?, NULL, NULL)",
+                        (path, stat.st_size, stat.st_mtime_ns),
+                    )
+                    self._written()
+
+        with self._lock:
+            self._connection.executemany(
+                "DELETE FROM files WHERE path = ?",
+                [(path,) for path in known.keys() - seen],
+            )
+            self._connection.commit()
+            self._pending = 0
+        return len(seen)
+
+    def find_duplicate(
+        self,
+        file: Path,
+        comparison_mode: ComparisonMode,
+        buffer_size: int = 1024 * 1024,
+        certain: bool = False,
+    ) -> Optional[Path]:
+        """
+        Find a destination file with the same content as a source file.
+
+        The candidates are looked up by size first, so for a file without
+        any file of the same size in the destination, nothing has to be read.
+        The candidates are then narrowed down by their partial signature, and
+        with ComparisonMode.FULL by their digest. With
+        ComparisonMode.SAMPLED, the remaining candidates are compared with the
+        file by sampling. Missing signatures of candidates are calculated and
+        recorded. Candidates with a matching CRC32 digest are confirmed by
+        comparing them completely.
+
+        Args:
+            file: The source file
+            comparison_mode: The mode to use for comparison (PARTIAL, SAMPLED or FULL)
+            buffer_size: The buffer size for full hashing. Defaults to 1 MiB.
+            certain: Confirm matching samples with a full comparison (SAMPLED only)
+
+        Returns:
+            The path of an identical destination file, or None if there is none.
+        """
+        size = os.path.getsize(file)
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT * FROM files WHERE size = ?", (size,)
+            ).fetchall()
+        if not rows:
+            return None
+
+        partial_hash = self.partial_signature(file)
+        digest = None
+        for row in rows:
+            candidate = self.root.joinpath(*row[0].split("/"))
+            try:
+                entry = self.lookup(candidate)
+                if entry is None:
+                    # The file changed since it was recorded
+                    entry = self.record(candidate)
+                if entry.size != size:
+                    continue
+                if not self._has_partial_signature(entry):
+                    entry = self.record(
+                        candidate, partial_hash=self.partial_signature(candidate)
+                    )
+            except FileNotFoundError:
+                self._forget(row[0])
+                continue
+            if entry.partial_hash != partial_hash:
+                continue
+
+            if comparison_mode == ComparisonMode.PARTIAL:
+                return candidate
+            if comparison_mode == ComparisonMode.SAMPLED:
+                if HashingUtils.compare_hashes(
+                    str(file),
+                    str(candidate),
+                    comparison_mode,
+                    buffer_size,
+                    certain=certain,
+                ):
+                    return candidate
+                continue
+
+            if not self._has_digest(entry):
+                entry = self.record(
+                    candidate, digest=self._get_digest(candidate, buffer_size)
+                )
+            if digest is None:
+                digest = self._get_digest(file, buffer_size)
+            if entry.digest == digest and self._confirm(file, candidate, buffer_size):
+                return candidate
+        return None
+
+    def partial_signature(self, file: Path) -> str:
+        """
+        Calculate the tagged partial signature of a file.
+
+        See `HashingUtils.get_partial_hash`, calculated with the algorithm of
+        the catalog.
+        """
+        return HashingUtils.digest_prefix(
+            self.algorithm
+        ) + HashingUtils.get_partial_hash(str(file), algorithm=self.algorithm)
+
+    def close(self):
+        """Commit the pending changes and close the database."""
+        with self._lock:
+            self._connection.commit()
+            self._connection.close()
+
+    def __enter__(self) -> "DestinationCatalog":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _relative(self, file: Path) -> str:
+        return file.absolute().relative_to(self.root.absolute()).as_posix()
+
+    def _has_partial_signature(self, entry: CatalogEntry) -> bool:
+        """Check whether an entry has a partial signature of the configured kind."""
+        return entry.partial_hash is not None and entry.partial_hash.startswith(
+            HashingUtils.digest_prefix(self.algorithm)
+        )
+
+    def _has_digest(self, entry: CatalogEntry) -> bool:
+        """Check whether an entry has a digest of the configured kind."""
+        return entry.digest is not None and entry.digest.startswith(
+            HashingUtils.digest_prefix(self.algorithm, self.tree_hash)
+        )
+
+    def _get_digest(self, file: Path, buffer_size: int) -> str:
+        return HashingUtils.get_digest(
+            str(file), self.algorithm, self.tree_hash, buffer_size
+        )
+
+    def _confirm(self, file: Path, destination_file: Path, buffer_size: int) -> bool:
+        """
+        Confirm that two files with matching digests are identical.
+
+        A CRC32 checksum is only a cheap filter, with 32 bits different files
+        match too often to trust it, so the files are compared completely.
+        """
+        if self.algorithm != HashAlgorithm.CRC32:
+            return True
+        return HashingUtils.compare_contents(
+            str(file), str(destination_file), buffer_size
+        )
+
+    def _forget(self, path: str):
+        """Remove the entry of a file that no longer exists."""
+        with self._lock:
+            self._connection.execute("DELETE FROM files WHERE path = ?", (path,))
+            self._written()
+
+    def _written(self):
+        """Commit regularly, without paying for it on every write."""
+        self._pending += 1
+        if self._pending >= DestinationCatalog.COMMIT_INTERVAL:
+            self._connection.commit()
+            self._pending = 0
@@ -0,0 +1,3 @@
+from utils.copying.copying import FileCopier
+
+__all__ = ["FileCopier"]
@@ -0,0 +1,378 @@
+import errno
+import os
+import shutil
+import sys
+import threading
+from typing import Callable, Optional
+
+from utils.hashing.hashing import HashingUtils
+from utils.validation.durability import Durability
+from utils.validation.hash_algorithm import HashAlgorithm
+
+# Errors of copy_file_range/sendfile meaning they cannot be used for a file pair
+UNSUPPORTED_ERRORS = {
+    errno.ENOSYS,
+    errno.EXDEV,
+    errno.EINVAL,
+    errno.EOPNOTSUPP,
+    errno.ENOTSUP,
+    errno.ENOTSOCK,
+}
+# Like shutil, only use sendfile on Linux, elsewhere it may only write to sockets
+USE_SENDFILE = hasattr(os, "sendfile") and sys.platform.startswith("linux")
+# Maximum number of bytes handed to the kernel per call
+KERNEL_CHUNK_SIZE = 1024 * 1024 * 1024
+# Maximum number of bytes handed to the kernel per call if progress is reported
+PROGRESS_CHUNK_SIZE = 64 * 1024 * 1024
+# Suffix of the temporary files copies are written to
+TEMP_SUFFIX = ".part"
+# Interrupted copies are resumed at a multiple of this size, dropping the
+# last block, which may not have been written completely
+RESUME_BLOCK_SIZE = 1024 * 1024
+
+
+class FileCopier:
+    """
+    Copies files with as few user-space copies and system calls as possible.
+
+    If no hash is needed, `copy_fast` lets the kernel copy the data with
+    `os.copy_file_range` (which can even clone the data or copy it on the
+    server side) or, on Linux, `os.sendfile`, and only falls back to reading
+    and writing the data itself if neither is supported for the two files.
+    On platforms without either, e.g. macOS, it uses `shutil.copyfile`, which
+    copies with `fcopyfile` and can clone the data as well.
+
+    If a hash is needed, `copy` streams the source once: every chunk is fed
+    to the digest and written to the destination. The returned digest can be
+    recorded in the catalog or used to verify the written copy, without
+    reading the source again. It is a plain SHA256 hash by default, or the
+    hash or tree hash of the configured algorithm, see
+    `HashingUtils.get_digest`.
+
+    Data passing through user space is read with `readinto` into a buffer that
+    is reused per thread. Its size is the configured buffer size rounded up to
+    a multiple of the preferred I/O size of the source device.
+
+    Like `shutil.copy2`, the timestamps and permission bits of the source are
+    preserved.
+
+    Copies are written to a hidden temporary file next to the destination
+    (see `temp_path`) and only renamed to the destination once they are
+    complete, so a crash never leaves a truncated file under the final name.
+    When the data reaches the storage device depends on the durability:
+
+    - FILE: every copy is flushed with fsync before it is renamed.
+    - BATCH: the copies are flushed together by `sync`, e.g. at the end of an
+      import, so the device can write them in any order.
+    - NONE: flushing is left to the operating system.
+
+    With resume, the temporary file of an interrupted copy is kept, and the
+    next copy to the same destination continues it instead of starting over:
+    if samples of the part already copied match the source (see
+    `HashingUtils.compare_samples`), only the rest is read from the source.
+    The digest of the kept part is calculated from the temporary file.
+
+    If `on_progress` is given, it is called with the number of bytes written
+    after every chunk, e.g. to display the transfer rate. The bytes kept from
+    an interrupted copy are reported at once. Copies inside the kernel are
+    then split into chunks of at most `PROGRESS_CHUNK_SIZE` bytes.
+
+    Example:
+        copier = FileCopier(verify=True, durability=Durability.BATCH)
+        digest = copier.copy('source/IMG_0001.JPG', 'destination/IMG_0001.JPG')
+        copier.sync()
+    """
+
+    def __init__(
+        self,
+        buffer_size: int = 8 * 1024 * 1024,
+        verify: bool = False,
+        tree_hash: bool = False,
+        algorithm: HashAlgorithm = HashAlgorithm.SHA256,
+        durability: Durability = Durability.NONE,
+        resume: bool = False,
+        on_progress: Optional[Callable[[int], None]] = None,
+    ):
+        """
+        Args:
+            buffer_size (int): The minimum size of the chunks read from the source. Defaults to 8 MiB.
+            verify (bool): Re-read the destination after copying and compare its hash. Defaults to False.
+            tree_hash (bool): Calculate tree hashes instead of plain hashes. Defaults to False.
+            algorithm (HashAlgorithm): The hash algorithm. Defaults to SHA256.
+            durability (Durability): When copies are flushed to the device. Defaults to NONE.
+            resume (bool): Keep the temporary files of failed copies and continue them. Defaults to False.
+            on_progress (Callable[[int], None]): Called with the number of bytes written after each chunk. Defaults to None.
+        """
+        if buffer_size < 1:
+            raise ValueError("Buffer size must be at least 1")
+
+        self.buffer_size = buffer_size
+        self.verify = verify
+        self.tree_hash = tree_hash
+        self.algorithm = algorithm
+        self.durability = durability
+        self.resume = resume
+        self.on_progress = on_progress
+        self._buffers = threading.local()
+        self._device_buffer_sizes = {}
+        self._unsynced = set()
+        self._lock = threading.Lock()
+
+    def copy(self, source: str, destination: str) -> str:
+        """Copies a file and returns the digest of its content.
+
+        Args:
+            source (str): The path to the file to copy.
+            destination (str): The path to copy the file to.
+
+        Returns:
+            str: The tagged digest of the copied content, see `HashingUtils.get_digest`.
+
+        Raises:
+            FileNotFoundError: If the source does not exist.
+            IOError: If the file cannot be copied, or the verification of the
+                written copy fails. A copy that fails verification is removed.
+        """
+        hasher = HashingUtils.create_hasher(self.algorithm, self.tree_hash)
+        temp = FileCopier.temp_path(destination)
+        offset = self._resume_offset(source, temp)
+        try:
+            with (
+                open(source, "rb", buffering=0) as src,
+                open(temp, "r+b" if offset else "wb") as dst,
+            ):
+                buffer = self._get_buffer(src.fileno())
+                if offset:
+                    # Hash the part that was already copied, then continue
+                    dst.truncate(offset)
+                    remaining = offset
+                    while remaining:
+                        read = dst.readinto(buffer[: min(len(buffer), remaining)])
+                        hasher.update(buffer[:read])
+                        remaining -= read
+                    src.seek(offset)
+                    self._report(offset)
+                while True:
+                    read = src.readinto(buffer)
+                    if not read:
+                        break
+                    hasher.update(buffer[:read])
+                    dst.write(buffer[:read])
+                    self._report(read)
+            shutil.copystat(source, temp)
+            digest = (
+                HashingUtils.digest_prefix(self.algorithm, self.tree_hash)
+                + hasher.hexdigest()
+            )
+
+            if self.verify:
+                written = HashingUtils.get_digest(
+                    temp, self.algorithm, self.tree_hash, self.buffer_size
+                )
+                if written != digest:
+                    FileCopier._discard(temp)
+                    raise IOError(
+                        f"Verification of {destination} failed: expected hash {digest}, got {written}"
+                    )
+
+            self._commit(temp, destination)
+        except BaseException:
+            if not self.resume:
+                FileCopier._discard(temp)
+            raise
+
+        return digest
+
+    def copy_fast(self, source: str, destination: str):
+        """Copies a file inside the kernel, if supported, without hashing it.
+
+        Args:
+            source (str): The path to the file to copy.
+            destination (str): The path to copy the file to.
+
+        Raises:
+            FileNotFoundError: If the source does not exist.
+            IOError: If the file cannot be copied, or the copy does not have
+                the size of the source.
+        """
+        temp = FileCopier.temp_path(destination)
+        offset = self._resume_offset(source, temp)
+        try:
+            if not offset and not FileCopier._kernel_copy_available():
+                shutil.copyfile(source, temp)
+                self._report(os.path.getsize(temp))
+            else:
+                with (
+                    open(source, "rb", buffering=0) as src,
+                    open(temp, "r+b" if offset else "wb", buffering=0) as dst,
+                ):
+                    if offset:
+                        dst.truncate(offset)
+                        dst.seek(offset)
+                        src.seek(offset)
+                        self._report(offset)
+                    if not self._copy_in_kernel(src.fileno(), dst.fileno()):
+                        buffer = self._get_buffer(src.fileno())
+                        while True:
+                            read = src.readinto(buffer)
+                            if not read:
+                                break
+                            written = 0
+                            while written < read:
+                                written += dst.write(buffer[written:read])
+                            self._report(read)
+            FileCopier._check_size(source, temp)
+            shutil.copystat(source, temp)
+            self._commit(temp, destination)
+        except BaseException:
+            if not self.resume:
+                FileCopier._discard(temp)
+            raise
+
+    def sync(self) -> int:
+        """Flushes the copies written since the last call, with BATCH durability.
+
+        The files are flushed first and their folders afterwards, so the
+        renames are persisted after the data they point to.
+
+        Returns:
+            int: The number of files flushed.
+        """
+        with self._lock:
+            files = sorted(self._unsynced)
+            self._unsynced.clear()
+
+        for file in files:
+            FileCopier._fsync(file)
+        for folder in sorted({os.path.dirname(file) for file in files}):
+            FileCopier._fsync_directory(folder)
+        return len(files)
+
+    @staticmethod
+    def temp_path(destination: str) -> str:
+        """Returns the temporary file a copy to a destination is written to.
+
+        The name is derived from the destination, so a leftover of an
+        interrupted copy can be found again, and hidden, so it is never
+        imported or cataloged as a media file.
+        """
+        folder, name = os.path.split(destination)
+        return os.path.join(folder, f".{name}{TEMP_SUFFIX}")
+
+    def _report(self, written: int):
+        if self.on_progress is not None:
+            self.on_progress(written)
+
+    def _resume_offset(self, source: str, temp: str) -> int:
+        """Returns the number of bytes of an interrupted copy that can be kept."""
+        if not self.resume:
+            return 0
+        try:
+            size = os.path.getsize(temp)
+        except FileNotFoundError:
+            return 0
+
+        offset = (size // RESUME_BLOCK_SIZE - 1) * RESUME_BLOCK_SIZE
+        if offset <= 0 or size > os.path.getsize(source):
+            return 0
+        if not HashingUtils.compare_samples(source, temp, offset):
+            return 0
+        return offset
+
+    def _commit(self, temp: str, destination: str):
+        """Renames a complete copy to its destination, according to the durability."""
+        if self.durability == Durability.FILE:
+            FileCopier._fsync(temp)
+        os.replace(temp, destination)
+        if self.durability == Durability.FILE:
+            FileCopier._fsync_directory(os.path.dirname(destination))
+        elif self.durability == Durability.BATCH:
+            with self._lock:
+                self._unsynced.add(destination)
+
+    @staticmethod
+    def _check_size(source: str, temp: str):
+        """Raises if a copy is shorter or longer than its source."""
+        expected = os.path.getsize(source)
+        written = os.path.getsize(temp)
+        if written != expected:
+            raise IOError(
+                f"Copy of {source} is incomplete: expected {expected} bytes, got {written}"
+            )
+
+    @staticmethod
+    def _discard(temp: str):
+        """Removes the temporary file of a failed copy, if it was created."""
+        try:
+            os.remove(temp)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _fsync(path: str):
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _fsync_directory(path: str):
+        # Folders cannot be opened and flushed on Windows
+        if os.name == "nt":
+            return
+        FileCopier._fsync(path)
+
+    def _copy_in_kernel(self, src_fd: int, dst_fd: int) -> bool:
+        """
+        Copy the rest of a file with copy_file_range or sendfile.
+
+        Both calls advance the file positions, so if one of them is not
+        supported, the next method continues where the previous one stopped.
+
+        Returns:
+            bool: True if the file was copied completely, False if the rest
+            has to be copied in user space.
+        """
+        chunk_size = PROGRESS_CHUNK_SIZE if self.on_progress else KERNEL_CHUNK_SIZE
+        methods = []
+        if hasattr(os, "copy_file_range"):
+            methods.append(lambda: os.copy_file_range(src_fd, dst_fd, chunk_size))
+        if USE_SENDFILE:
+            methods.append(lambda: os.sendfile(dst_fd, src_fd, None, chunk_size))
+
+        for method in methods:
+            try:
+                copied = method()
+                if not copied:
+                    # Like shutil, treat a method that copies nothing on the
+                    # first call as unsupported, some file systems (e.g. FUSE)
+                    # return 0 instead of an error
+                    continue
+                while copied:
+                    self._report(copied)
+                    copied = method()
+                return True
+            except OSError as e:
+                if e.errno not in UNSUPPORTED_ERRORS:
+                    raise
+        return False
+
+    @staticmethod
+    def _kernel_copy_available() -> bool:
+        return hasattr(os, "copy_file_range") or USE_SENDFILE
+
+    def _get_buffer(self, fd: int) -> memoryview:
+        """Get the reusable buffer of the current thread for reading a file."""
+        stat = os.fstat(fd)
+        size = self._device_buffer_sizes.get(stat.st_dev)
+        if size is None:
+            block_size = max(getattr(stat, "st_blksize", 0), 1)
+            size = -(-self.buffer_size // block_size) * block_size
+            self._device_buffer_sizes[stat.st_dev] = size
+
+        buffer = getattr(self._buffers, "buffer", None)
+        if buffer is None or len(buffer) < size:
+            buffer = memoryview(bytearray(size))
+            self._buffers.buffer = buffer
+        return buffer[:size]
@@ -1,11 +1,24 @@
+import functools
 import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
 from datetime import datetime
 from typing import Optional
 
-from PIL import Image
-from pillow_heif import register_heif_opener
+from utils.exif.heif import read_exif_item
+from utils.exif.jpeg import read_exif_segment
+from utils.exif.tiff import EXIF_IFD_POINTER, find_datetime_original
 
-register_heif_opener(thumbnails=False)
+
+@functools.cache
+def _load_pillow():
+    """Import Pillow with HEIF support, on first use only."""
+    from PIL import Image
+    from pillow_heif import register_heif_opener
+
+    register_heif_opener(thumbnails=False)
+    return Image
 
 
 class ExifUtils:
@@ -40,16 +53,96 @@ class ExifUtils:
             invalid format), the error will be logged and the method will return None.
         """
         try:
-            with Image.open(path) as img:
-                exif_data = img.getexif()
-                if exif_data and ExifUtils.EXIF_DATETIME_ORIGINAL in exif_data:
-                    return datetime.strptime(
-                        exif_data[ExifUtils.EXIF_DATETIME_ORIGINAL],
-                        ExifUtils.EXIF_DATETIME_FORMAT,
-                    )
-
-            # No date found in EXIF data
-            return None
+            try:
+                date_taken = ExifUtils._read_date_taken(path)
+            except ValueError as e:
+                logging.debug(f"Falling back to Pillow for {path}: {str(e)}")
+                date_taken = ExifUtils._read_date_taken_pillow(path)
+
+            if date_taken is None:
+                # No date found in EXIF data
+                return None
+            return datetime.strptime(date_taken, ExifUtils.EXIF_DATETIME_FORMAT)
         except Exception as e:
             logging.error(f"Error extracting EXIF data from {path}: {str(e)}")
             return None
+
+    @staticmethod
+    def _read_date_taken(path: str) -> Optional[str]:
+        """
+        Read the raw DateTimeOriginal value by parsing only the file headers.
+
+        Raises:
+            ValueError: If the file format is not supported or the headers
+                cannot be parsed
+        """
+        with open(path, "rb") as f:
+            magic = f.read(12)
+            f.seek(0)
+            if magic[:2] == b"\xff\xd8":
+                tiff = read_exif_segment(f)
+            elif magic[4:8] == b"ftyp":
+                # HEIF/HEIC/HIF files are ISO base media files
+                tiff = read_exif_item(f)
+            else:
+                raise ValueError("Unsupported file format")
+            return find_datetime_original(tiff) if tiff else None
+
+    @staticmethod
+    def _read_date_taken_pillow(path: str) -> Optional[str]:
+        """Read the raw DateTimeOriginal value by opening the image with Pillow."""
+        Image = _load_pillow()
+        with Image.open(path) as img:
+            exif_data = img.getexif()
+            if ExifUtils.EXIF_DATETIME_ORIGINAL in exif_data:
+                return exif_data[ExifUtils.EXIF_DATETIME_ORIGINAL]
+            # Cameras store the date in the Exif IFD rather than in IFD0
+            return exif_data.get_ifd(EXIF_IFD_POINTER).get(
+                ExifUtils.EXIF_DATETIME_ORIGINAL
+            )
+
+    @staticmethod
+    def get_dates_taken(
+        paths: list[str], executor: Optional[Executor] = None
+    ) -> dict[str, Optional[datetime]]:
+        """
+        Get the dates a batch of images were taken, in parallel processes.
+
+        Decoding EXIF data is CPU-bound and holds the GIL, so the images are
+        distributed over a process pool instead of threads.
+
+        Args:
+            paths: Paths to the image files
+            executor: The executor to use, e.g. a shared ProcessPoolExecutor.
+                If omitted, a process pool is created for this batch only.
+
+        Returns:
+            A mapping of each path to the datetime the photo was taken, or None
+            if the information is not available or an error occurred
+        """
+        if not paths:
+            return {}
+
+        if executor is None:
+            with ExifUtils.create_executor() as executor:
+                return ExifUtils.get_dates_taken(paths, executor)
+
+        # Hand out a few chunks per CPU to balance IPC overhead and load
+        chunksize = max(1, len(paths) // ((os.cpu_count() or 1) * 4))
+        dates = executor.map(ExifUtils.get_date_taken, paths, chunksize=chunksize)
+        return dict(zip(paths, dates))
+
+    @staticmethod
+    def create_executor(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+        """
+        Create a process pool suitable for `get_dates_taken`.
+
+        The workers are spawned instead of forked, because the pool is usually
+        started while other threads of the importer are running.
+
+        Args:
+            max_workers: Number of worker processes. Defaults to the CPU count.
+        """
+        return ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+        )
@@ -0,0 +1,140 @@
+import struct
+from typing import BinaryIO, Optional
+
+from utils.exif.isobmff import iter_boxes, parse_boxes
+
+# Upper bound for boxes that are read into memory, to reject corrupt files
+MAX_META_SIZE = 16 * 1024 * 1024
+MAX_EXIF_SIZE = 1024 * 1024
+
+
+def read_exif_item(f: BinaryIO) -> Optional[bytes]:
+    """
+    Read the TIFF structure of the Exif item of a HEIF/HEIC/HIF file.
+
+    Only the `meta` box is read and parsed: its `iinf` box is searched for the
+    Exif item, and its `iloc` box tells where the item is stored. Then only
+    the extents of the Exif item are read, the image data is never touched.
+
+    Args:
+        f: The HEIF file, opened in binary mode and positioned at its start
+
+    Returns:
+        The TIFF structure of the EXIF data, or None if the file has no Exif
+        item
+
+    Raises:
+        ValueError: If the file is not a valid HEIF file
+    """
+    meta = None
+    for box_type, size in iter_boxes(f):
+        if box_type == b"meta":
+            if size > MAX_META_SIZE:
+                raise ValueError("HEIF meta box is too large")
+            meta = f.read(size)
+            break
+
+    if meta is None:
+        raise ValueError("No meta box found")
+
+    try:
+        # meta is a full box: skip version and flags
+        children = dict(parse_boxes(meta, 4))
+        if b"iinf" not in children or b"iloc" not in children:
+            raise ValueError("Incomplete HEIF meta box")
+
+        item_id = _find_exif_item_id(children[b"iinf"])
+        if item_id is None:
+            return None
+
+        extents = _find_item_extents(children[b"iloc"], item_id)
+        if extents is None:
+            raise ValueError(f"No location for Exif item {item_id}")
+        construction_method, item_extents = extents
+
+        data = bytearray()
+        for offset, length in item_extents:
+            if len(data) + length > MAX_EXIF_SIZE:
+                raise ValueError("HEIF Exif item is too large")
+            match construction_method:
+                case 0:
+                    f.seek(offset)
+                    chunk = f.read(length)
+                case 1:
+                    idat = children.get(b"idat", b"")
+                    chunk = idat[offset : offset + length]
+                case _:
+                    raise ValueError(
+                        f"Unsupported construction method {construction_method}"
+                    )
+            if len(chunk) != length:
+                raise ValueError("Truncated HEIF Exif item")
+            data += chunk
+
+        # The item starts with the offset of the TIFF header, which is
+        # usually preceded by the "Exif\0\0" marker
+        (tiff_offset,) = struct.unpack_from(">I", data, 0)
+        return bytes(data[4 + tiff_offset :])
+    except struct.error as e:
+        raise ValueError(f"Truncated HEIF box: {e}") from e
+
+
+def _find_exif_item_id(iinf: bytes) -> Optional[int]:
+    """Find the ID of the Exif item in an item info box."""
+    version = iinf[0]
+    offset = 6 if version == 0 else 8
+    for box_type, infe in parse_boxes(iinf, offset):
+        if box_type != b"infe" or infe[0] < 2:
+            continue
+        if infe[0] == 2:
+            item_id, _, item_type = struct.unpack_from(">HH4s", infe, 4)
+        else:
+            item_id, _, item_type = struct.unpack_from(">IH4s", infe, 4)
+        if item_type == b"Exif":
+            return item_id
+    return None
+
+
+def _find_item_extents(
+    iloc: bytes, item_id: int
+) -> Optional[tuple[int, list[tuple[int, int]]]]:
+    """Find the construction method and (offset, length) extents of an item."""
+    version = iloc[0]
+    offset_size = iloc[4] >> 4
+    length_size = iloc[4] & 0x0F
+    base_offset_size = iloc[5] >> 4
+    index_size = iloc[5] & 0x0F if version in (1, 2) else 0
+
+    position = 6
+    if version < 2:
+        (item_count,) = struct.unpack_from(">H", iloc, position)
+        position += 2
+    else:
+        (item_count,) = struct.unpack_from(">I", iloc, position)
+        position += 4
+
+    def read_int(size: int) -> int:
+        nonlocal position
+        if position + size > len(iloc):
+            raise ValueError("Truncated iloc box")
+        value = int.from_bytes(iloc[position : position + size], "big")
+        position += size
+        return value
+
+    for _ in range(item_count):
+        current_id = read_int(2 if version < 2 else 4)
+        construction_method = 0
+        if version in (1, 2):
+            construction_method = read_int(2) & 0x0F
+        read_int(2)  # data_reference_index
+        base_offset = read_int(base_offset_size)
+        extent_count = read_int(2)
+        extents = []
+        for _ in range(extent_count):
+            read_int(index_size)
+            extent_offset = read_int(offset_size)
+            extent_length = read_int(length_size)
+            extents.append((base_offset + extent_offset, extent_length))
+        if current_id == item_id:
+            return construction_method, extents
+    return None
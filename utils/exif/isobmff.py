@@ -0,0 +1,62 @@
+import struct
+from typing import BinaryIO, Iterator, Optional
+
+
+def iter_boxes(f: BinaryIO, end: Optional[int] = None) -> Iterator[tuple[bytes, int]]:
+    """
+    Yield the type and payload size of consecutive boxes in a file.
+
+    The file is positioned at the start of the payload of each yielded box,
+    so the caller may read (parts of) it. Afterwards the iterator seeks to the
+    next box, which means large payloads such as `mdat` are never read.
+
+    Args:
+        f: The file, opened in binary mode and positioned at the first box
+        end: The position where the boxes end, e.g. the end of a parent box.
+            Defaults to the end of the file.
+
+    Raises:
+        ValueError: If a box header is invalid
+    """
+    position = f.tell()
+    if end is None:
+        end = f.seek(0, 2)
+        f.seek(position)
+
+    while position + 8 <= end:
+        header = f.read(8)
+        if len(header) != 8:
+            raise ValueError("Truncated box header")
+        size, box_type = struct.unpack(">I4s", header)
+        header_size = 8
+        if size == 1:
+            largesize = f.read(8)
+            if len(largesize) != 8:
+                raise ValueError("Truncated box header")
+            (size,) = struct.unpack(">Q", largesize)
+            header_size = 16
+        elif size == 0:
+            # The box extends to the end of its parent
+            size = end - position
+        if size < header_size:
+            raise ValueError(f"Invalid size for box {box_type!r}")
+
+        yield box_type, size - header_size
+        position += size
+        f.seek(position)
+
+
+def parse_boxes(data: bytes, offset: int = 0) -> Iterator[tuple[bytes, bytes]]:
+    """Yield the type and payload of the boxes stored in a buffer."""
+    while offset + 8 <= len(data):
+        size, box_type = struct.unpack_from(">I4s", data, offset)
+        header_size = 8
+        if size == 1:
+            (size,) = struct.unpack_from(">Q", data, offset + 8)
+            header_size = 16
+        elif size == 0:
+            size = len(data) - offset
+        if size < header_size or offset + size > len(data):
+            raise ValueError(f"Invalid size for box {box_type!r}")
+        yield box_type, data[offset + header_size : offset + size]
+        offset += size
@@ -0,0 +1,63 @@
+import struct
+from typing import BinaryIO, Optional
+
+# Markers without a length field
+STANDALONE_MARKERS = {0x01, *range(0xD0, 0xD8)}
+APP1 = 0xE1
+START_OF_SCAN = 0xDA
+END_OF_IMAGE = 0xD9
+EXIF_HEADER = b"Exif\x00\x00"
+
+
+def read_exif_segment(f: BinaryIO) -> Optional[bytes]:
+    """
+    Read the TIFF structure of the EXIF APP1 segment of a JPEG file.
+
+    Only the segment headers before the image data are read, which usually
+    means the first few KB of the file. The image data itself is never read.
+
+    Args:
+        f: The JPEG file, opened in binary mode and positioned at its start
+
+    Returns:
+        The TIFF structure of the EXIF data, or None if the file has no EXIF
+        segment
+
+    Raises:
+        ValueError: If the file is not a valid JPEG file
+    """
+    if f.read(2) != b"\xff\xd8":
+        raise ValueError("Not a JPEG file")
+
+    while True:
+        marker = f.read(2)
+        if len(marker) != 2 or marker[0] != 0xFF:
+            raise ValueError("Invalid JPEG segment marker")
+        # Markers may be preceded by any number of fill bytes
+        while marker[1] == 0xFF:
+            marker = marker[1:] + f.read(1)
+            if len(marker) != 2:
+                raise ValueError("Truncated JPEG file")
+
+        if marker[1] in STANDALONE_MARKERS:
+            continue
+        if marker[1] in (START_OF_SCAN, END_OF_IMAGE):
+            # The image data starts, there are no more metadata segments
+            return None
+
+        length_field = f.read(2)
+        if len(length_field) != 2:
+            raise ValueError("Truncated JPEG file")
+        (length,) = struct.unpack(">H", length_field)
+        if length < 2:
+            raise ValueError("Invalid JPEG segment length")
+
+        if marker[1] == APP1:
+            payload = f.read(length - 2)
+            if len(payload) != length - 2:
+                raise ValueError("Truncated JPEG file")
+            # APP1 is also used for XMP data, which is skipped
+            if payload.startswith(EXIF_HEADER):
+                return payload[len(EXIF_HEADER) :]
+        else:
+            f.seek(length - 2, 1)
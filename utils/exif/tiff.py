@@ -0,0 +1,75 @@
+import struct
+from typing import Optional
+
+# Tags needed to find the capture date in a TIFF structure
+EXIF_IFD_POINTER = 0x8769
+DATETIME_ORIGINAL = 36867
+ASCII_TYPE = 2
+
+
+def find_datetime_original(tiff: bytes) -> Optional[str]:
+    """
+    Find the DateTimeOriginal tag in a TIFF structure, as embedded in EXIF data.
+
+    Only the entries of IFD0 and the Exif IFD it points to are inspected, all
+    other IFDs and tag values are skipped without being decoded.
+
+    Args:
+        tiff: The TIFF structure, starting with its byte order header
+
+    Returns:
+        The raw DateTimeOriginal value (e.g. "2023:01:15 12:30:45"), or None if
+        the tag is not present
+
+    Raises:
+        ValueError: If the data is not a valid TIFF structure
+    """
+    match tiff[:4]:
+        case b"II*\x00":
+            endian = "<"
+        case b"MM\x00*":
+            endian = ">"
+        case _:
+            raise ValueError("Invalid TIFF header")
+
+    try:
+        (ifd0_offset,) = struct.unpack_from(endian + "I", tiff, 4)
+        entries = _read_ifd(tiff, ifd0_offset, endian)
+        if DATETIME_ORIGINAL not in entries and EXIF_IFD_POINTER in entries:
+            _, _, exif_offset = entries[EXIF_IFD_POINTER]
+            entries = _read_ifd(tiff, exif_offset, endian)
+        if DATETIME_ORIGINAL not in entries:
+            return None
+        return _read_ascii(tiff, entries[DATETIME_ORIGINAL], endian)
+    except struct.error as e:
+        raise ValueError(f"Truncated TIFF structure: {e}") from e
+
+
+def _read_ifd(tiff: bytes, offset: int, endian: str) -> dict[int, tuple[int, int, int]]:
+    """Read the (type, count, value or offset) of the relevant entries of an IFD."""
+    (count,) = struct.unpack_from(endian + "H", tiff, offset)
+    entries = {}
+    for position in range(offset + 2, offset + 2 + count * 12, 12):
+        tag, value_type, value_count = struct.unpack_from(
+            endian + "HHI", tiff, position
+        )
+        if tag == EXIF_IFD_POINTER:
+            (value,) = struct.unpack_from(endian + "I", tiff, position + 8)
+            entries[tag] = (value_type, value_count, value)
+        elif tag == DATETIME_ORIGINAL:
+            # Keep the position of the inline value for short strings
+            entries[tag] = (value_type, value_count, position + 8)
+    return entries
+
+
+def _read_ascii(tiff: bytes, entry: tuple[int, int, int], endian: str) -> str:
+    """Read the value of an ASCII entry."""
+    value_type, count, value_position = entry
+    if value_type != ASCII_TYPE:
+        raise ValueError(f"Unexpected type {value_type} for an ASCII tag")
+    if count > 4:
+        (value_position,) = struct.unpack_from(endian + "I", tiff, value_position)
+    value = tiff[value_position : value_position + count]
+    if len(value) != count:
+        raise ValueError("ASCII value exceeds the TIFF structure")
+    return value.split(b"\x00", 1)[0].decode("ascii")
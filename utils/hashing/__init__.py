@@ -1,3 +1,4 @@
 from utils.hashing.hashing import HashingUtils
+from utils.hashing.tree_hash import TreeHasher
 
-__all__ = ["HashingUtils"]
+__all__ = ["HashingUtils", "TreeHasher"]
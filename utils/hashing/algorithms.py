@@ -0,0 +1,37 @@
+import hashlib
+import zlib
+
+from utils.validation.hash_algorithm import HashAlgorithm
+
+
+class Crc32:
+    """A CRC-32 checksum with the interface of the hashlib hash objects."""
+
+    def __init__(self):
+        self._crc = 0
+
+    def update(self, data) -> None:
+        self._crc = zlib.crc32(data, self._crc)
+
+    def digest(self) -> bytes:
+        return self._crc.to_bytes(4, "big")
+
+    def hexdigest(self) -> str:
+        return f"{self._crc:08x}"
+
+
+def new_hash(algorithm: HashAlgorithm = HashAlgorithm.SHA256):
+    """
+    Create a hash object for the given algorithm.
+
+    SHA256 and BLAKE2b come from hashlib. CRC-32 is not a cryptographic hash
+    and only meant as a cheap checksum for trusted media.
+    """
+    match algorithm:
+        case HashAlgorithm.SHA256:
+            return hashlib.sha256()
+        case HashAlgorithm.BLAKE2B:
+            return hashlib.blake2b()
+        case HashAlgorithm.CRC32:
+            return Crc32()
+    raise ValueError(f"Unsupported hash algorithm: {algorithm}")
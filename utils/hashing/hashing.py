@@ -1,62 +1,341 @@
-import hashlib
 import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
+from utils.hashing.algorithms import new_hash
+from utils.hashing.tree_hash import SEGMENT_SIZE, TreeHasher, combine_segment_hashes
 from utils.validation.comparison_mode import ComparisonMode
+from utils.validation.hash_algorithm import HashAlgorithm
 
 
 class HashingUtils:
     """A utility class for hashing operations on files."""
 
     @staticmethod
-    def get_hash(file: str, buffer_size: int = 4096) -> str:
-        """Calculates the SHA256 hash of a file.
+    def get_hash(
+        file: str,
+        buffer_size: int = 1024 * 1024,
+        algorithm: HashAlgorithm = HashAlgorithm.SHA256,
+    ) -> str:
+        """Calculates the hash of a file, SHA256 by default.
 
         Args:
             file (str): The path to the file to hash.
-            buffer_size (int): The buffer size to use when reading the file. Defaults to 4096.
+            buffer_size (int): The buffer size to use when reading the file. Defaults to 1 MiB.
+            algorithm (HashAlgorithm): The hash algorithm. Defaults to SHA256.
 
         Returns:
-            str: The SHA256 hash of the file.
+            str: The hash of the file.
 
         Raises:
             FileNotFoundError: If the file does not exist.
             IOError: If the file cannot be read.
         """
-        sha256 = hashlib.sha256()
+        hasher = new_hash(algorithm)
         try:
             with open(file, "rb") as f:
                 while True:
                     data = f.read(buffer_size)
                     if not data:
                         break
-                    sha256.update(data)
+                    hasher.update(data)
         except FileNotFoundError:
             raise FileNotFoundError(f"File not found: {file}")
         except IOError as e:
             raise IOError(f"Error reading file {file}: {e}")
-        return sha256.hexdigest()
+        return hasher.hexdigest()
+
+    @staticmethod
+    def get_tree_hash(
+        file: str,
+        segment_size: int = SEGMENT_SIZE,
+        max_workers: Optional[int] = None,
+        buffer_size: int = 1024 * 1024,
+        algorithm: HashAlgorithm = HashAlgorithm.SHA256,
+    ) -> str:
+        """Calculates the tree hash of a file, hashing its segments in parallel.
+
+        The file is split into segments of `segment_size` bytes, which are
+        read and hashed on a thread pool. hashlib and zlib release the GIL
+        while hashing, so large files are hashed on all cores. The segment
+        hashes are combined into a single root hash, see `TreeHasher`, which
+        calculates the same hash from a stream.
+
+        Args:
+            file (str): The path to the file to hash.
+            segment_size (int): The size of the segments. Defaults to 64 MiB.
+            max_workers (int): The maximum number of threads. Defaults to the number of CPUs.
+            buffer_size (int): The size of the reads within a segment. Defaults to 1 MiB.
+            algorithm (HashAlgorithm): The hash algorithm. Defaults to SHA256.
+
+        Returns:
+            str: The tree hash of the file.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            IOError: If the file cannot be read.
+        """
+        try:
+            fd = os.open(file, os.O_RDONLY)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {file}")
+        except IOError as e:
+            raise IOError(f"Error reading file {file}: {e}")
+
+        def hash_segment(index: int) -> bytes:
+            hasher = new_hash(algorithm)
+            offset = index * segment_size
+            end = min(offset + segment_size, size)
+            while offset < end:
+                data = os.pread(fd, min(buffer_size, end - offset), offset)
+                if not data:
+                    break
+                hasher.update(data)
+                offset += len(data)
+            return hasher.digest()
+
+        try:
+            size = os.fstat(fd).st_size
+            segments = max(-(-size // segment_size), 1)
+            if segments == 1:
+                return combine_segment_hashes([hash_segment(0)], algorithm)
+
+            workers = min(max_workers or os.cpu_count() or 1, segments)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                return combine_segment_hashes(
+                    list(executor.map(hash_segment, range(segments))), algorithm
+                )
+        except IOError as e:
+            raise IOError(f"Error reading file {file}: {e}")
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def create_hasher(
+        algorithm: HashAlgorithm = HashAlgorithm.SHA256, tree: bool = False
+    ):
+        """Creates an incremental hasher for the digests of `get_digest`.
+
+        Args:
+            algorithm (HashAlgorithm): The hash algorithm. Defaults to SHA256.
+            tree (bool): Create a hasher for tree hashes instead of plain hashes.
+
+        Returns:
+            A hasher with `update` and `hexdigest`.
+        """
+        return TreeHasher(algorithm=algorithm) if tree else new_hash(algorithm)
+
+    @staticmethod
+    def digest_prefix(
+        algorithm: HashAlgorithm = HashAlgorithm.SHA256, tree: bool = False
+    ) -> str:
+        """Returns the tag prefix of the digests of `get_digest`, e.g. `sha256:`."""
+        return f"{algorithm.value}-tree:" if tree else f"{algorithm.value}:"
+
+    @staticmethod
+    def get_digest(
+        file: str,
+        algorithm: HashAlgorithm = HashAlgorithm.SHA256,
+        tree: bool = False,
+        buffer_size: int = 1024 * 1024,
+    ) -> str:
+        """Calculates the digest of a file, tagged with how it was calculated.
+
+        Digests are stored by the catalog and returned by the copier. The tag
+        keeps digests of different kinds from being compared with each other,
+        e.g. `sha256:<hex>`, `blake2b:<hex>` or `sha256-tree:<hex>`.
+
+        Args:
+            file (str): The path to the file to hash.
+            algorithm (HashAlgorithm): The hash algorithm. Defaults to SHA256.
+            tree (bool): Calculate the tree hash in parallel instead of the plain hash.
+            buffer_size (int): The buffer size to use when reading the file. Defaults to 1 MiB.
+
+        Returns:
+            str: The tagged digest of the file.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            IOError: If the file cannot be read.
+        """
+        if tree:
+            hexdigest = HashingUtils.get_tree_hash(
+                file, buffer_size=buffer_size, algorithm=algorithm
+            )
+        else:
+            hexdigest = HashingUtils.get_hash(file, buffer_size, algorithm)
+        return HashingUtils.digest_prefix(algorithm, tree) + hexdigest
+
+    @staticmethod
+    def get_partial_hash(
+        file: str,
+        partial_check_size: int = 4096,
+        algorithm: HashAlgorithm = HashAlgorithm.SHA256,
+    ) -> str:
+        """Calculates the hash of the size and the first and last chunks of a file.
+
+        This is the signature compared by ComparisonMode.PARTIAL, in a form that
+        can be stored and compared later without reading the file again.
+
+        Args:
+            file (str): The path to the file to hash.
+            partial_check_size (int): The size of the head/tail chunks to hash. Defaults to 4096.
+            algorithm (HashAlgorithm): The hash algorithm. Defaults to SHA256.
+
+        Returns:
+            str: The hash of the file size and its head and tail chunks.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            IOError: If the file cannot be read.
+        """
+        hasher = new_hash(algorithm)
+        try:
+            with open(file, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                hasher.update(size.to_bytes(8, "big"))
+                hasher.update(f.read(partial_check_size))
+                f.seek(max(size - partial_check_size, 0))
+                hasher.update(f.read(partial_check_size))
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {file}")
+        except IOError as e:
+            raise IOError(f"Error reading file {file}: {e}")
+        return hasher.hexdigest()
+
+    @staticmethod
+    def compare_contents(
+        file1: str, file2: str, buffer_size: int = 1024 * 1024
+    ) -> bool:
+        """Compares the contents of two files block by block.
+
+        Unlike comparing their hashes, this stops reading at the first block
+        that differs, and a match only costs a memory comparison per block
+        instead of hashing both files. Hashes should only be calculated when
+        the digest itself is needed, e.g. to store it in a catalog.
+
+        Args:
+            file1 (str): The path to the first file.
+            file2 (str): The path to the second file.
+            buffer_size (int): The size of the blocks to compare. Defaults to 1 MiB.
+
+        Returns:
+            bool: True if the contents are identical, False otherwise.
+
+        Raises:
+            FileNotFoundError: If either file does not exist.
+            IOError: If either file cannot be read.
+        """
+        with open(file1, "rb") as f1, open(file2, "rb") as f2:
+            while True:
+                block1 = f1.read(buffer_size)
+                if block1 != f2.read(buffer_size):
+                    return False
+                if not block1:
+                    return True
+
+    @staticmethod
+    def compare_samples(
+        file1: str, file2: str, size: int, sample_size: int = 64 * 1024
+    ) -> bool:
+        """Compares the blocks at the sample offsets of the first bytes of two files.
+
+        See `get_sample_offsets`. The files are not checked for their size, so
+        this can also compare a prefix of the same length of two files.
+
+        Args:
+            file1 (str): The path to the first file.
+            file2 (str): The path to the second file.
+            size (int): The number of bytes at the start of the files to compare.
+            sample_size (int): The size of the sampled blocks. Defaults to 64 KiB.
+
+        Returns:
+            bool: True if all sampled blocks match, False otherwise.
+
+        Raises:
+            FileNotFoundError: If either file does not exist.
+            IOError: If either file cannot be read.
+        """
+        with open(file1, "rb") as f1, open(file2, "rb") as f2:
+            for offset in HashingUtils.get_sample_offsets(size, sample_size):
+                length = min(sample_size, size - offset)
+                f1.seek(offset)
+                f2.seek(offset)
+                if f1.read(length) != f2.read(length):
+                    return False
+        return True
+
+    @staticmethod
+    def get_sample_offsets(
+        size: int,
+        sample_size: int = 64 * 1024,
+        bytes_per_sample: int = 32 * 1024 * 1024,
+        min_samples: int = 8,
+        max_samples: int = 256,
+    ) -> list[int]:
+        """Calculates the positions of the blocks compared by ComparisonMode.SAMPLED.
+
+        The number of samples grows with the file size, one per
+        `bytes_per_sample`, within `min_samples` and `max_samples`. The first
+        and last blocks are always sampled. The rest of the file is split into
+        equal sections with one block at a pseudo-random position in each.
+        The positions are seeded with the file size, so files of the same size
+        are always sampled at the same positions. Small files are covered
+        completely.
+
+        Args:
+            size (int): The size of the file.
+            sample_size (int): The size of each sampled block. Defaults to 64 KiB.
+            bytes_per_sample (int): The number of bytes per sample. Defaults to 32 MiB.
+            min_samples (int): The minimum number of samples. Defaults to 8.
+            max_samples (int): The maximum number of samples. Defaults to 256.
+
+        Returns:
+            list[int]: The ascending offsets of the blocks to compare.
+        """
+        if size <= sample_size * min_samples:
+            return list(range(0, size, sample_size)) or [0]
+
+        samples = min(max(size // bytes_per_sample, min_samples), max_samples)
+        sections = samples - 2
+        section_size = (size - 2 * sample_size) // sections
+        rng = random.Random(size)
+        offsets = [0]
+        for i in range(sections):
+            start = sample_size + i * section_size
+            offsets.append(start + rng.randrange(max(section_size - sample_size, 1)))
+        offsets.append(size - sample_size)
+        return offsets
 
     @staticmethod
     def compare_hashes(
         file1: str,
         file2: str,
         comparison_mode: ComparisonMode,
-        buffer_size: int = 4096,
+        buffer_size: int = 1024 * 1024,
         partial_check_size: int = 4096,
+        sample_size: int = 64 * 1024,
+        certain: bool = False,
     ) -> bool:
         """Compares two files efficiently to determine if they are identical based on the specified mode.
 
         Performs checks in order of increasing cost:
         1. File size check (always performed).
         2. Comparison of the first and last `partial_check_size` bytes (if ComparisonMode.PARTIAL).
-        3. Full SHA256 hash comparison (if ComparisonMode.FULL).
+        3. Comparison of blocks spread over the whole file, see `get_sample_offsets`
+           (if ComparisonMode.SAMPLED). If all samples match and `certain` is set,
+           the files are compared completely.
+        4. Full byte comparison, stopping at the first difference (if ComparisonMode.FULL).
 
         Args:
             file1 (str): The path to the first file.
             file2 (str): The path to the second file.
-            comparison_mode (ComparisonMode): The mode to use for comparison (PARTIAL or FULL).
-            buffer_size (int): The buffer size for full hashing (used in FULL mode). Defaults to 4096.
+            comparison_mode (ComparisonMode): The mode to use for comparison (PARTIAL, SAMPLED or FULL).
+            buffer_size (int): The block size for the full comparison (used in FULL mode). Defaults to 1 MiB.
             partial_check_size (int): The size of the head/tail chunks to compare (used in PARTIAL mode). Defaults to 4096.
+            sample_size (int): The size of the sampled blocks (used in SAMPLED mode). Defaults to 64 KiB.
+            certain (bool): Confirm matching samples with a full comparison (used in SAMPLED mode). Defaults to False.
 
         Returns:
             bool: True if the files are considered identical based on the comparison mode, False otherwise.
@@ -91,11 +370,20 @@ class HashingUtils:
 
                         # If the sizes are equal and the beginning and end chunks match, we can assume they are identical
                         return True
+                case ComparisonMode.SAMPLED:
+                    # Compare blocks spread over the whole file
+                    if not HashingUtils.compare_samples(
+                        file1, file2, size1, sample_size
+                    ):
+                        return False
+
+                    # The samples cannot prove that the files are identical
+                    if certain:
+                        return HashingUtils.compare_contents(file1, file2, buffer_size)
+                    return True
                 case ComparisonMode.FULL:
-                    # If sizes match and mode is FULL compare full hashes (most reliable)
-                    hash1 = HashingUtils.get_hash(file1, buffer_size)
-                    hash2 = HashingUtils.get_hash(file2, buffer_size)
-                    return hash1 == hash2
+                    # If sizes match and mode is FULL compare all bytes (most reliable)
+                    return HashingUtils.compare_contents(file1, file2, buffer_size)
 
         except FileNotFoundError as e:
             if not os.path.exists(file1):
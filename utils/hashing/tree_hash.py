@@ -0,0 +1,66 @@
+from utils.hashing.algorithms import new_hash
+from utils.validation.hash_algorithm import HashAlgorithm
+
+# The size of the segments hashed independently. Tree hashes are only
+# comparable when they use the same segment size, so changing it requires a
+# new digest tag.
+SEGMENT_SIZE = 64 * 1024 * 1024
+
+
+def combine_segment_hashes(
+    segment_hashes: list[bytes], algorithm: HashAlgorithm = HashAlgorithm.SHA256
+) -> str:
+    """Combines the hashes of the segments of a file into its tree hash."""
+    root = new_hash(algorithm)
+    for segment_hash in segment_hashes:
+        root.update(segment_hash)
+    return root.hexdigest()
+
+
+class TreeHasher:
+    """
+    Incrementally calculates the tree hash of a stream of data.
+
+    The tree hash is the hash of the hashes of consecutive segments of
+    `SEGMENT_SIZE` bytes, all with the same algorithm (SHA256 by default).
+    Unlike a plain hash, the segments of a file on disk can be hashed in
+    parallel, see `HashingUtils.get_tree_hash`. This class calculates the
+    same hash from a stream, e.g. while the file is being copied.
+
+    Example:
+        hasher = TreeHasher()
+        hasher.update(data)
+        digest = hasher.hexdigest()
+    """
+
+    def __init__(
+        self,
+        segment_size: int = SEGMENT_SIZE,
+        algorithm: HashAlgorithm = HashAlgorithm.SHA256,
+    ):
+        self.segment_size = segment_size
+        self.algorithm = algorithm
+        self._segment_hashes = []
+        self._segment = new_hash(algorithm)
+        self._filled = 0
+
+    def update(self, data) -> None:
+        """Feeds the next chunk of data to the hasher."""
+        view = memoryview(data)
+        while len(view):
+            size = min(len(view), self.segment_size - self._filled)
+            self._segment.update(view[:size])
+            self._filled += size
+            view = view[size:]
+            if self._filled == self.segment_size:
+                self._segment_hashes.append(self._segment.digest())
+                self._segment = new_hash(self.algorithm)
+                self._filled = 0
+
+    def hexdigest(self) -> str:
+        """Returns the tree hash of the data fed so far."""
+        segment_hashes = list(self._segment_hashes)
+        # An empty stream consists of a single empty segment
+        if self._filled or not segment_hashes:
+            segment_hashes.append(self._segment.digest())
+        return combine_segment_hashes(segment_hashes, self.algorithm)
@@ -0,0 +1,3 @@
+from utils.journal.journal import ImportJournal, JournalEntry
+
+__all__ = ["ImportJournal", "JournalEntry"]
@@ -0,0 +1,249 @@
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from utils.copying.copying import FileCopier
+from utils.validation.journal_state import JournalState
+
+
+class JournalEntry(NamedTuple):
+    """The recorded state of the import of a source file."""
+
+    source: str
+    size: int
+    mtime_ns: int
+    destination: str
+    state: JournalState
+    digest: Optional[str]
+
+
+class ImportJournal:
+    """
+    A write-ahead journal of an import, stored in SQLite in the destination.
+
+    Every source file passes through three states: it is planned once its
+    destination is known, in progress while it is being copied and completed
+    once the copy was written completely. The transition to in progress is
+    committed before the first byte is written, so after a crash the journal
+    names every copy that may be half-written.
+
+    On the next run, `recover` removes the temporary files of those copies
+    so they are redone, and `lookup_completed` lets completed files be
+    skipped without reading them or their copies again.
+
+    Source files are identified by their absolute path, size and modification
+    time, so a source file that changed since it was imported is imported
+    again. Destination paths are stored relative to the destination root.
+
+    The journal can be shared by multiple threads.
+
+    Example:
+        with ImportJournal(db_path, destination) as journal:
+            journal.recover()
+            if journal.lookup_completed(source) is None:
+                journal.start(source, destination_file)
+                digest = copier.copy(source, destination_file)
+                journal.complete(source, destination_file, digest)
+    """
+
+    # Commit pending planned entries after this many changes
+    COMMIT_INTERVAL = 256
+
+    def __init__(self, path: Path, root: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.root = root
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                source TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                destination TEXT NOT NULL,
+                state TEXT NOT NULL,
+                digest TEXT
+            )
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS files_state ON files (state)"
+        )
+        self._connection.commit()
+
+    def lookup(self, source: Path) -> Optional[JournalEntry]:
+        """
+        Get the entry of a source file, if the file is unchanged since.
+
+        Args:
+            source: The source file
+
+        Returns:
+            The journal entry, or None if the file is not in the journal or
+            its size or modification time changed since it was recorded
+        """
+        stat = source.stat()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT * FROM files WHERE source = ?", (str(source.absolute()),)
+            ).fetchone()
+        if row is None:
+            return None
+
+        entry = ImportJournal._entry(row)
+        if entry.size != stat.st_size or entry.mtime_ns != stat.st_mtime_ns:
+            return None
+        return entry
+
+    def lookup_completed(self, source: Path) -> Optional[Path]:
+        """
+        Get the copy of a source file that was completely imported before.
+
+        Only the size of the copy is checked, so this takes two stat calls
+        and no reads.
+
+        Args:
+            source: The source file
+
+        Returns:
+            The destination file, or None if the file was not imported
+            completely or its copy is missing or has another size
+        """
+        entry = self.lookup(source)
+        if entry is None or entry.state != JournalState.COMPLETED:
+            return None
+
+        destination = self._absolute(entry.destination)
+        try:
+            if destination.stat().st_size != entry.size:
+                return None
+        except FileNotFoundError:
+            return None
+        return destination
+
+    def plan(self, source: Path, destination: Path):
+        """
+        Record that a source file is going to be imported to a destination.
+
+        Planned entries are committed in batches, losing them on a crash
+        only means that the files are planned again.
+        """
+        with self._lock:
+            self._set(source, destination, JournalState.PLANNED)
+            self._pending += 1
+            if self._pending >= ImportJournal.COMMIT_INTERVAL:
+                self._commit()
+
+    def start(self, source: Path, destination: Path):
+        """Record that a source file is being copied, before it is copied."""
+        with self._lock:
+            self._set(source, destination, JournalState.IN_PROGRESS)
+            self._commit()
+
+    def complete(self, source: Path, destination: Path, digest: Optional[str] = None):
+        """
+        Record that a source file was imported completely.
+
+        Args:
+            source: The source file
+            destination: The destination file written or found to be identical
+            digest: The tagged digest of the content, if it is known
+        """
+        with self._lock:
+            self._set(source, destination, JournalState.COMPLETED, digest)
+            self._commit()
+
+    def recover(self, keep_temp_files: bool = False) -> list[Path]:
+        """
+        Remove the copies an interrupted import may have left half-written.
+
+        Copies are only renamed to their destination once they are complete,
+        so only the temporary file of each interrupted copy is removed, and
+        the file under the destination name, e.g. the original of an
+        interrupted replace, is kept. The entries of those files are reset to
+        planned, so the files are copied again.
+
+        Args:
+            keep_temp_files: Keep the temporary files, so the copies can be
+                resumed by a `FileCopier` with resume
+
+        Returns:
+            The temporary files that were removed
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT source, destination FROM files WHERE state = ?",
+                (JournalState.IN_PROGRESS.value,),
+            ).fetchall()
+
+        removed = []
+        for source, destination in rows:
+            if not keep_temp_files:
+                temp_file = Path(FileCopier.temp_path(str(self._absolute(destination))))
+                try:
+                    os.remove(temp_file)
+                    removed.append(temp_file)
+                except FileNotFoundError:
+                    pass
+            with self._lock:
+                self._connection.execute(
+                    "UPDATE files SET state = ? WHERE source = ?",
+                    (JournalState.PLANNED.value, source),
+                )
+        with self._lock:
+            self._commit()
+        return removed
+
+    def close(self):
+        """Commit the pending changes and close the database."""
+        with self._lock:
+            self._connection.commit()
+            self._connection.close()
+
+    def __enter__(self) -> "ImportJournal":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _set(
+        self,
+        source: Path,
+        destination: Path,
+        state: JournalState,
+        digest: Optional[str] = None,
+    ):
+        """Write the entry of a source file. The lock must be held."""
+        stat = source.stat()
+        self._connection.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                str(source.absolute()),
+                stat.st_size,
+                stat.st_mtime_ns,
+                destination.absolute().relative_to(self.root.absolute()).as_posix(),
+                state.value,
+                digest,
+            ),
+        )
+
+    def _commit(self):
+        """Commit the pending changes. The lock must be held."""
+        self._connection.commit()
+        self._pending = 0
+
+    def _absolute(self, destination: str) -> Path:
+        return self.root.joinpath(*destination.split("/"))
+
+    @staticmethod
+    def _entry(row: tuple) -> JournalEntry:
+        source, size, mtime_ns, destination, state, digest = row
+        return JournalEntry(
+            source, size, mtime_ns, destination, JournalState(state), digest
+        )
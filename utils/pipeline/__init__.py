@@ -0,0 +1,3 @@
+from utils.pipeline.pipeline import Stage, StagedPipeline
+
+__all__ = ["Stage", "StagedPipeline"]
@@ -0,0 +1,232 @@
+import queue
+import threading
+from typing import Any, Callable, Iterable, Iterator, NamedTuple
+
+
+class Stage(NamedTuple):
+    """
+    A named processing step of a pipeline, executed by `workers` threads.
+
+    If `batch_size` is greater than 1, `func` receives a list of up to
+    `batch_size` items that are ready at the same time and must return a list
+    with one result per item.
+    """
+
+    name: str
+    func: Callable[[Any], Any]
+    workers: int = 1
+    batch_size: int = 1
+
+
+class _Failure:
+    """Wraps an exception raised while producing or processing an item."""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+# Marks the end of the input of a stage and the end of all results
+_DONE = object()
+
+
+class StagedPipeline:
+    """
+    Streams items through a chain of stages connected by bounded queues.
+
+    Each stage runs on its own pool of threads, so while one item is being
+    processed by a later stage, the next items are already being prepared by
+    the earlier ones. The input iterable itself is consumed on a separate
+    thread, which means the first results are available before the input is
+    exhausted.
+
+    At most `queue_size` items are in flight at any time. Once that limit is
+    reached, the input is no longer consumed until the oldest item has been
+    yielded, which keeps memory usage flat regardless of the input size.
+
+    Example:
+        pipeline = StagedPipeline([Stage("square", lambda x: x * x, workers=4)])
+        for result in pipeline.run(range(10)):
+            print(result)
+    """
+
+    def __init__(self, stages: list[Stage], queue_size: int = 64):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        if queue_size < 1:
+            raise ValueError("Queue size must be at least 1")
+
+        self.stages = stages
+        self.queue_size = queue_size
+
+    def run(self, items: Iterable[Any]) -> Iterator[Any]:
+        """
+        Run all items through the stages and yield the results.
+
+        Results are yielded in the order of the input items, regardless of
+        which worker finished first.
+
+        Args:
+            items: The input items. The iterable is consumed lazily.
+
+        Yields:
+            The result of the last stage for each input item.
+
+        Raises:
+            Exception: The first exception raised by the input iterable or by a
+                stage function, re-raised in the order of the input items.
+        """
+        stop = threading.Event()
+        window = threading.Semaphore(self.queue_size)
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        # The result queue is unbounded; the window already limits its size
+        results = queue.Queue()
+
+        threads = [
+            threading.Thread(
+                target=self._produce,
+                args=(items, queues[0], window, stop),
+                name="pipeline-input",
+                daemon=True,
+            )
+        ]
+        for position, stage in enumerate(self.stages):
+            is_last = position == len(self.stages) - 1
+            output = results if is_last else queues[position + 1]
+            downstream_workers = 1 if is_last else self.stages[position + 1].workers
+            remaining = [stage.workers]
+            lock = threading.Lock()
+            for worker in range(stage.workers):
+                threads.append(
+                    threading.Thread(
+                        target=self._work,
+                        args=(
+                            stage,
+                            queues[position],
+                            output,
+                            downstream_workers,
+                            remaining,
+                            lock,
+                            stop,
+                        ),
+                        name=f"pipeline-{stage.name}-{worker}",
+                        daemon=True,
+                    )
+                )
+
+        for thread in threads:
+            thread.start()
+
+        try:
+            next_index = 0
+            pending = {}
+            while True:
+                entry = results.get()
+                if entry is _DONE:
+                    break
+                index, result = entry
+                pending[index] = result
+                while next_index in pending:
+                    result = pending.pop(next_index)
+                    next_index += 1
+                    window.release()
+                    if isinstance(result, _Failure):
+                        raise result.error
+                    yield result
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    def _produce(
+        self,
+        items: Iterable[Any],
+        output: queue.Queue,
+        window: threading.Semaphore,
+        stop: threading.Event,
+    ) -> None:
+        """Feed the input items into the first stage, honoring the window."""
+        index = 0
+        try:
+            for item in items:
+                if not StagedPipeline._acquire(window, stop):
+                    return
+                output.put((index, item))
+                index += 1
+        except Exception as e:
+            # Forward the error as an item, so it is raised in input order
+            if StagedPipeline._acquire(window, stop):
+                output.put((index, _Failure(e)))
+        finally:
+            for _ in range(self.stages[0].workers):
+                output.put(_DONE)
+
+    @staticmethod
+    def _acquire(window: threading.Semaphore, stop: threading.Event) -> bool:
+        """Wait for a free slot in the window, unless the pipeline is stopped."""
+        while not window.acquire(timeout=0.1):
+            if stop.is_set():
+                return False
+        return not stop.is_set()
+
+    @staticmethod
+    def _process(stage: Stage, batch: list[tuple[int, Any]]) -> list[tuple[int, Any]]:
+        """Apply the stage function to a batch of items, passing failures on."""
+        pending = [
+            (index, item) for index, item in batch if not isinstance(item, _Failure)
+        ]
+        results = [(index, item) for index, item in batch if isinstance(item, _Failure)]
+        if not pending:
+            return results
+
+        try:
+            if stage.batch_size > 1:
+                outputs = stage.func([item for _, item in pending])
+            else:
+                outputs = [stage.func(item) for _, item in pending]
+            results.extend(
+                (index, output) for (index, _), output in zip(pending, outputs)
+            )
+        except Exception as e:
+            results.extend((index, _Failure(e)) for index, _ in pending)
+        return results
+
+    @staticmethod
+    def _work(
+        stage: Stage,
+        source: queue.Queue,
+        output: queue.Queue,
+        downstream_workers: int,
+        remaining: list[int],
+        lock: threading.Lock,
+        stop: threading.Event,
+    ) -> None:
+        """Process items of one stage until the end of its input."""
+        done = False
+        while not done:
+            entry = source.get()
+            if entry is _DONE:
+                break
+            batch = [entry]
+            # Add whatever else is ready, without waiting for more items
+            while len(batch) < stage.batch_size:
+                try:
+                    entry = source.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is _DONE:
+                    done = True
+                    break
+                batch.append(entry)
+
+            if stop.is_set():
+                # The consumer is gone, just drain the queue
+                continue
+            for entry in StagedPipeline._process(stage, batch):
+                output.put(entry)
+
+        # The last worker of a stage signals the end to the next stage
+        with lock:
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                for _ in range(downstream_workers):
+                    output.put(_DONE)
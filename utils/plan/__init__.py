@@ -0,0 +1,3 @@
+from utils.plan.plan import ImportPlan, PlanEntry
+
+__all__ = ["ImportPlan", "PlanEntry"]
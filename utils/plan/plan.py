@@ -0,0 +1,100 @@
+import json
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from utils.validation.plan_action import PlanAction
+
+
+class PlanEntry(NamedTuple):
+    """What an import plan does with a single source file, and why."""
+
+    action: PlanAction
+    source: str
+    destination: Optional[str]
+    bytes: int
+    reason: str
+
+
+class ImportPlan:
+    """
+    The decisions of an import, made in advance and stored in a file.
+
+    A plan holds one entry per source file with the action to take, the
+    destination file and the reason for the decision. It is stored as JSON
+    lines: a header with the destination root and the totals of the plan,
+    followed by one line per entry. Plans are written by the `plan` command
+    and executed by the `apply` command, without resolving dates or comparing
+    files again.
+
+    Example:
+        plan = ImportPlan(destination)
+        plan.add(PlanEntry(PlanAction.COPY, source, destination_file, size, "new file"))
+        plan.save(Path('import-plan.jsonl'))
+        plan = ImportPlan.load(Path('import-plan.jsonl'))
+    """
+
+    # Version of the file format, stored in the header
+    VERSION = 1
+
+    def __init__(self, destination: Path, entries: Optional[list[PlanEntry]] = None):
+        self.destination = destination
+        self.entries = entries or []
+
+    def add(self, entry: PlanEntry):
+        """Add the entry of a source file to the plan."""
+        self.entries.append(entry)
+
+    def totals(self) -> dict[str, int]:
+        """
+        Sum up the plan.
+
+        Returns:
+            The number of files, the number of files per action and the
+            number of bytes to copy
+        """
+        totals = {"files": len(self.entries)}
+        totals.update({action.value: 0 for action in PlanAction})
+        totals["bytes_to_copy"] = 0
+        for entry in self.entries:
+            totals[entry.action.value] += 1
+            if entry.action != PlanAction.SKIP:
+                totals["bytes_to_copy"] += entry.bytes
+        return totals
+
+    def save(self, path: Path):
+        """Write the plan to a file, replacing it if it exists."""
+        header = {
+            "version": ImportPlan.VERSION,
+            "destination": str(self.destination),
+            "totals": self.totals(),
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(header) + "\n")
+            for entry in self.entries:
+                f.write(json.dumps(entry._asdict()) + "\n")
+
+    @staticmethod
+    def load(path: Path) -> "ImportPlan":
+        """
+        Read a plan written by `save`.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            ValueError: If the file is not a plan of a supported version.
+        """
+        with open(path, encoding="utf-8") as f:
+            try:
+                header = json.loads(f.readline())
+                if header.get("version") != ImportPlan.VERSION:
+                    raise ValueError(
+                        f"Unsupported plan version {header.get('version')} in {path}"
+                    )
+                destination = Path(header["destination"])
+                entries = []
+                for line in f:
+                    entry = json.loads(line)
+                    entry["action"] = PlanAction(entry["action"])
+                    entries.append(PlanEntry(**entry))
+            except (json.JSONDecodeError, AttributeError, KeyError, TypeError) as e:
+                raise ValueError(f"{path} is not an import plan: {e}") from e
+        return ImportPlan(destination, entries)
@@ -0,0 +1,3 @@
+from utils.progress.progress import ImportProgress
+
+__all__ = ["ImportProgress"]
@@ -0,0 +1,185 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Iterator, Optional, Union
+
+from rich.console import Console, Group
+from rich.live import Live
+from rich.progress import (
+    BarColumn,
+    DownloadColumn,
+    MofNCompleteColumn,
+    Progress,
+    TextColumn,
+    TimeRemainingColumn,
+    TransferSpeedColumn,
+)
+
+from utils.pipeline.pipeline import Stage
+
+
+class ImportProgress:
+    """
+    Live display of the progress of an import, measured in bytes.
+
+    Unlike a progress bar counting files, where a 30 GB clip counts as much
+    as a 5 MB image, the total row counts the bytes copied against the bytes
+    of all files discovered so far, with the transfer rate and the estimated
+    time remaining. Files that are skipped are taken off the total.
+
+    Below it, there is a row per copy worker with the file it is copying and
+    its current rate, so a card reader that dropped to USB2 speed is noticed
+    right away, and a row per pipeline stage counting the files it has
+    processed.
+
+    The bytes are reported by `advance`, which is meant to be passed to
+    `FileCopier` as `on_progress`. It is called once per copied chunk and
+    only updates two counters, so the overhead does not depend on the file
+    size. All methods are thread-safe.
+
+    Example:
+        with ImportProgress() as progress:
+            copier = FileCopier(on_progress=progress.advance)
+            stage = progress.track_stage(Stage("copy", copy), "Copying", file_of=str)
+            pipeline = StagedPipeline([stage])
+            for result in pipeline.run(progress.discover(files)):
+                pass
+    """
+
+    def __init__(self, console: Optional[Console] = None):
+        self._files = Progress(
+            TextColumn("{task.description}"),
+            BarColumn(),
+            MofNCompleteColumn(),
+            console=console,
+        )
+        self._bytes = Progress(
+            TextColumn("{task.description}"),
+            BarColumn(),
+            DownloadColumn(),
+            TransferSpeedColumn(),
+            TimeRemainingColumn(),
+            console=console,
+        )
+        self._live = Live(
+            Group(self._bytes, self._files), console=console, refresh_per_second=4
+        )
+        self._lock = threading.Lock()
+        self._total = self._bytes.add_task("Total", total=0)
+        self._expected_bytes = 0
+        self._expected_files = 0
+        self._stages = []
+        self._workers = threading.local()
+        self._worker_count = 0
+
+    def __enter__(self) -> "ImportProgress":
+        self._live.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._live.stop()
+
+    def expect(self, size: int):
+        """Add a file of the given size to the totals."""
+        with self._lock:
+            self._expected_bytes += size
+            self._expected_files += 1
+            self._bytes.update(self._total, total=self._expected_bytes)
+            for task in self._stages:
+                self._files.update(task, total=self._expected_files)
+
+    def discover(self, files: Iterable[Any]) -> Iterator[Any]:
+        """
+        Add each file to the totals as it is discovered.
+
+        Args:
+            files: The paths of the files, consumed lazily
+
+        Yields:
+            The files, unchanged
+        """
+        for file in files:
+            self.expect(ImportProgress._size(file))
+            yield file
+
+    def advance(self, copied: int):
+        """Report bytes copied by the current thread."""
+        self._bytes.advance(self._total, copied)
+        worker = getattr(self._workers, "task", None)
+        if worker is not None:
+            self._workers.copied += copied
+            self._bytes.advance(worker, copied)
+
+    @contextmanager
+    def file(self, file: Union[str, os.PathLike]):
+        """
+        Show the file the current thread is working on in its worker row.
+
+        The bytes of the file not reported by `advance` until the end, e.g.
+        because the file was skipped, are taken off the total.
+        """
+        worker = self._worker_task()
+        size = ImportProgress._size(file)
+        self._workers.copied = 0
+        self._bytes.reset(worker, total=size, description=f"  {os.path.basename(file)}")
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._expected_bytes -= max(size - self._workers.copied, 0)
+                self._bytes.update(self._total, total=self._expected_bytes)
+            self._bytes.update(
+                worker, description=f"  Worker {self._workers.number}: idle"
+            )
+
+    def track_stage(
+        self,
+        stage: Stage,
+        description: str,
+        file_of: Optional[Callable[[Any], Union[str, os.PathLike]]] = None,
+    ) -> Stage:
+        """
+        Count the files processed by a pipeline stage in a row of its own.
+
+        Args:
+            stage: The stage, batched or not
+            description: The description of the row
+            file_of: Get the path of the file from an item of the stage, to
+                show the file in the worker row while it is processed
+
+        Returns:
+            The stage with its function wrapped
+        """
+        task = self._files.add_task(description, total=self._expected_files)
+        with self._lock:
+            self._stages.append(task)
+
+        def tracked(item):
+            if file_of is None:
+                result = stage.func(item)
+            else:
+                with self.file(file_of(item)):
+                    result = stage.func(item)
+            self._files.advance(task, len(item) if stage.batch_size > 1 else 1)
+            return result
+
+        return stage._replace(func=tracked)
+
+    def _worker_task(self):
+        """Get the row of the current thread, adding it on first use."""
+        worker = getattr(self._workers, "task", None)
+        if worker is None:
+            with self._lock:
+                self._worker_count += 1
+                number = self._worker_count
+            worker = self._bytes.add_task(f"  Worker {number}", total=None)
+            self._workers.task = worker
+            self._workers.number = number
+        return worker
+
+    @staticmethod
+    def _size(file: Union[str, os.PathLike]) -> int:
+        try:
+            return os.stat(file).st_size
+        except OSError:
+            return 0
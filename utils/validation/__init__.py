@@ -1,4 +1,19 @@
+from utils.validation.date_source import DateSource
+from utils.validation.durability import Durability
 from utils.validation.file_types import FileType
+from utils.validation.hash_algorithm import HashAlgorithm
+from utils.validation.import_result import ImportResult
+from utils.validation.journal_state import JournalState
+from utils.validation.plan_action import PlanAction
 from utils.validation.validators import validate_directories
 
-__all__ = ["validate_directories", "FileType"]
+__all__ = [
+    "validate_directories",
+    "DateSource",
+    "Durability",
+    "FileType",
+    "HashAlgorithm",
+    "ImportResult",
+    "JournalState",
+    "PlanAction",
+]
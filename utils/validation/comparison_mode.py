@@ -6,3 +6,4 @@ class ComparisonMode(str, Enum):
 
     FULL = "full"
     PARTIAL = "partial"
+    SAMPLED = "sampled"
@@ -0,0 +1,9 @@
+from enum import Enum
+
+
+class DateSource(str, Enum):
+    """Enum for the sources of a file's capture date."""
+
+    EXIF = "exif"
+    ATOM = "atom"
+    MTIME = "mtime"
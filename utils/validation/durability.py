@@ -0,0 +1,9 @@
+from enum import Enum
+
+
+class Durability(str, Enum):
+    """Enum for when copied files are flushed to the storage device."""
+
+    FILE = "file"
+    BATCH = "batch"
+    NONE = "none"
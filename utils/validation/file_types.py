@@ -6,3 +6,4 @@ class FileType(str, Enum):
 
     IMAGE = "image"
     VIDEO = "video"
+    ALL = "all"
@@ -0,0 +1,9 @@
+from enum import Enum
+
+
+class HashAlgorithm(str, Enum):
+    """Enum for hash algorithms."""
+
+    SHA256 = "sha256"
+    BLAKE2B = "blake2b"
+    CRC32 = "crc32"
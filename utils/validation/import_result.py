@@ -0,0 +1,11 @@
+from enum import Enum
+
+
+class ImportResult(str, Enum):
+    """Enum for the outcome of importing a single file."""
+
+    COPIED = "copied"
+    # Not copied on purpose, e.g. because the content is already in the destination
+    SKIPPED = "skipped"
+    # Not copied because of an error, e.g. no date folder or a failed copy
+    FAILED = "failed"
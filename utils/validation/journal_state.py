@@ -0,0 +1,9 @@
+from enum import Enum
+
+
+class JournalState(str, Enum):
+    """Enum for the states of a file in the import journal."""
+
+    PLANNED = "planned"
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
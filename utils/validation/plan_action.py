@@ -0,0 +1,10 @@
+from enum import Enum
+
+
+class PlanAction(str, Enum):
+    """Enum for what an import plan does with a source file."""
+
+    COPY = "copy"
+    REPLACE = "replace"
+    RENAME = "rename"
+    SKIP = "skip"
@@ -0,0 +1,3 @@
+from utils.video.video import VideoUtils
+
+__all__ = ["VideoUtils"]
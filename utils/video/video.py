@@ -0,0 +1,119 @@
+import logging
+import struct
+from datetime import datetime
+from typing import Optional
+
+from utils.exif.isobmff import iter_boxes, parse_boxes
+
+
+class VideoUtils:
+    """
+    Utilities for working with metadata of MP4/QuickTime videos.
+
+    Only the atoms needed for the metadata are read: the walker seeks past
+    everything else, including the media data in `mdat`, so even the `moov`
+    atom at the end of a huge file costs just a few small reads.
+
+    Example:
+        date_taken = VideoUtils.get_date_taken('path/to/video.mp4')
+    """
+
+    # Seconds between the QuickTime epoch (1904-01-01) and the Unix epoch
+    QUICKTIME_EPOCH_OFFSET = 2082844800
+    # Atoms that are read into memory are limited to this size
+    MAX_ATOM_SIZE = 1024 * 1024
+
+    @staticmethod
+    def get_date_taken(path: str) -> Optional[datetime]:
+        """
+        Get the date the video was recorded from its metadata atoms.
+
+        The vendor date in `moov/udta` (the QuickTime `©day` atom) is preferred,
+        because it usually carries the time zone of the camera. Otherwise the
+        creation time of the movie header `moov/mvhd` is used, converted from
+        UTC to local time.
+
+        Args:
+            path: Path to the video file
+
+        Returns:
+            datetime object representing when the video was recorded, or None
+            if the information is not available or an error occurred
+
+        Note:
+            The top-level atoms are walked in any order, as QuickTime files
+            may start with e.g. `wide`, `free` or `mdat` instead of `ftyp`.
+            Files without metadata are expected, the callers fall back to the
+            modification time, so missing or invalid metadata is only logged
+            at debug level.
+        """
+        try:
+            with open(path, "rb") as f:
+                for box_type, size in iter_boxes(f):
+                    if box_type == b"moov":
+                        return VideoUtils._read_moov(f, f.tell() + size)
+
+            logging.debug(f"No movie atom found in {path}")
+            return None
+        except Exception as e:
+            logging.debug(f"Error extracting video metadata from {path}: {str(e)}")
+            return None
+
+    @staticmethod
+    def _read_moov(f, end: int) -> Optional[datetime]:
+        """Read the recording date from the children of the `moov` atom."""
+        creation_date = None
+        for box_type, size in iter_boxes(f, end):
+            if box_type == b"udta" and size <= VideoUtils.MAX_ATOM_SIZE:
+                vendor_date = VideoUtils._parse_udta(f.read(size))
+                if vendor_date is not None:
+                    return vendor_date
+            elif box_type == b"mvhd":
+                creation_date = VideoUtils._parse_mvhd(f.read(min(size, 32)))
+        return creation_date
+
+    @staticmethod
+    def _parse_mvhd(mvhd: bytes) -> Optional[datetime]:
+        """Parse the creation time of a movie header atom."""
+        if mvhd[0] == 1:
+            (creation_time,) = struct.unpack_from(">Q", mvhd, 4)
+        else:
+            (creation_time,) = struct.unpack_from(">I", mvhd, 4)
+
+        # Cameras without a clock write zero
+        if creation_time <= VideoUtils.QUICKTIME_EPOCH_OFFSET:
+            return None
+        return datetime.fromtimestamp(creation_time - VideoUtils.QUICKTIME_EPOCH_OFFSET)
+
+    @staticmethod
+    def _parse_udta(udta: bytes) -> Optional[datetime]:
+        """Parse the vendor date of a user data atom."""
+        for box_type, payload in parse_boxes(udta):
+            if box_type == b"\xa9day":
+                # QuickTime text atom: 16 bit length, 16 bit language, text
+                (length,) = struct.unpack_from(">H", payload, 0)
+                return VideoUtils._parse_date(payload[4 : 4 + length])
+            if box_type == b"meta":
+                # iTunes style metadata: meta (full box) / ilst / ©day / data
+                for meta_type, meta_payload in parse_boxes(payload, 4):
+                    if meta_type != b"ilst":
+                        continue
+                    for item_type, item in parse_boxes(meta_payload):
+                        if item_type != b"\xa9day":
+                            continue
+                        for data_type, data in parse_boxes(item):
+                            if data_type == b"data":
+                                # Skip the type indicator and the locale
+                                return VideoUtils._parse_date(data[8:])
+        return None
+
+    @staticmethod
+    def _parse_date(value: bytes) -> Optional[datetime]:
+        """Parse an ISO 8601 date into a naive datetime in local time."""
+        try:
+            date = datetime.fromisoformat(value.decode("utf-8").strip("\x00 "))
+        except ValueError:
+            return None
+        if date.tzinfo is not None:
+            date = date.astimezone().replace(tzinfo=None)
+        return date